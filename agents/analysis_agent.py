@@ -32,41 +32,75 @@ def extract_metric(text: str, keywords: list) -> float:
                         pass
                  
                  if vals:
-                    # Heuristic: Prefer large absolute numbers (Currency) over small ones (Ratios/Notes/%)
-                    large_vals = [v for v in vals if v > 1000]
-                    if large_vals:
-                         best_val = large_vals[-1] # Usually most recent year is last column
-                    else:
-                         best_val = vals[-1] # Fallback
+                    best_val = _pick_value(vals)
 
     return best_val
 
-def analyze_financials(retrieved_chunks: list, user_query: str) -> dict:
+def _pick_value(vals: list) -> float:
+    # Heuristic: Prefer large absolute numbers (Currency) over small ones (Ratios/Notes/%)
+    large_vals = [v for v in vals if v > 1000]
+    if large_vals:
+        return large_vals[-1] # Usually most recent year is last column
+    return vals[-1] # Fallback
+
+def extract_metric_from_tables(chunks: list, keywords: list) -> float:
+    """
+    Reads metrics straight from structured table chunks (`cells` grid from the chunker):
+    the row label is matched against keywords and the value cells are parsed individually,
+    so no regex over flattened text is needed.
+    """
+    best_val = None
+    for chunk in chunks:
+        for row in chunk.get("cells") or []:
+            label = next((c for c in row if c), "").lower()
+            if not any(k in label for k in keywords):
+                continue
+
+            vals = []
+            for cell in row[1:]:
+                v = parse_financial_value(cell) if cell else None
+                if v is not None:
+                    vals.append(v)
+            if vals:
+                best_val = _pick_value(vals)
+
+    return best_val
+
+def find_metric(chunks: list, text: str, keywords: list) -> float:
+    """Table cells first (exact row/column), regex over text as the fallback."""
+    value = extract_metric_from_tables(chunks, keywords)
+    return value if value is not None else extract_metric(text, keywords)
+
+def analyze_financials(retrieved_chunks: list, user_query: str, table_chunks: list = None) -> dict:
     """
     Core Logic: Extracts raw metrics -> computes ratios -> reports missing data.
+    `table_chunks` (from a has_table filtered search) take precedence over the general context.
     """
     combined_text = "\n".join(chunk["content"] for chunk in retrieved_chunks)
+    # Table extraction keeps the last matching row, so the filtered table chunks go last
+    table_ids = {c.get("chunk_id") for c in table_chunks or []}
+    metric_chunks = [c for c in retrieved_chunks if c.get("chunk_id") not in table_ids] + list(table_chunks or [])
 
-    # 1. Regex Extraction of Core Metrics
+    # 1. Extraction of Core Metrics (table cells, then regex)
     metrics = {
-        "total_debt": extract_metric(combined_text, ["total debt", "total borrowings", "long term borrowings"]),
-        "total_equity": extract_metric(combined_text, ["total equity", "shareholder's equity", "net worth"]),
-        "current_liabilities": extract_metric(combined_text, ["current liabilities", "short term borrowings"]),
-        "non_current_liabilities": extract_metric(combined_text, ["non-current liabilities", "long term liabilities"]),
-        "EBITDA": extract_metric(combined_text, ["ebitda", "operating profit", "profit before tax"]),
-        "interest_expense": extract_metric(combined_text, ["finance costs", "interest expense"]),
+        "total_debt": find_metric(metric_chunks, combined_text, ["total debt", "total borrowings", "long term borrowings"]),
+        "total_equity": find_metric(metric_chunks, combined_text, ["total equity", "shareholder's equity", "net worth"]),
+        "current_liabilities": find_metric(metric_chunks, combined_text, ["current liabilities", "short term borrowings"]),
+        "non_current_liabilities": find_metric(metric_chunks, combined_text, ["non-current liabilities", "long term liabilities"]),
+        "EBITDA": find_metric(metric_chunks, combined_text, ["ebitda", "operating profit", "profit before tax"]),
+        "interest_expense": find_metric(metric_chunks, combined_text, ["finance costs", "interest expense"]),
     }
     
     # 2. Context-Aware Extraction (Depends on User Query)
     query_lower = user_query.lower()
     if "revenue" in query_lower or "sales" in query_lower:
-        metrics["revenue"] = extract_metric(combined_text, ["revenue from operations", "total revenue", "revenue"])
+        metrics["revenue"] = find_metric(metric_chunks, combined_text, ["revenue from operations", "total revenue", "revenue"])
     
     if "profit" in query_lower or "net income" in query_lower:
-        metrics["net_profit"] = extract_metric(combined_text, ["net profit", "profit for the period", "net income"])
+        metrics["net_profit"] = find_metric(metric_chunks, combined_text, ["net profit", "profit for the period", "net income"])
         
     if "cash flow" in query_lower:
-        metrics["cash_flow"] = extract_metric(combined_text, ["cash flow from operating", "net cash from operating"])
+        metrics["cash_flow"] = find_metric(metric_chunks, combined_text, ["cash flow from operating", "net cash from operating"])
 
     # 3. Deterministic Ratio Calculation (Python Math)
     ratios = {
@@ -81,5 +115,5 @@ def analyze_financials(retrieved_chunks: list, user_query: str) -> dict:
         "extracted_metrics": metrics,
         "derived_ratios": ratios,
         "missing_metrics": missing,
-        "pages_used": list({chunk["page_no"] for chunk in retrieved_chunks})
+        "pages_used": list({chunk["page_no"] for chunk in metric_chunks})
     }
@@ -1,18 +1,28 @@
 import os
 import logging
-from openai import OpenAI
+import threading
+from agents.llm_client import get_client, get_async_client
+from agents.query_complexity import needs_decomposition
+from agents.decomposition_cache import decomposition_cache
 
 logger = logging.getLogger(__name__)
 
-def get_client():
-    return OpenAI(
-        base_url="https://openrouter.ai/api/v1",
-        api_key=os.getenv("OPENROUTER_API_KEY"),
-    )
+MODEL = "mistralai/mistral-7b-instruct-v0.1"
 
-def decompose_query(user_query: str):
-    client = get_client()
-    prompt = f"""
+# Skip the LLM for single-intent questions (see agents.query_complexity)
+DECOMPOSE_BYPASS = os.getenv("DECOMPOSE_BYPASS", "1") != "0"
+
+# Where each decomposition came from: "bypass" and "cache" are avoided LLM calls
+SOURCE_BYPASS = "bypass"
+SOURCE_CACHE = "cache"
+SOURCE_LLM = "llm"
+SOURCE_FALLBACK = "fallback"   # the LLM call failed; the query is used as is
+
+_counts = {SOURCE_BYPASS: 0, SOURCE_CACHE: 0, SOURCE_LLM: 0, SOURCE_FALLBACK: 0}
+_counts_lock = threading.Lock()
+
+def build_prompt(user_query: str):
+    return f"""
 You are a financial analyst.
 
 Break the following question into 2–4 clear sub-questions
@@ -24,23 +34,79 @@ Question:
 Return as bullet points.
 """
 
+def parse_sub_questions(content: str, user_query: str):
+    sub_questions = [line.strip("- ").strip() for line in content.split("\n") if line.strip().startswith("-")]
+
+    # Fallback: If no bullet points found, or empty, use original query
+    if not sub_questions:
+         return [user_query]
+         
+    return sub_questions
+
+def _shortcut(user_query: str):
+    """(sub_questions, source) without calling the LLM, or None if it has to be called."""
+    if DECOMPOSE_BYPASS and not needs_decomposition(user_query):
+        return [user_query], SOURCE_BYPASS
+    cached = decomposition_cache.get(MODEL, user_query)
+    if cached is not None:
+        return cached, SOURCE_CACHE
+    return None
+
+def _record(user_query: str, sub_questions, source: str):
+    if source == SOURCE_LLM:
+        decomposition_cache.put(MODEL, user_query, sub_questions)
+    with _counts_lock:
+        _counts[source] += 1
+    return sub_questions, source
+
+def decomposition_info(source: str) -> dict:
+    """Per-request counters for the response."""
+    called = source in (SOURCE_LLM, SOURCE_FALLBACK)
+    return {"source": source, "llm_calls": int(called), "llm_calls_avoided": int(not called)}
+
+def decomposer_stats() -> dict:
+    with _counts_lock:
+        counts = dict(_counts)
+    return {
+        **counts,
+        "llm_calls_avoided": counts[SOURCE_BYPASS] + counts[SOURCE_CACHE],
+        "cache": decomposition_cache.stats(),
+    }
+
+def decompose(user_query: str):
+    """(sub_questions, source); source is one of bypass / cache / llm / fallback."""
+    shortcut = _shortcut(user_query)
+    if shortcut:
+        return _record(user_query, *shortcut)
     try:
-        response = client.chat.completions.create(
-            model="mistralai/mistral-7b-instruct-v0.1",
-            messages=[{"role": "user", "content": prompt}],
+        response = get_client().chat.completions.create(
+            model=MODEL,
+            messages=[{"role": "user", "content": build_prompt(user_query)}],
             temperature=0.2
         )
-        
-        content = response.choices[0].message.content
-        sub_questions = [line.strip("- ").strip() for line in content.split("\n") if line.strip().startswith("-")]
-
-        # Fallback: If no bullet points found, or empty, use original query
-        if not sub_questions:
-             return [user_query]
-             
-        return sub_questions
+        return _record(user_query, parse_sub_questions(response.choices[0].message.content, user_query), SOURCE_LLM)
 
     except Exception as e:
         logger.error(f"Decomposer Error: {e}")
         # Critical Fallback: Ensure we never return empty list, or the retriever will do nothing
-        return [user_query]
+        return _record(user_query, [user_query], SOURCE_FALLBACK)
+
+async def adecompose(user_query: str):
+    """decompose() on the shared async client."""
+    shortcut = _shortcut(user_query)
+    if shortcut:
+        return _record(user_query, *shortcut)
+    try:
+        response = await get_async_client().chat.completions.create(
+            model=MODEL,
+            messages=[{"role": "user", "content": build_prompt(user_query)}],
+            temperature=0.2
+        )
+        return _record(user_query, parse_sub_questions(response.choices[0].message.content, user_query), SOURCE_LLM)
+
+    except Exception as e:
+        logger.error(f"Decomposer Error: {e}")
+        return _record(user_query, [user_query], SOURCE_FALLBACK)
+
+def decompose_query(user_query: str):
+    return decompose(user_query)[0]
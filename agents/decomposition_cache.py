@@ -0,0 +1,136 @@
+"""
+Decomposition Cache
+-------------------
+Persistent LRU of LLM decompositions keyed by (model, normalized query text).
+
+Decompositions don't depend on the document, so one file serves every index
+and survives restarts: the frontend's preset questions are decomposed once per
+deployment instead of once per request.
+
+`put` only updates memory; the file is rewritten by a background flush at most
+once per DECOMPOSITION_CACHE_FLUSH_SECONDS, so callers on the event loop never
+wait on disk. A flush merges in entries other workers wrote since, then writes a
+temp file and moves it into place, so a crash never leaves a truncated cache.
+"""
+import os
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+from retrieval.cache import normalize_question
+
+logger = logging.getLogger(__name__)
+
+DECOMPOSITION_CACHE_PATH = os.getenv("DECOMPOSITION_CACHE_PATH", "vectorstore/decomposition_cache.json")
+DECOMPOSITION_CACHE_SIZE = int(os.getenv("DECOMPOSITION_CACHE_SIZE", "2048"))
+DECOMPOSITION_CACHE_FLUSH_SECONDS = float(os.getenv("DECOMPOSITION_CACHE_FLUSH_SECONDS", "2.0"))
+
+
+class DecompositionCache:
+    def __init__(self, path: str = DECOMPOSITION_CACHE_PATH, maxsize: int = DECOMPOSITION_CACHE_SIZE,
+                 flush_delay: float = DECOMPOSITION_CACHE_FLUSH_SECONDS):
+        self.path = path
+        self.maxsize = maxsize
+        self.flush_delay = flush_delay
+        self._data: Optional["OrderedDict[str, List[str]]"] = None
+        self._lock = threading.Lock()
+        # Serialises flushes (timer thread vs. an explicit flush at shutdown)
+        self._flush_lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(model: str, query: str) -> str:
+        return f"{model}\n{normalize_question(query)}"
+
+    def _read_file(self) -> dict:
+        # A missing or unreadable file counts as empty
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable decomposition cache {self.path}: {e}")
+            return {}
+
+    def _entries(self) -> "OrderedDict[str, List[str]]":
+        # Loaded on first use
+        if self._data is None:
+            self._data = OrderedDict(self._read_file())
+        return self._data
+
+    def get(self, model: str, query: str) -> Optional[List[str]]:
+        with self._lock:
+            entries = self._entries()
+            key = self._key(model, query)
+            if key not in entries:
+                self.misses += 1
+                return None
+            entries.move_to_end(key)
+            self.hits += 1
+            return list(entries[key])
+
+    def put(self, model: str, query: str, sub_questions: List[str]):
+        with self._lock:
+            entries = self._entries()
+            key = self._key(model, query)
+            entries[key] = list(sub_questions)
+            entries.move_to_end(key)
+            while len(entries) > self.maxsize:
+                entries.popitem(last=False)
+            self._dirty = True
+            if self._timer is None:
+                self._timer = threading.Timer(self.flush_delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """Writes pending entries to disk now (called by the flush timer and at shutdown)."""
+        with self._flush_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                if not self._dirty:
+                    return
+                self._dirty = False
+                snapshot = list(self._data.items())
+
+            # Other workers share the file: keep their entries, ours win and count as most recent
+            merged = OrderedDict(self._read_file())
+            for key, sub_questions in snapshot:
+                merged.pop(key, None)
+                merged[key] = sub_questions
+            while len(merged) > self.maxsize:
+                merged.popitem(last=False)
+            self._save(merged)
+
+    def _save(self, entries):
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(entries, f)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            # The in-memory cache still works; only persistence is lost
+            logger.warning(f"Could not persist decomposition cache: {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data) if self._data is not None else None,
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else None,
+            }
+
+
+decomposition_cache = DecompositionCache()
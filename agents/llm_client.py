@@ -0,0 +1,75 @@
+"""
+LLM Client
+----------
+Shared OpenRouter chat clients, one per process (and one async client per
+event loop), each with a keep-alive connection pool. Agents used to build a new
+client, and with it a new pool and TLS handshake, on every call.
+
+Pool limits are configurable; LLM_MAX_CONNECTIONS bounds the number of LLM
+requests in flight at once from this process.
+"""
+import os
+import asyncio
+import threading
+
+import httpx
+from openai import AsyncOpenAI, OpenAI
+
+LLM_BASE_URL = "https://openrouter.ai/api/v1"
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "10"))
+LLM_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("LLM_KEEPALIVE_EXPIRY_SECONDS", "30"))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+
+_lock = threading.Lock()
+_client = None
+# The async pool's connections belong to the loop that opened them
+_async_clients = {}
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=LLM_KEEPALIVE_EXPIRY_SECONDS,
+    )
+
+
+def get_client() -> OpenAI:
+    global _client
+    with _lock:
+        if _client is None:
+            _client = OpenAI(
+                base_url=LLM_BASE_URL,
+                api_key=os.getenv("OPENROUTER_API_KEY"),
+                timeout=LLM_TIMEOUT_SECONDS,
+                http_client=httpx.Client(limits=_limits(), timeout=LLM_TIMEOUT_SECONDS),
+            )
+        return _client
+
+
+def get_async_client() -> AsyncOpenAI:
+    """The running event loop's client (call from a coroutine)."""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        client = _async_clients.get(loop)
+        if client is None:
+            # Drop clients of loops that have gone away (e.g. one asyncio.run() per script call)
+            for stale in [l for l in _async_clients if l.is_closed()]:
+                del _async_clients[stale]
+            client = AsyncOpenAI(
+                base_url=LLM_BASE_URL,
+                api_key=os.getenv("OPENROUTER_API_KEY"),
+                timeout=LLM_TIMEOUT_SECONDS,
+                http_client=httpx.AsyncClient(limits=_limits(), timeout=LLM_TIMEOUT_SECONDS),
+            )
+            _async_clients[loop] = client
+        return client
+
+
+async def aclose_clients():
+    """Closes the running loop's async client (app shutdown)."""
+    with _lock:
+        client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.close()
@@ -0,0 +1,51 @@
+"""
+Query Complexity
+----------------
+Local, rule-based check for whether a question is worth an LLM decomposition.
+
+Single-intent lookups ("What is the company name?", "What is total debt?") come
+back from the decomposer as [user_query] anyway; they skip the LLM call. A
+question is sent for decomposition when any of these hold:
+  - more than one question mark, or a list (commas, "and", "vs", "compare")
+  - an analysis verb or open-ended ask ("analyze", "assess", "risk", "why", ...)
+  - more than one financial metric mentioned (a named ratio counts as one)
+  - longer than DECOMPOSE_MAX_SIMPLE_WORDS words
+The rules lean towards decomposing: a wrongly bypassed question loses recall,
+a wrongly decomposed one only costs the LLM call it would have made anyway.
+"""
+import os
+import re
+
+DECOMPOSE_MAX_SIMPLE_WORDS = int(os.getenv("DECOMPOSE_MAX_SIMPLE_WORDS", "12"))
+
+MULTI_INTENT_WORDS = {"and", "vs", "versus", "compare", "compared", "comparison", "between", "both", "also"}
+ANALYSIS_WORDS = {
+    "analyze", "analyse", "analysis", "assess", "assessment", "evaluate", "evaluation", "summarize",
+    "summarise", "summary", "overview", "explain", "why", "risk", "risks", "risky", "trend", "trends",
+    "impact", "check", "review", "compliance", "compliant", "health", "outlook", "performance",
+}
+METRIC_WORDS = {
+    "revenue", "sales", "turnover", "profit", "income", "loss", "ebitda", "ebit", "debt", "borrowings",
+    "equity", "liabilities", "assets", "cash", "margin", "interest", "expenses", "costs", "growth",
+    "dividend", "eps", "capex", "leverage", "liquidity", "reserves", "tax",
+}
+
+_WORD = re.compile(r"[a-z]+")
+# "debt to equity ratio", "debt-to-equity" name one metric, not two
+_NAMED_RATIO = re.compile(r"\b[a-z]+[- ]to[- ][a-z]+( ratio)?\b")
+
+
+def needs_decomposition(query: str) -> bool:
+    text = query.lower()
+    words = _WORD.findall(_NAMED_RATIO.sub("ratio", text))
+    if not words:
+        return False
+    vocabulary = set(words)
+
+    if text.count("?") > 1 or "," in text or ";" in text:
+        return True
+    if vocabulary & MULTI_INTENT_WORDS or vocabulary & ANALYSIS_WORDS:
+        return True
+    if len(vocabulary & METRIC_WORDS) > 1:
+        return True
+    return len(words) > DECOMPOSE_MAX_SIMPLE_WORDS
@@ -1,17 +1,41 @@
 from graph.state import GraphState
-from retrieval.retriever import retrieve_chunks
-
-def retrieve_content(sub_questions, vectorstore):
-    all_chunks = []
+from retrieval.retriever import retrieve_chunks_batch
+from retrieval.scoring import reciprocal_rank_fusion
+from retrieval.adaptive import RETRIEVAL_MODE, ADAPTIVE_MAX_K, adaptive_cutoff, fit_token_budget
 
+def retrieve_content(sub_questions, vectorstore, lexical_index=None, index_version=None, metadata_index=None,
+                     mode=RETRIEVAL_MODE):
     # If sub-questions are empty (shouldn't happen with fallback, but safety first)
     if not sub_questions:
         return []
 
-    for q in sub_questions:
-        # Reduced k from 15 to 6 to save LLM context window and increase speed
-        chunks = retrieve_chunks(vectorstore, q, k=6)
-        all_chunks.extend(chunks)
+    per_question = search_questions(sub_questions, vectorstore, lexical_index, index_version, metadata_index, mode)
+    return select_chunks(per_question, mode)
+
+
+def search_questions(sub_questions, vectorstore, lexical_index=None, index_version=None, metadata_index=None,
+                     mode=RETRIEVAL_MODE):
+    """One ranked chunk list per sub-question (the graph calls this once per fan-out branch)."""
+    adaptive = mode == "adaptive"
+
+    # One embedding request + one FAISS search for all sub-questions (hybrid with BM25 when available)
+    # Fixed mode: k reduced from 15 to 6 to save LLM context window and increase speed.
+    # Adaptive mode: a wider candidate list, cut per sub-question by score floor / elbow
+    # Repeated questions against the same index version are served from the result cache
+    per_question = retrieve_chunks_batch(vectorstore, sub_questions, k=ADAPTIVE_MAX_K if adaptive else 6,
+                                         lexical_index=lexical_index, index_version=index_version,
+                                         metadata_index=metadata_index)
+    if adaptive:
+        per_question = [adaptive_cutoff(ranked) for ranked in per_question]
+    return per_question
+
+
+def select_chunks(per_question, mode=RETRIEVAL_MODE):
+    """Joins the per-question rankings into the final context."""
+    adaptive = mode == "adaptive"
+
+    # Fuse the per-question rankings (RRF) instead of concatenating them
+    all_chunks = reciprocal_rank_fusion(per_question)
 
     # Deduplicate and trim chunks completely
     unique_chunks = []
@@ -26,5 +50,29 @@ def retrieve_content(sub_questions, vectorstore):
             chunk['content'] = clean_text # Store trimmed version
             unique_chunks.append(chunk)
 
+    if adaptive:
+        # As many chunks as the global token budget allows, in fused order
+        return fit_token_budget(unique_chunks)
+
     # Limit to top 6 most relevant chunks total to drastically reduce prompt size
     return unique_chunks[:6]
+
+
+TABLE_K = 4
+
+
+def retrieve_tables(sub_questions, vectorstore, lexical_index=None, index_version=None, metadata_index=None, k=TABLE_K):
+    """Top-k table chunks for the sub-questions, filtered inside the FAISS search (has_table)."""
+    if not sub_questions:
+        return []
+    return select_tables(search_tables(sub_questions, vectorstore, lexical_index, index_version, metadata_index, k), k)
+
+
+def search_tables(sub_questions, vectorstore, lexical_index=None, index_version=None, metadata_index=None, k=TABLE_K):
+    return retrieve_chunks_batch(vectorstore, sub_questions, k=k, lexical_index=lexical_index,
+                                 index_version=index_version, filters={"has_table": True},
+                                 metadata_index=metadata_index)
+
+
+def select_tables(per_question, k=TABLE_K):
+    return reciprocal_rank_fusion(per_question)[:k]
@@ -1,23 +1,20 @@
-import os
-from openai import OpenAI
 from graph.state import GraphState
+from agents.llm_client import get_client, get_async_client
+from retrieval.adaptive import RETRIEVAL_MODE
 
-def get_client():
-    return OpenAI(
-        base_url="https://openrouter.ai/api/v1",
-        api_key=os.getenv("OPENROUTER_API_KEY"),
-    )
+MODEL = "mistralai/mistral-7b-instruct-v0.1"
 
-def summarize_report(user_query, analysis_result, compliance_result, retrieved_chunks):
-    client = get_client()
-    
+def build_prompt(user_query, analysis_result, compliance_result, retrieved_chunks, mode=RETRIEVAL_MODE):
     # 1. Format Regex Metrics
     metrics_str = "\n".join([f"{k}: {v}" for k, v in analysis_result.get("extracted_metrics", {}).items() if v is not None])
     
-    # 2. Format Retrieved Context (Raw Text) - Limit to first 5 most relevant to fit context window
-    context_text = "\n\n---\n\n".join([chunk["content"] for chunk in retrieved_chunks[:6]])
+    # 2. Format Retrieved Context (Raw Text) - adaptive retrieval already fitted it to RETRIEVAL_TOKEN_BUDGET,
+    # fixed mode keeps the 6 most relevant to fit the context window
+    if mode != "adaptive":
+        retrieved_chunks = retrieved_chunks[:6]
+    context_text = "\n\n---\n\n".join([chunk["content"] for chunk in retrieved_chunks])
 
-    prompt = f"""
+    return f"""
 You are a highly intelligent financial analyst. You have access to extracted metrics AND raw text segments from a document.
 
 User's Question: "{user_query}"
@@ -50,10 +47,31 @@ INSTRUCTIONS:
 Answer:
 """
 
-    response = client.chat.completions.create(
-        model="mistralai/mistral-7b-instruct-v0.1",
+def summarize_report(user_query, analysis_result, compliance_result, retrieved_chunks):
+    prompt = build_prompt(user_query, analysis_result, compliance_result, retrieved_chunks)
+    response = get_client().chat.completions.create(
+        model=MODEL,
         messages=[{"role": "user", "content": prompt}],
         temperature=0.2
     )
 
     return response.choices[0].message.content
+
+async def astream_report(user_query, analysis_result, compliance_result, retrieved_chunks):
+    """Yields the answer's text as the model generates it (shared async client)."""
+    prompt = build_prompt(user_query, analysis_result, compliance_result, retrieved_chunks)
+    stream = await get_async_client().chat.completions.create(
+        model=MODEL,
+        messages=[{"role": "user", "content": prompt}],
+        temperature=0.2,
+        stream=True
+    )
+    async for chunk in stream:
+        delta = chunk.choices[0].delta.content if chunk.choices else None
+        if delta:
+            yield delta
+
+async def asummarize_report(user_query, analysis_result, compliance_result, retrieved_chunks):
+    """summarize_report() on the shared async client."""
+    parts = [token async for token in astream_report(user_query, analysis_result, compliance_result, retrieved_chunks)]
+    return "".join(parts)
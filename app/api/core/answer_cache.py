@@ -0,0 +1,131 @@
+"""
+Answer Cache
+------------
+Document-scoped semantic cache of /query responses.
+
+Entries are keyed by document id (the content SHA-256) and the question's
+embedding in that document's index space. A new question whose embedding has
+cosine similarity >= ANSWER_CACHE_THRESHOLD with a cached question on the same
+document gets the cached response without running the agent graph (no
+decomposer or summarizer call). The query embedding is the one retrieval would
+compute anyway, and comes from the shared query embedding cache. Questions
+that normalize to the same text always match. The threshold is model-dependent:
+the local hashed n-gram backend scores paraphrases lower than semantic models.
+Embeddings barely separate "revenue in 2022" from "revenue in 2023", so a
+non-exact match also needs the same numeric tokens (years, FY21, Q3, figures).
+
+Each document's entries are tagged with its index fingerprint (see
+IndexSnapshot.fingerprint); when the document is re-indexed the fingerprint
+changes and its entries are dropped on the next lookup. Eviction is LRU across
+all documents, bounded by ANSWER_CACHE_SIZE.
+"""
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import FrozenSet, Optional, Tuple
+
+import numpy as np
+
+from retrieval.cache import normalize_question
+
+ANSWER_CACHE = os.getenv("ANSWER_CACHE", "1") != "0"
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "256"))
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))
+
+# Any token with a digit in it: "2023", "fy21", "q3", "1,234.5"
+NUMERIC_TOKEN = re.compile(r"[a-z]*\d[\d.,]*[a-z]*")
+
+
+def numeric_tokens(question: str) -> FrozenSet[str]:
+    """Numeric tokens of a normalized question, thousands separators dropped."""
+    return frozenset(token.replace(",", "").rstrip(".") for token in NUMERIC_TOKEN.findall(question))
+
+
+def _unit(vector) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class SemanticAnswerCache:
+    def __init__(self, maxsize: int = ANSWER_CACHE_SIZE, threshold: float = ANSWER_CACHE_THRESHOLD):
+        self.maxsize = maxsize
+        self.threshold = threshold
+        # (document_id, normalized question) -> (unit vector, response dict, numeric tokens), in LRU order
+        self._entries: "OrderedDict[Tuple[str, str], tuple]" = OrderedDict()
+        # document_id -> fingerprint of the index its entries were answered from
+        self._fingerprints = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _check_fingerprint(self, document_id: str, fingerprint: str):
+        """Drops the document's entries if its index changed. Caller holds the lock."""
+        current = self._fingerprints.get(document_id)
+        if current is not None and current != fingerprint:
+            stale = [key for key in self._entries if key[0] == document_id]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+        self._fingerprints[document_id] = fingerprint
+
+    def get(self, document_id: str, fingerprint: str, query: str, vector) -> Optional[Tuple[dict, float, str]]:
+        """(response, similarity, cached question) for the closest cached question, or None."""
+        with self._lock:
+            self._check_fingerprint(document_id, fingerprint)
+            key = (document_id, normalize_question(query))
+            if key in self._entries:
+                similarity = 1.0
+            else:
+                numbers = numeric_tokens(key[1])
+                keys = [k for k, entry in self._entries.items() if k[0] == document_id and entry[2] == numbers]
+                if not keys:
+                    self.misses += 1
+                    return None
+                matrix = np.stack([self._entries[key][0] for key in keys])
+                scores = matrix @ _unit(vector)
+                best = int(np.argmax(scores))
+                key, similarity = keys[best], float(scores[best])
+                if similarity < self.threshold:
+                    self.misses += 1
+                    return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(self._entries[key][1]), round(similarity, 4), key[1]
+
+    def put(self, document_id: str, fingerprint: str, query: str, vector, response: dict):
+        with self._lock:
+            self._check_fingerprint(document_id, fingerprint)
+            key = (document_id, normalize_question(query))
+            self._entries[key] = (_unit(vector), dict(response), numeric_tokens(key[1]))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._fingerprints.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "enabled": ANSWER_CACHE,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else None,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+# Shared by every request in the process
+answer_cache = SemanticAnswerCache()
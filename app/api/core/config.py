@@ -4,3 +4,14 @@ OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
 
 VECTORSTORE_PATH = "vectorstore/faiss_index"
 DATA_DIR = "data"
+
+# Per-document indexes, keyed by the SHA-256 of the uploaded file's content
+DOCUMENT_INDEX_DIR = os.getenv("DOCUMENT_INDEX_DIR", "vectorstore/documents")
+
+# Loaded document indexes are evicted (LRU) once their estimated size passes this budget
+INDEX_MEMORY_BUDGET_MB = int(os.getenv("INDEX_MEMORY_BUDGET_MB", "512"))
+
+# Startup (import + app construction) should finish within this; exceeding it is logged as a warning
+STARTUP_BUDGET_SECONDS = float(os.getenv("STARTUP_BUDGET_SECONDS", "5"))
+# Load the active document's index in the background after startup
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "1") != "0"
@@ -0,0 +1,156 @@
+"""
+Document Index Cache
+--------------------
+Content-addressed storage for per-document FAISS indexes.
+
+Every upload is identified by the SHA-256 of its bytes (the document id), and its
+index is persisted under DOCUMENT_INDEX_DIR/<document_id>/ next to a small
+manifest.json. A repeat upload of the same content - under any filename - can
+then be served from disk without re-extraction or re-embedding.
+
+While a document is being ingested, the index is checkpointed after each
+committed page batch into a fresh checkpoint-<page> folder; the manifest is
+switched to it atomically, so a crash always leaves one consistent checkpoint
+to resume from.
+"""
+import os
+import json
+import shutil
+import hashlib
+import logging
+from datetime import datetime, timezone
+from typing import Optional
+
+from app.api.core.config import DOCUMENT_INDEX_DIR
+from retrieval.mmap_store import save_store
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+STATUS_COMPLETE = "complete"
+STATUS_IN_PROGRESS = "in_progress"
+CHECKPOINT_PREFIX = "checkpoint-"
+
+
+def new_hasher():
+    return hashlib.sha256()
+
+
+def hash_file(path: str, block_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file on disk, read in blocks to keep memory flat."""
+    hasher = new_hasher()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+def document_index_path(document_id: str) -> str:
+    return os.path.join(DOCUMENT_INDEX_DIR, document_id)
+
+
+def read_manifest(document_id: str) -> Optional[dict]:
+    path = os.path.join(document_index_path(document_id), MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Unreadable manifest for document {document_id}: {e}")
+        return None
+
+
+def write_manifest(document_id: str, manifest: dict):
+    """Writes the manifest atomically so a crash never leaves a half-written file behind."""
+    folder = document_index_path(document_id)
+    os.makedirs(folder, exist_ok=True)
+    manifest = {**manifest, "document_id": document_id, "updated_at": datetime.now(timezone.utc).isoformat()}
+
+    tmp_path = os.path.join(folder, MANIFEST_FILE + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, os.path.join(folder, MANIFEST_FILE))
+
+
+def is_document_indexed(document_id: str) -> bool:
+    """True when a complete index for this content hash is on disk."""
+    manifest = read_manifest(document_id)
+    return (
+        manifest is not None
+        and manifest.get("status") == STATUS_COMPLETE
+        and os.path.exists(os.path.join(document_index_path(document_id), "index.faiss"))
+    )
+
+
+def resumable_checkpoint(document_id: str) -> Optional[dict]:
+    """Returns the manifest of an interrupted ingestion whose checkpoint is still on disk."""
+    manifest = read_manifest(document_id)
+    if not manifest or manifest.get("status") != STATUS_IN_PROGRESS or not manifest.get("checkpoint"):
+        return None
+    path = os.path.join(document_index_path(document_id), manifest["checkpoint"])
+    if not os.path.exists(os.path.join(path, "index.faiss")):
+        return None
+    return {**manifest, "checkpoint_path": path}
+
+
+def _index_info(vectorstore) -> dict:
+    """Recorded in the manifest so later indexes can be created without probing the embedding API."""
+    return {
+        "embedding_model": getattr(vectorstore.embedding_function, "model", None),
+        "dimension": vectorstore.index.d,
+    }
+
+
+def persisted_dimension(model: Optional[str]) -> Optional[int]:
+    """Embedding dimension recorded by any persisted index built with `model`."""
+    if not model or not os.path.isdir(DOCUMENT_INDEX_DIR):
+        return None
+    for document_id in os.listdir(DOCUMENT_INDEX_DIR):
+        manifest = read_manifest(document_id)
+        if manifest and manifest.get("embedding_model") == model and manifest.get("dimension"):
+            return int(manifest["dimension"])
+    return None
+
+
+def save_checkpoint(vectorstore, document_id: str, last_page: int, **extra):
+    """Persists the partial index covering pages 1..last_page and points the manifest at it."""
+    folder = document_index_path(document_id)
+    previous = (read_manifest(document_id) or {}).get("checkpoint")
+
+    name = f"{CHECKPOINT_PREFIX}{last_page:05d}"
+    save_store(vectorstore, os.path.join(folder, name))
+    write_manifest(document_id, {
+        **extra,
+        **_index_info(vectorstore),
+        "status": STATUS_IN_PROGRESS,
+        "last_page": last_page,
+        "checkpoint": name,
+        "vectors": vectorstore.index.ntotal
+    })
+
+    if previous and previous != name:
+        shutil.rmtree(os.path.join(folder, previous), ignore_errors=True)
+
+
+def finalize_document(vectorstore, document_id: str, lexical_index=None, metadata_index=None, **extra):
+    """
+    Saves the complete index (and its BM25 / metadata-filter companions), marks the
+    document complete and drops its checkpoints.
+    """
+    folder = document_index_path(document_id)
+    save_store(vectorstore, folder)
+    if lexical_index is not None:
+        lexical_index.save(folder)
+    if metadata_index is not None:
+        metadata_index.save(folder)
+    write_manifest(document_id, {
+        **extra,
+        **_index_info(vectorstore),
+        "status": STATUS_COMPLETE,
+        "vectors": vectorstore.index.ntotal
+    })
+
+    for name in os.listdir(folder):
+        if name.startswith(CHECKPOINT_PREFIX):
+            shutil.rmtree(os.path.join(folder, name), ignore_errors=True)
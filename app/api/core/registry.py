@@ -0,0 +1,253 @@
+"""
+Document Registry
+-----------------
+Keeps one FAISS index per uploaded document (namespaced by document id, the
+content SHA-256) instead of a single global store that every upload wipes.
+
+Indexes are loaded lazily from DOCUMENT_INDEX_DIR on first query and kept in an
+LRU; when the estimated resident size of loaded indexes exceeds
+INDEX_MEMORY_BUDGET_MB the coldest ones are dropped (they stay on disk and are
+reloaded on demand). Queries without a document id go to the most recently
+uploaded document.
+
+Each loaded index is wrapped in an immutable IndexSnapshot. Ingestion always
+builds into a separate staging index and publishes it with a single reference
+swap, so a query sees either the old or the new index, never a half-built one.
+Queries hold a snapshot via `acquire()`; a replaced or evicted snapshot is
+released only once its last reader is done.
+"""
+import os
+import re
+import asyncio
+import logging
+import itertools
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager, asynccontextmanager
+from typing import Dict, List, Optional
+
+from app.api.core.config import DOCUMENT_INDEX_DIR, INDEX_MEMORY_BUDGET_MB, VECTORSTORE_PATH
+from app.api.core.documents import STATUS_COMPLETE, document_index_path, is_document_indexed, read_manifest
+from app.api.core.store import estimate_index_bytes, index_exists, load_index
+from retrieval.filters import MetadataIndex
+from retrieval.scoring import BM25Index
+
+logger = logging.getLogger(__name__)
+
+# Index built outside the upload flow (generate_index.py) - served when nothing was uploaded yet
+LEGACY_DOCUMENT_ID = "default"
+# Document ids are SHA-256 hex digests; anything else never reaches the filesystem
+DOCUMENT_ID_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+class DocumentNotFound(KeyError):
+    pass
+
+
+_versions = itertools.count(1)
+
+
+class IndexSnapshot:
+    """A published, read-only index plus the bookkeeping needed to retire it safely."""
+
+    def __init__(self, document_id: str, vectorstore, lexical_index: Optional[BM25Index] = None,
+                 metadata_index: Optional[MetadataIndex] = None, fingerprint: Optional[str] = None):
+        self.document_id = document_id
+        self.vectorstore = vectorstore
+        # BM25 index persisted next to the FAISS index (None for indexes built before hybrid retrieval)
+        self.lexical_index = lexical_index
+        # Per-position page/table/section arrays for filtered search (computed if not persisted)
+        self.metadata_index = metadata_index or MetadataIndex.from_vectorstore(vectorstore)
+        # Process-wide monotonically increasing; changes whenever a document's index is replaced
+        self.version = next(_versions)
+        # Identifies the persisted index build (its manifest timestamp): unlike `version` it survives
+        # eviction and reload, and changes only when the document is re-indexed
+        self.fingerprint = fingerprint or f"v{self.version}"
+        self.size_bytes = estimate_index_bytes(vectorstore)
+        # Per-snapshot derived objects (e.g. the compiled query graph), dropped on release
+        self.cache: Dict[str, object] = {}
+        self.readers = 0
+        self.retired = False
+
+    def release(self):
+        logger.info(f"Released index snapshot v{self.version} of document {self.document_id[:12]}")
+        self.vectorstore = None
+        self.lexical_index = None
+        self.metadata_index = None
+        self.cache.clear()
+
+
+class DocumentRegistry:
+    def __init__(self, memory_budget_mb: int = INDEX_MEMORY_BUDGET_MB):
+        self.memory_budget = memory_budget_mb * 1024 * 1024
+        self._loaded: "OrderedDict[str, IndexSnapshot]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.active_document_id: Optional[str] = None
+
+    def _path(self, document_id: str) -> str:
+        return VECTORSTORE_PATH if document_id == LEGACY_DOCUMENT_ID else document_index_path(document_id)
+
+    def exists(self, document_id: str) -> bool:
+        if document_id == LEGACY_DOCUMENT_ID:
+            return index_exists(VECTORSTORE_PATH)
+        if not DOCUMENT_ID_PATTERN.match(document_id or ""):
+            return False
+        return document_id in self._loaded or is_document_indexed(document_id)
+
+    def resolve(self, document_id: Optional[str] = None) -> Optional[str]:
+        """Explicit id if given, else the latest upload, else the legacy single index."""
+        if document_id:
+            return document_id
+        if self.active_document_id is None:
+            self.active_document_id = self._latest_document()
+        if self.active_document_id is None and index_exists(VECTORSTORE_PATH):
+            return LEGACY_DOCUMENT_ID
+        return self.active_document_id
+
+    def _snapshot(self, document_id: str) -> IndexSnapshot:
+        """Current snapshot for a document, loading it lazily. Caller holds the lock."""
+        if document_id in self._loaded:
+            self._loaded.move_to_end(document_id)
+            return self._loaded[document_id]
+
+        if not self.exists(document_id):
+            raise DocumentNotFound(document_id)
+
+        logger.info(f"Loading index for document {document_id[:12]}...")
+        path = self._path(document_id)
+        # Query with the embedding model the index was built with, whatever the current backend
+        manifest = read_manifest(document_id) or {}
+        vectorstore = load_index(path, model=manifest.get("embedding_model"))
+        snapshot = IndexSnapshot(document_id, vectorstore, BM25Index.load(path),
+                                 self._metadata_index(path, vectorstore), manifest.get("updated_at"))
+        self._install(snapshot)
+        return snapshot
+
+    @staticmethod
+    def _metadata_index(path: str, vectorstore) -> MetadataIndex:
+        """
+        Persisted filter arrays. Indexes built before they existed get them from the docstore
+        once, saved next to the store, so later loads don't page the whole docstore in.
+        """
+        metadata_index = MetadataIndex.load(path)
+        if metadata_index is None:
+            metadata_index = MetadataIndex.from_vectorstore(vectorstore)
+            try:
+                metadata_index.save(path)
+                logger.info(f"Saved metadata index for {path}")
+            except OSError as e:
+                logger.warning(f"Could not persist metadata index for {path}: {e}")
+        return metadata_index
+
+    def _pin(self, document_id: str) -> IndexSnapshot:
+        with self._lock:
+            snapshot = self._snapshot(document_id)
+            snapshot.readers += 1
+        return snapshot
+
+    def _unpin(self, snapshot: IndexSnapshot):
+        with self._lock:
+            snapshot.readers -= 1
+            if snapshot.retired and snapshot.readers == 0:
+                snapshot.release()
+
+    @contextmanager
+    def acquire(self, document_id: str):
+        """
+        Pins the document's current snapshot for the duration of a query.
+        A concurrent publish or eviction won't release it until this reader exits.
+        """
+        snapshot = self._pin(document_id)
+        try:
+            yield snapshot
+        finally:
+            self._unpin(snapshot)
+
+    @asynccontextmanager
+    async def aacquire(self, document_id: str):
+        """acquire() for async callers: a cold index load runs in a worker thread, off the event loop."""
+        snapshot = await asyncio.to_thread(self._pin, document_id)
+        try:
+            yield snapshot
+        finally:
+            self._unpin(snapshot)
+
+    def peek(self, document_id: str):
+        """The index if it is already loaded, without loading it or touching LRU order."""
+        snapshot = self._loaded.get(document_id)
+        return snapshot.vectorstore if snapshot else None
+
+    def publish(self, document_id: str, vectorstore, lexical_index: Optional[BM25Index] = None,
+                metadata_index: Optional[MetadataIndex] = None, activate: bool = True) -> IndexSnapshot:
+        """
+        Atomically replaces the document's index with a fully built staging index
+        (already persisted by the ingestion job). The previous snapshot is retired.
+        """
+        fingerprint = (read_manifest(document_id) or {}).get("updated_at")
+        snapshot = IndexSnapshot(document_id, vectorstore, lexical_index, metadata_index, fingerprint)
+        with self._lock:
+            self._install(snapshot)
+            if activate:
+                self.active_document_id = document_id
+        logger.info(f"Published index snapshot v{snapshot.version} for document {document_id[:12]}")
+        return snapshot
+
+    def activate(self, document_id: str):
+        self.active_document_id = document_id
+
+    def _install(self, snapshot: IndexSnapshot):
+        previous = self._loaded.pop(snapshot.document_id, None)
+        # The one reference swap readers can observe
+        self._loaded[snapshot.document_id] = snapshot
+        if previous is not None:
+            self._retire(previous)
+        self._evict(keep=snapshot.document_id)
+
+    def _retire(self, snapshot: IndexSnapshot):
+        snapshot.retired = True
+        if snapshot.readers == 0:
+            snapshot.release()
+
+    def _evict(self, keep: str):
+        while sum(s.size_bytes for s in self._loaded.values()) > self.memory_budget and len(self._loaded) > 1:
+            cold = next(iter(self._loaded))
+            if cold == keep:
+                self._loaded.move_to_end(cold)
+                cold = next(iter(self._loaded))
+            snapshot = self._loaded.pop(cold)
+            logger.info(f"Evicted index for document {cold[:12]} ({snapshot.size_bytes / (1024 * 1024):.1f}MB)")
+            self._retire(snapshot)
+
+    def version(self, document_id: str) -> Optional[int]:
+        """Version of the loaded snapshot (None when not loaded)."""
+        snapshot = self._loaded.get(document_id)
+        return snapshot.version if snapshot else None
+
+    def list_documents(self) -> List[dict]:
+        """Completed documents on disk (manifest summaries)."""
+        documents = []
+        if os.path.isdir(DOCUMENT_INDEX_DIR):
+            for document_id in os.listdir(DOCUMENT_INDEX_DIR):
+                manifest = read_manifest(document_id)
+                if manifest and manifest.get("status") == STATUS_COMPLETE:
+                    documents.append({**manifest, "loaded": document_id in self._loaded})
+        return documents
+
+    def _latest_document(self) -> Optional[str]:
+        documents = self.list_documents()
+        if not documents:
+            return None
+        return max(documents, key=lambda m: m.get("updated_at", ""))["document_id"]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "active_document_id": self.active_document_id,
+                "loaded_documents": len(self._loaded),
+                "loaded_mb": round(sum(s.size_bytes for s in self._loaded.values()) / (1024 * 1024), 2),
+                "memory_budget_mb": round(self.memory_budget / (1024 * 1024), 2),
+            }
+
+
+# Global registry shared by the upload, query and health routes
+registry = DocumentRegistry()
@@ -0,0 +1,87 @@
+"""
+Startup & Readiness
+-------------------
+Measures how long the API takes to become available and tracks a readiness
+state separate from liveness (/health is "ok" as soon as the process serves
+requests; readiness says whether queries will be answered from a loaded index).
+
+    starting  the app object exists but the startup hook hasn't run yet
+    warming   the active document's index is being loaded in the background
+    ready     queries can be served (an index is loaded, or there is none yet)
+    degraded  warm-up failed; queries will retry loading on demand
+
+Nothing here calls the embedding API, so the app starts (and reports ready)
+offline.
+"""
+import time
+import logging
+import threading
+from typing import Optional
+
+from app.api.core.config import STARTUP_BUDGET_SECONDS, STARTUP_WARMUP
+from app.api.core.registry import registry
+
+logger = logging.getLogger(__name__)
+
+STATE_STARTING = "starting"
+STATE_WARMING = "warming"
+STATE_READY = "ready"
+STATE_DEGRADED = "degraded"
+
+_status = {
+    "state": STATE_STARTING,
+    "startup_seconds": None,
+    "warmup_seconds": None,
+    "error": None,
+}
+
+
+def mark_started(started_at: float):
+    """Records the startup time (from `started_at`, a time.perf_counter() value) against the budget."""
+    elapsed = time.perf_counter() - started_at
+    _status["startup_seconds"] = round(elapsed, 3)
+    if elapsed > STARTUP_BUDGET_SECONDS:
+        logger.warning(f"Startup took {elapsed:.2f}s, over the {STARTUP_BUDGET_SECONDS}s budget")
+    else:
+        logger.info(f"Startup took {elapsed:.2f}s (budget {STARTUP_BUDGET_SECONDS}s)")
+
+
+def _warm_up():
+    started = time.perf_counter()
+    try:
+        document_id = registry.resolve()
+        if document_id:
+            with registry.acquire(document_id):
+                pass
+        _status["state"] = STATE_READY
+    except Exception as e:
+        logger.error(f"Index warm-up failed: {e}")
+        _status["state"] = STATE_DEGRADED
+        _status["error"] = str(e)
+    _status["warmup_seconds"] = round(time.perf_counter() - started, 3)
+    logger.info(f"Readiness: {_status['state']} (warm-up {_status['warmup_seconds']}s)")
+
+
+def start_warmup(background: bool = True) -> Optional[threading.Thread]:
+    if not STARTUP_WARMUP:
+        _status["state"] = STATE_READY
+        return None
+    _status["state"] = STATE_WARMING
+    if not background:
+        _warm_up()
+        return None
+    thread = threading.Thread(target=_warm_up, name="index-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def readiness() -> dict:
+    return {
+        **_status,
+        "ready": _status["state"] == STATE_READY,
+        "startup_budget_seconds": STARTUP_BUDGET_SECONDS,
+        "within_budget": (
+            _status["startup_seconds"] <= STARTUP_BUDGET_SECONDS
+            if _status["startup_seconds"] is not None else None
+        ),
+    }
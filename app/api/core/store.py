@@ -1,80 +1,99 @@
 from langchain_community.vectorstores import FAISS
 from langchain_community.docstore.in_memory import InMemoryDocstore
-from app.api.core.config import VECTORSTORE_PATH
-from ingestion.embeddings import get_embedding_model
+from ingestion.embeddings import EMBEDDING_DIMENSIONS, backend_for_model, get_embedding_model
+from app.api.core.documents import persisted_dimension
+from retrieval.mmap_store import LazyDocstore, is_mmap_store, load_store
 import faiss
 import os
 import logging
 
 logger = logging.getLogger(__name__)
 
+_embedder = None
+_model_embedders = {}
+
+def get_embedder(model=None):
+    """
+    One shared embedding client (and embedding cache) for every document index, from the
+    configured backend. Indexes built with another model get that model's embedder, since
+    an index can only be queried with the model it was built with.
+    """
+    global _embedder
+    if _embedder is None:
+        _embedder = get_embedding_model()
+    if not model or model == getattr(_embedder, "model", None):
+        return _embedder
+    if model not in _model_embedders:
+        _model_embedders[model] = get_embedding_model(backend=backend_for_model(model), model=model)
+    return _model_embedders[model]
+
+_dimensions = {}
+
 def get_embedding_dimension(embedder):
-    """Dynamically determine the embedding dimension."""
-    try:
-        sample_vector = embedder.embed_query("test")
-        return len(sample_vector)
-    except Exception as e:
-        logger.warning(f"Failed to determine embedding dimension dynamically, defaulting to 1536: {e}")
-        return 1536
+    """
+    Embedding dimension without a network call: recorded by a persisted index built with
+    the same model, else the static model table. Probing the API is the last resort.
+    """
+    model = getattr(embedder, "model", None)
+    if model in _dimensions:
+        return _dimensions[model]
 
-def load_or_initialize_vectorstore():
-    embedder = get_embedding_model()
-    
-    try:
-        logger.info(f"Attempting to load vector store from {VECTORSTORE_PATH}...")
-        # Security: Ensure we only load from our trusted local directory
-        trusted_path = os.path.abspath(VECTORSTORE_PATH)
-        
-        # Check if index file exists before trying to load
-        if os.path.exists(os.path.join(trusted_path, "index.faiss")):
-             # We trust this path since it's an internally generated index, not a direct user upload.
-             vectorstore = FAISS.load_local(
-                 trusted_path, 
-                 embedder, 
-                 allow_dangerous_deserialization=True
-             )
-             logger.info("Vector store loaded successfully.")
-             return vectorstore
-        else:
-             logger.info("Index file not found. Creating new.")
-             raise RuntimeError("Index not found")
-             
-    except Exception as e:
-        logger.warning(f"Warning: Vector store not found or failed to load ({e}). Creating a new empty index.")
+    dim = persisted_dimension(model) or EMBEDDING_DIMENSIONS.get(model) or getattr(embedder, "dim", None)
+    if dim is None:
+        logger.warning(f"Unknown embedding model '{model}', probing the API for its dimension")
         try:
-            dim = get_embedding_dimension(embedder)
-            logger.info(f"Creating new empty index with dimension: {dim}")
-            index = faiss.IndexFlatL2(dim) 
-            vectorstore = FAISS(
-                embedding_function=embedder,
-                index=index,
-                docstore=InMemoryDocstore(),
-                index_to_docstore_id={}
-            )
-            return vectorstore
-        except Exception as inner_e:
-            logger.error(f"Critical Error creating empty index: {inner_e}")
-            raise inner_e
+            dim = len(embedder.embed_query("test"))
+        except Exception as e:
+            logger.warning(f"Failed to determine embedding dimension dynamically, defaulting to 1536: {e}")
+            return 1536
+    _dimensions[model] = dim
+    return dim
 
-# Global singleton instance
-vectorstore = load_or_initialize_vectorstore()
+def index_exists(path: str) -> bool:
+    return os.path.exists(os.path.join(path, "index.faiss"))
 
-def reset_vectorstore():
+def load_index(path: str, writable: bool = False, model=None):
     """
-    Resets the global vectorstore in-place.
-    Crucial for clearing old document data when a new file is uploaded.
+    Loads a persisted FAISS index (ours, never a user upload) with the shared embedder
+    (for `model`, the embedding model recorded when the index was built, if given).
+    Indexes in the mmap format open without reading vectors or chunk text into RAM;
+    pass writable=True to get an in-memory copy that can be appended to.
     """
-    logger.info("🧹 Clearing Vector Store...")
+    trusted_path = os.path.abspath(path)
+    if is_mmap_store(trusted_path):
+        return load_store(trusted_path, get_embedder(model), writable=writable)
+
+    # Legacy pickle format (index.pkl). We trust this path since it's an internally generated index.
+    return FAISS.load_local(
+        trusted_path,
+        get_embedder(model),
+        allow_dangerous_deserialization=True
+    )
+
+def create_empty_vectorstore():
+    """Fresh, empty index for a new document (each document gets its own namespace)."""
+    embedder = get_embedder()
     try:
-        dim = get_embedding_dimension(get_embedding_model())
-        # Create fresh components
-        new_index = faiss.IndexFlatL2(dim)
-        new_docstore = InMemoryDocstore()
-        
-        # Update the existing singleton provided to other modules
-        vectorstore.index = new_index
-        vectorstore.docstore = new_docstore
-        vectorstore.index_to_docstore_id = {}
-        logger.info("✅ Vector Store Reset Complete.")
+        dim = get_embedding_dimension(embedder)
+        logger.info(f"Creating new empty index with dimension: {dim}")
+        return FAISS(
+            embedding_function=embedder,
+            index=faiss.IndexFlatL2(dim),
+            docstore=InMemoryDocstore(),
+            index_to_docstore_id={}
+        )
     except Exception as e:
-        logger.error(f"Error resetting vector store: {e}")
+        logger.error(f"Critical Error creating empty index: {e}")
+        raise e
+
+def estimate_index_bytes(vectorstore) -> int:
+    """Approximate resident size of a loaded index: raw vectors plus docstore text."""
+    index = vectorstore.index
+    vector_bytes = index.ntotal * index.d * 4
+    if isinstance(vectorstore.docstore, LazyDocstore):
+        # Mapped pages, shared through the OS cache - counted at their on-disk size
+        return vector_bytes + vectorstore.docstore.nbytes
+    text_bytes = 0
+    for doc in getattr(vectorstore.docstore, "_dict", {}).values():
+        text_bytes += len(doc.page_content) + 200  # + rough metadata overhead
+    return vector_bytes + text_bytes
@@ -1,20 +1,45 @@
 from fastapi import APIRouter
-from app.api.core.store import vectorstore
+from fastapi.responses import JSONResponse
+from app.api.core.registry import registry
+from app.api.core.startup import readiness
+from retrieval.cache import cache_stats
+from agents.decomposer_agent import decomposer_stats
+from app.api.core.answer_cache import answer_cache
 
 router = APIRouter(tags=["Health"])
 
 @router.get("/health")
 def health():
-    # Return basic health plus vector store stats
+    # Return basic health plus vector store stats (for the default document)
     doc_count = 0
     try:
-        # FAISS implementation details
-        doc_count = vectorstore.index.ntotal
+        # FAISS implementation details (only if already loaded - health checks never trigger a load)
+        vectorstore = registry.peek(registry.resolve())
+        if vectorstore is not None:
+            doc_count = vectorstore.index.ntotal
     except Exception:
         pass
         
     return {
         "status": "ok", 
-        "documents_indexed": doc_count
+        "documents_indexed": doc_count,
+        "readiness": readiness(),
+        "registry": registry.stats(),
+        "query_cache": cache_stats(),
+        "decomposer": decomposer_stats(),
+        "answer_cache": answer_cache.stats()
     }
 
+@router.get("/ready")
+def ready():
+    # Readiness probe: 503 until the startup warm-up has finished (liveness stays on /health)
+    state = readiness()
+    return JSONResponse(status_code=200 if state["ready"] else 503, content=state)
+
+@router.get("/documents")
+def list_documents():
+    # Every completed per-document index on disk (loaded lazily on first query)
+    return {
+        "active_document_id": registry.resolve(),
+        "documents": registry.list_documents()
+    }
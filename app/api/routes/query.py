@@ -1,98 +1,83 @@
-from fastapi import APIRouter
-from langchain_community.vectorstores import FAISS
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 import os
+import time
+import asyncio
 import logging
 import json
 
 from app.api.schemas.request import QueryRequest
 from app.api.schemas.response import QueryResponse, Source
-# from app.api.core.config import VECTORSTORE_PATH # Removed as logic moved to store.py
-from app.api.core.store import vectorstore
+from app.api.core.registry import registry, DocumentNotFound
+from app.api.core.answer_cache import ANSWER_CACHE, answer_cache
 from graph.graph import build_graph
+from retrieval.retriever import embed_query
 
 router = APIRouter(tags=["Query"])
 logger = logging.getLogger(__name__)
 
-# Logic moved to app/api/core/store.py to be shared with upload endpoint
-# embedder = get_embedding_model()
-# ... 
-
-graph_app = build_graph(vectorstore)
+def get_graph(snapshot):
+    # Compiled once per index snapshot and released together with it
+    graph_app = snapshot.cache.get("graph")
+    if graph_app is None:
+        graph_app = build_graph(snapshot.vectorstore, snapshot.lexical_index, snapshot.version,
+                                snapshot.metadata_index)
+        snapshot.cache["graph"] = graph_app
+    return graph_app
 
 
 @router.post("/query", response_model=QueryResponse)
-def query_financials(req: QueryRequest):
+async def query_financials(req: QueryRequest):
+    # Async end to end: the LLM calls are awaited, so a worker isn't held for the round-trip
+    document_id = registry.resolve(req.document_id)
+    if not document_id:
+        return await answer_query(req, None)
+
     try:
-        # Check if we have data
-        doc_count = 0
-        try:
-             doc_count = vectorstore.index.ntotal
-        except:
-             pass
+        # Pin the current snapshot: a concurrent re-index publishes a new one
+        # but this request finishes on the one it started with
+        async with registry.aacquire(document_id) as snapshot:
+            return await answer_query(req, snapshot)
+    except DocumentNotFound:
+        raise HTTPException(status_code=404, detail=f"Document {document_id} not found")
+
+
+NO_DOCUMENTS_ANSWER = "No documents found in the database. Please wait a moment if you just uploaded a file (processing takes 1-2 mins). If this persists, the PDF might be unreadable/scanned."
+
 
-        if doc_count == 0:
+def has_documents(snapshot) -> bool:
+    try:
+        return snapshot.vectorstore.index.ntotal > 0
+    except:
+        return False
+
+
+async def answer_query(req: QueryRequest, snapshot) -> QueryResponse:
+    try:
+        # Check if we have data
+        if not has_documents(snapshot):
              return QueryResponse(
-                answer="No documents found in the database. Please wait a moment if you just uploaded a file (processing takes 1-2 mins). If this persists, the PDF might be unreadable/scanned.",
+                answer=NO_DOCUMENTS_ANSWER,
                 confidence=0.0,
                 sources=[]
             )
 
         logger.info(f"Received query: {req.question}")
+        started = time.perf_counter()
+        cached, vector = await cached_answer(req, snapshot, started)
+        if cached is not None:
+            return cached
+
         state = {
             "user_query": req.question
         }
 
-        result = graph_app.invoke(state)
-        
-        # Deduplicate sources based on page number
-        unique_pages = set()
-        sources = []
-        
-        # Robust retrieval of chunks from state
-        chunks = result.get("retrieved_chunks", [])
-        
-        # If chunks is empty, but we have an answer, it might be hiding in a different key or format
-        # But assuming flow is correct:
-        if chunks:
-            for i, chunk in enumerate(chunks):
-                try:
-                    # Safely extract page number, default to 0 if missing
-                    raw_page = chunk.get("page_no")
-                    p_no = 0
-                    if raw_page is not None:
-                        try:
-                            p_no = int(raw_page)
-                        except:
-                            p_no = 0
-                        
-                    # Safely extract content
-                    txt = chunk.get("content", "")
-                    if not txt:
-                         txt = "No content available"
-                    
-                    # Create snippet
-                    snippet = txt[:100].replace("\n", " ") + "..." if len(txt) > 100 else txt
-                    
-                    # Add to sources if we haven't seen this page before
-                    # (Or if page is 0, we might want to show at least one source)
-                    if p_no not in unique_pages:
-                        unique_pages.add(p_no)
-                        sources.append(Source(page_no=p_no, snippet=snippet))
-                        
-                except Exception as e:
-                    # Log but continue - don't let one bad source fail the request
-                    logger.warning(f"Error processing source {i}: {str(e)}")
-            
-            logger.info(f"Query processed. Found {len(sources)} sources from {len(chunks)} chunks.")
-        else:
-             logger.warning("Query returned answer but 'retrieved_chunks' was empty in state.")
-
-        # Return the final answer
-        return QueryResponse(
-            answer=result["final_answer"],
-            confidence=0.85,
-            sources=sorted(sources, key=lambda x: x.page_no)
-        )
+        result = await get_graph(snapshot).ainvoke(state)
+        timings = {**result.get("timings", {}), "total": round(time.perf_counter() - started, 3)}
+        logger.info(f"Query stage timings (s): {timings}")
+        response = build_response(result, timings)
+        remember_answer(req, snapshot, vector, response)
+        return response
     except Exception as e:
         logger.error(f"Error processing query: {str(e)}")
         # Return a fallback response or re-raise
@@ -101,3 +86,155 @@ def query_financials(req: QueryRequest):
             confidence=0.0,
             sources=[]
         )
+
+
+async def cached_answer(req: QueryRequest, snapshot, started: float):
+    """(cached response or None, query vector or None) from the document's semantic answer cache."""
+    if not ANSWER_CACHE:
+        return None, None
+    try:
+        # Same vector retrieval uses (shared embedding cache), so a miss costs no extra API call
+        vector = await asyncio.to_thread(embed_query, snapshot.vectorstore, req.question)
+    except Exception as e:
+        logger.warning(f"Answer cache skipped, query embedding failed: {e}")
+        return None, None
+
+    hit = answer_cache.get(snapshot.document_id, snapshot.fingerprint, req.question, vector)
+    if hit is None:
+        return None, vector
+    response, similarity, question = hit
+    elapsed = round(time.perf_counter() - started, 3)
+    logger.info(f"Answer cache hit (similarity {similarity}) for: {req.question}")
+    return QueryResponse(**{
+        **response,
+        "timings": {"answer_cache": elapsed, "total": elapsed},
+        "decomposition": None,
+        "answer_cache": {"hit": True, "similarity": similarity, "question": question},
+    }), vector
+
+
+def remember_answer(req: QueryRequest, snapshot, vector, response: QueryResponse):
+    if vector is not None:
+        answer_cache.put(snapshot.document_id, snapshot.fingerprint, req.question, vector,
+                         response.model_dump(exclude={"answer_cache"}))
+
+
+def build_response(result: dict, timings: dict) -> QueryResponse:
+    # Deduplicate sources based on page number
+    unique_pages = set()
+    sources = []
+    
+    # Robust retrieval of chunks from state
+    chunks = result.get("retrieved_chunks", [])
+    
+    # If chunks is empty, but we have an answer, it might be hiding in a different key or format
+    # But assuming flow is correct:
+    if chunks:
+        for i, chunk in enumerate(chunks):
+            try:
+                # Safely extract page number, default to 0 if missing
+                raw_page = chunk.get("page_no")
+                p_no = 0
+                if raw_page is not None:
+                    try:
+                        p_no = int(raw_page)
+                    except:
+                        p_no = 0
+                    
+                # Safely extract content
+                txt = chunk.get("content", "")
+                if not txt:
+                     txt = "No content available"
+                
+                # Create snippet
+                snippet = txt[:100].replace("\n", " ") + "..." if len(txt) > 100 else txt
+                
+                # Add to sources if we haven't seen this page before
+                # (Or if page is 0, we might want to show at least one source)
+                if p_no not in unique_pages:
+                    unique_pages.add(p_no)
+                    sources.append(Source(page_no=p_no, snippet=snippet))
+                    
+            except Exception as e:
+                # Log but continue - don't let one bad source fail the request
+                logger.warning(f"Error processing source {i}: {str(e)}")
+        
+        logger.info(f"Query processed. Found {len(sources)} sources from {len(chunks)} chunks.")
+    else:
+         logger.warning("Query returned answer but 'retrieved_chunks' was empty in state.")
+
+    analysis = result.get("analysis_result") or {}
+
+    # Return the final answer
+    return QueryResponse(
+        answer=result["final_answer"],
+        confidence=0.85,
+        sources=sorted(sources, key=lambda x: x.page_no),
+        metrics=analysis.get("extracted_metrics", {}),
+        ratios=analysis.get("derived_ratios", {}),
+        timings=timings,
+        decomposition=result.get("decomposition") or None
+    )
+
+
+@router.post("/query/stream")
+async def stream_query(req: QueryRequest):
+    """
+    /query as NDJSON, one event per line:
+      {"type": "progress", "node": ..., "seconds": ...}  as each graph node completes
+      {"type": "token", "text": ...}                     summarizer output as it is generated
+      {"type": "result", ...QueryResponse fields}        final answer, sources and metrics
+    A question answered from the answer cache gets the "result" event only.
+      {"type": "error", "detail": ...}                   instead of "result" on failure
+    """
+    document_id = registry.resolve(req.document_id)
+    if document_id and not registry.exists(document_id):
+        raise HTTPException(status_code=404, detail=f"Document {document_id} not found")
+    return StreamingResponse(stream_events(req, document_id), media_type="application/x-ndjson")
+
+
+def ndjson(event: dict) -> str:
+    return json.dumps(event) + "\n"
+
+
+async def stream_events(req: QueryRequest, document_id):
+    try:
+        if not document_id:
+            yield ndjson({"type": "result", **QueryResponse(answer=NO_DOCUMENTS_ANSWER, confidence=0.0).model_dump()})
+            return
+
+        # The snapshot stays pinned until the last event is sent
+        async with registry.aacquire(document_id) as snapshot:
+            if not has_documents(snapshot):
+                yield ndjson({"type": "result", **QueryResponse(answer=NO_DOCUMENTS_ANSWER, confidence=0.0).model_dump()})
+                return
+
+            logger.info(f"Received streaming query: {req.question}")
+            started = time.perf_counter()
+            cached, vector = await cached_answer(req, snapshot, started)
+            if cached is not None:
+                yield ndjson({"type": "result", **cached.model_dump()})
+                return
+
+            result = {}
+            async for mode, payload in get_graph(snapshot).astream({"user_query": req.question},
+                                                                   stream_mode=["updates", "custom", "values"]):
+                if mode == "custom":
+                    yield ndjson({"type": "token", "text": payload["token"]})
+                elif mode == "updates":
+                    for node, update in payload.items():
+                        # One event per fan-out branch; "seconds" is that node's own wall time
+                        seconds = next(iter((update or {}).get("timings", {}).values()), None)
+                        yield ndjson({"type": "progress", "node": node, "seconds": seconds,
+                                      "elapsed": round(time.perf_counter() - started, 3)})
+                else:
+                    result = payload
+
+            timings = {**result.get("timings", {}), "total": round(time.perf_counter() - started, 3)}
+            logger.info(f"Query stage timings (s): {timings}")
+            response = build_response(result, timings)
+            remember_answer(req, snapshot, vector, response)
+            yield ndjson({"type": "result", **response.model_dump()})
+    except Exception as e:
+        logger.error(f"Error processing streaming query: {str(e)}")
+        yield ndjson({"type": "error", "detail": str(e)})
@@ -5,74 +5,150 @@ from fastapi import APIRouter, UploadFile, File, BackgroundTasks, HTTPException
 import logging
 
 from ingestion.loader import load_pdf
-from ingestion.chunking import chunk_financial_pages
-from ingestion.indexer import create_documents_from_chunks
-from app.api.core.config import DATA_DIR, VECTORSTORE_PATH
-from app.api.core.store import vectorstore, reset_vectorstore
+from ingestion.pipeline import run_ingestion_pipeline
+from retrieval.faiss_store import ensure_index_type, current_index_type
+from retrieval.filters import MetadataIndex
+from retrieval.scoring import BM25Index
+from app.api.core.config import DATA_DIR
+from app.api.core.store import get_embedder, create_empty_vectorstore, load_index
+from app.api.core.registry import registry
+from app.api.core.documents import (
+    new_hasher,
+    hash_file,
+    is_document_indexed,
+    resumable_checkpoint,
+    save_checkpoint,
+    finalize_document,
+)
 
 router = APIRouter(tags=["Ingestion"])
 logger = logging.getLogger(__name__)
 
 # Global Status Tracking
 upload_status: Dict[str, dict] = {}
-last_processed_file: str = None  # Cache tracker
+# Content-hash cache counters (since process start)
+cache_stats = {"hits": 0, "misses": 0}
 
-def process_file_background(file_path: str, task_id: str):
+def process_file_background(file_path: str, task_id: str, document_id: str = None):
     """
     Heavy lifting task that runs in the background.
     Optimized for low memory usage (batch processing).
     """
-    global last_processed_file
     try:
         logger.info(f"Starting background processing for task {task_id}: {file_path}")
+        document_id = document_id or hash_file(file_path)
         
-        # Optimization: Reuse index if it's the exact same file
-        if last_processed_file == file_path and os.path.exists(os.path.join(VECTORSTORE_PATH, "index.faiss")):
-            logger.info("File already indexed. Bypassing re-embedding to save time.")
-            upload_status[task_id] = {"status": "completed", "message": "Reused existing vector index."}
+        # Optimization: Reuse the persisted index if this exact content was indexed before
+        if is_document_indexed(document_id):
+            logger.info(f"Document {document_id[:12]} already indexed. Bypassing re-embedding to save time.")
+            registry.activate(document_id)
+            cache_stats["hits"] += 1
+            upload_status[task_id] = {
+                "status": "completed",
+                "message": "Reused existing vector index.",
+                "document_id": document_id,
+                "cache": "hit",
+                "cache_stats": dict(cache_stats)
+            }
             return
 
-        # 0. RESET STORE (Fix for stale data issue)
-        reset_vectorstore()
-        logger.info("Vector store reset for new document.")
+        cache_stats["misses"] += 1
+        upload_status[task_id] = {**upload_status.get(task_id, {}), "document_id": document_id, "cache": "miss"}
+
+        # 0. RESUME from the last checkpoint of an interrupted run, otherwise start a fresh index.
+        # Either way this is a private staging index: queries keep using the published snapshot
+        # (if any) until the build is complete and swapped in by registry.publish()
+        checkpoint = resumable_checkpoint(document_id)
+        current_model = getattr(get_embedder(), "model", None)
+        if checkpoint and checkpoint.get("embedding_model") not in (None, current_model):
+            # Built with another embedding backend - its vectors can't be mixed with new ones
+            logger.info(f"Discarding checkpoint of {document_id[:12]} built with {checkpoint['embedding_model']}.")
+            checkpoint = None
+        resumed_from = 0
+        if checkpoint:
+            vectorstore = load_index(checkpoint["checkpoint_path"], writable=True)
+            resumed_from = checkpoint["last_page"]
+            logger.info(f"Resuming {document_id[:12]} after page {resumed_from} ({vectorstore.index.ntotal} vectors restored).")
+        else:
+            vectorstore = create_empty_vectorstore()
+            logger.info(f"New index created for document {document_id[:12]}.")
+        embedding_stats_before = _embedding_cache_stats()
+        filename = os.path.basename(file_path)
         
         # 1. Load Generator (Lazy loading)
-        pages_generator = load_pdf(file_path)
+        # routing_summary is filled in as pages stream through (table vs text path counts)
+        routing_summary = {}
+        pages_generator = load_pdf(file_path, routing_summary=routing_summary, start_page=resumed_from + 1)
+
+        # Checkpoint the index + manifest after every committed page batch
+        last_committed = {"page": resumed_from}
+        def on_commit(last_page):
+            save_checkpoint(vectorstore, document_id, last_page, filename=filename)
+            last_committed["page"] = last_page
+            upload_status[task_id] = {**upload_status.get(task_id, {}), "last_page": last_page}
         
-        # 2. Process in Batches of 50 pages to save RAM
-        BATCH_SIZE = 50
-        batch_pages = []
-        
-        for page in pages_generator:
-            batch_pages.append(page)
-            if len(batch_pages) >= BATCH_SIZE:
-                 _process_batch(batch_pages)
-                 batch_pages = [] # Clear memory
-        
-        # Process remaining
-        if batch_pages:
-             _process_batch(batch_pages)
-
-        # 4. Save to Disk (Once at the end)
-        os.makedirs("vectorstore", exist_ok=True)
-        vectorstore.save_local(VECTORSTORE_PATH)
+        # 2. Extract -> chunk -> embed -> index as overlapping stages
+        # (batches of INGEST_BATCH_PAGES pages, bounded queues keep RAM flat)
+        ingestion_stats = run_ingestion_pipeline(pages_generator, vectorstore, on_commit=on_commit)
+        ingestion_stats["resumed_from_page"] = resumed_from
+
+        # 3. Convert the exact Flat build to the configured / auto-selected ANN index type
+        vectorstore = ensure_index_type(vectorstore)
+        ingestion_stats["index_type"] = current_index_type(vectorstore.index)
+
+        # BM25 lexical index and metadata-filter arrays over the same chunks, persisted next to the FAISS index
+        lexical_index = BM25Index.from_vectorstore(vectorstore)
+        metadata_index = MetadataIndex.from_vectorstore(vectorstore)
+
+        # 4. Save to Disk (content-addressed), then publish the staging index with one atomic swap
+        finalize_document(vectorstore, document_id, lexical_index, metadata_index,
+                          filename=filename, pages=last_committed["page"])
+        registry.publish(document_id, vectorstore, lexical_index, metadata_index)
         logger.info("Vectorstore saved successfully")
-        
-        # Update Cache Tracker
-        last_processed_file = file_path
+
+        embedding_cache = _embedding_cache_delta(embedding_stats_before)
+        if embedding_cache:
+            logger.info(f"Embedding cache for {document_id[:12]}: {embedding_cache}")
         
         # Update Status
-        upload_status[task_id] = {"status": "completed", "message": "Indexing successful"}
+        upload_status[task_id] = {
+            "status": "completed",
+            "message": "Indexing successful",
+            "document_id": document_id,
+            "cache": "miss",
+            "cache_stats": dict(cache_stats),
+            "page_routing": routing_summary,
+            "ingestion": ingestion_stats,
+            "embedding_cache": embedding_cache
+        }
 
     except Exception as e:
         logger.error(f"Error processing {file_path}: {str(e)}")
-        upload_status[task_id] = {"status": "failed", "message": str(e)}
+        upload_status[task_id] = {
+            "status": "failed",
+            "message": str(e),
+            "document_id": document_id,
+            "cache_stats": dict(cache_stats)
+        }
 
-def _process_batch(pages):
-    chunks = chunk_financial_pages(pages)
-    documents = create_documents_from_chunks(chunks)
-    vectorstore.add_documents(documents)
-    logger.info(f"Processed batch of {len(pages)} pages.")
+def _embedding_cache_stats():
+    embedder = get_embedder()
+    return embedder.stats() if hasattr(embedder, "stats") else None
+
+def _embedding_cache_delta(before):
+    """Hit/miss counts of the shared embedding cache attributable to one ingestion."""
+    after = _embedding_cache_stats()
+    if not before or not after:
+        return None
+    hits = after["hits"] - before["hits"]
+    misses = after["misses"] - before["misses"]
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / total, 3) if total else None,
+        "cache_mb": after["cache_mb"]
+    }
 
 
 
@@ -84,26 +160,35 @@ async def upload_document(background_tasks: BackgroundTasks, file: UploadFile =
         file_path = os.path.join(DATA_DIR, file.filename)
 
         # Stream write to avoid loading entire file into RAM (helps with low-memory environments like Render)
+        # The content hash is computed on the same pass and becomes the document id
+        hasher = new_hasher()
         with open(file_path, "wb") as f:
             while True:
                 chunk = await file.read(1024 * 1024) # Read 1MB at a time
                 if not chunk:
                     break
+                hasher.update(chunk)
                 f.write(chunk)
+        document_id = hasher.hexdigest()
         
-        logger.info(f"File saved to disk: {file_path}. Queuing background processing.")
+        logger.info(f"File saved to disk: {file_path} (sha256 {document_id[:12]}). Queuing background processing.")
 
         # Generate ID
         task_id = str(uuid.uuid4())
-        upload_status[task_id] = {"status": "processing", "message": "Indexing in progress..."}
+        upload_status[task_id] = {
+            "status": "processing",
+            "message": "Indexing in progress...",
+            "document_id": document_id
+        }
 
         # Offload processing to background
-        background_tasks.add_task(process_file_background, file_path, task_id)
+        background_tasks.add_task(process_file_background, file_path, task_id, document_id)
 
         return {
             "message": "File uploaded successfully. Processing started.",
             "task_id": task_id,
-            "filename": file.filename
+            "filename": file.filename,
+            "document_id": document_id
         }
     except Exception as e:
         logger.error(f"Upload failed: {str(e)}")
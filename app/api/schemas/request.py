@@ -1,5 +1,8 @@
 from pydantic import BaseModel
+from typing import Optional
 
 class QueryRequest(BaseModel):
     question: str
+    # Content hash returned by /upload; defaults to the most recently uploaded document
+    document_id: Optional[str] = None
     
\ No newline at end of file
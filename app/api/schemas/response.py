@@ -11,4 +11,9 @@ class QueryResponse(BaseModel):
     sources: List[Source] = []
     metrics: Optional[dict] = {}
     ratios: Optional[dict] = {}
-
+    # Seconds per graph stage (parallel stages report their slowest branch) plus "total"
+    timings: Optional[dict] = None
+    # Decomposer source ("bypass", "cache", "llm", "fallback") and LLM calls made / avoided
+    decomposition: Optional[dict] = None
+    # Set when served from the semantic answer cache: similarity and the cached question it matched
+    answer_cache: Optional[dict] = None
@@ -1,3 +1,8 @@
+import time
+# Startup-time budget is measured from here (see app.api.core.startup)
+_started_at = time.perf_counter()
+
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 import logging
 
@@ -11,11 +16,25 @@ logging.basicConfig(
 from app.api.routes.health import router as health_router
 from app.api.routes.upload import router as upload_router
 from app.api.routes.query import router as query_router
+from app.api.core.startup import mark_started, start_warmup
+from agents.llm_client import aclose_clients
+from agents.decomposition_cache import decomposition_cache
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # No index is loaded and no embedding call is made before serving;
+    # the active document's index is warmed up in the background
+    mark_started(_started_at)
+    start_warmup()
+    yield
+    await aclose_clients()
+    decomposition_cache.flush()
 
 app = FastAPI(
     title="FinDoc AI",
     description="AI-powered financial risk & compliance analyzer",
-    version="1.0"
+    version="1.0",
+    lifespan=lifespan
 )
 
 @app.get("/")
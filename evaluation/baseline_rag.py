@@ -1,8 +1,7 @@
 import os
 import sys
 from openai import OpenAI
-from langchain_community.vectorstores import FAISS
-from ingestion.embeddings import get_embedding_model
+from app.api.core.store import get_embedder, load_index
 from app.api.core.config import VECTORSTORE_PATH
 from dotenv import load_dotenv
 
@@ -20,16 +19,10 @@ class BaselineRAG:
     """
     def __init__(self):
         print("Loading Baseline RAG resources...")
-        self.embeddings = get_embedding_model()
+        self.embeddings = get_embedder()
         
-        # Secure the path before loading memory files
-        trusted_path = os.path.abspath(VECTORSTORE_PATH)
-        # Trust this path since it's an internally generated index
-        self.vectorstore = FAISS.load_local(
-            trusted_path, 
-            self.embeddings, 
-            allow_dangerous_deserialization=True
-        )
+        # Memory-mapped when the index was saved in the mmap format
+        self.vectorstore = load_index(VECTORSTORE_PATH)
         self.client = OpenAI(
             base_url="https://openrouter.ai/api/v1",
             api_key=os.getenv("OPENROUTER_API_KEY"),
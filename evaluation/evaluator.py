@@ -17,8 +17,7 @@ from datetime import datetime
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from app.api.core.config import VECTORSTORE_PATH
-from langchain_community.vectorstores import FAISS
-from ingestion.embeddings import get_embedding_model
+from app.api.core.store import load_index
 from graph.graph import build_graph
 from evaluation.metrics import calculate_latency, check_keyword_presence
 
@@ -45,10 +44,8 @@ def run_evaluation():
     
     # 1. Initialize System
     print(f"Loading system resources...")
-    embedder = get_embedding_model()
     try:
-        trusted_path = os.path.abspath(VECTORSTORE_PATH)
-        vectorstore = FAISS.load_local(trusted_path, embedder, allow_dangerous_deserialization=True)
+        vectorstore = load_index(VECTORSTORE_PATH)
         app = build_graph(vectorstore)
     except Exception as e:
         print(f"❌ Failed to load vector store: {e}")
@@ -0,0 +1,90 @@
+"""
+ANN Index Benchmark
+-------------------
+Compares recall and latency of the pluggable FAISS index types against an exact
+Flat baseline on the same vectors (taken from an existing index on disk).
+
+How to run:
+    python -m evaluation.index_benchmark                        # legacy vectorstore/faiss_index
+    python -m evaluation.index_benchmark vectorstore/documents/<id> --k 6 --queries 200
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import faiss
+import numpy as np
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.api.core.config import VECTORSTORE_PATH
+from retrieval.faiss_store import (
+    INDEX_FLAT,
+    INDEX_IVF_FLAT,
+    INDEX_HNSW,
+    INDEX_IVF_PQ,
+    build_index,
+    reconstruct_vectors,
+)
+
+
+def recall_at_k(truth: np.ndarray, found: np.ndarray) -> float:
+    """Share of the exact top-k neighbours that the approximate index also returned."""
+    hits = sum(len(set(t[t >= 0]) & set(f[f >= 0])) for t, f in zip(truth, found))
+    total = sum(len(t[t >= 0]) for t in truth)
+    return round(hits / total, 4) if total else 0.0
+
+
+def index_size_mb(index) -> float:
+    return round(len(faiss.serialize_index(index)) / (1024 * 1024), 2)
+
+
+def make_queries(vectors: np.ndarray, n: int, seed: int = 0) -> np.ndarray:
+    """Stored vectors plus small noise: realistic neighbourhoods without needing the embedding API."""
+    rng = np.random.default_rng(seed)
+    picks = vectors[rng.choice(len(vectors), size=min(n, len(vectors)), replace=False)]
+    noise = rng.standard_normal(picks.shape).astype(np.float32) * picks.std() * 0.1
+    return (picks + noise).astype(np.float32)
+
+
+def run_benchmark(index_path: str, k: int = 6, n_queries: int = 200):
+    print(f"Loading vectors from {index_path}...")
+    vectors = reconstruct_vectors(faiss.read_index(os.path.join(index_path, "index.faiss")))
+    queries = make_queries(vectors, n_queries)
+    print(f"{len(vectors)} vectors, dim {vectors.shape[1]}, {len(queries)} queries, k={k}\n")
+
+    rows = []
+    truth = None
+    for index_type in (INDEX_FLAT, INDEX_IVF_FLAT, INDEX_HNSW, INDEX_IVF_PQ):
+        start = time.perf_counter()
+        try:
+            index = build_index(vectors, index_type)
+        except Exception as e:
+            rows.append(f"| {index_type} | ERROR: {e} | | | |")
+            continue
+        build_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        _, found = index.search(queries, k)
+        latency_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+        if index_type == INDEX_FLAT:
+            truth = found
+        recall = recall_at_k(truth, found)
+        rows.append(f"| {index_type} | {recall} | {latency_ms:.3f} | {build_s:.2f} | {index_size_mb(index)} |")
+
+    print(f"| Index | Recall@{k} vs Flat | Latency (ms/query) | Build (s) | Size (MB) |")
+    print("|---|---|---|---|---|")
+    print("\n".join(rows))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare FAISS index types against a Flat baseline")
+    parser.add_argument("index_path", nargs="?", default=VECTORSTORE_PATH)
+    parser.add_argument("--k", type=int, default=6)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+    run_benchmark(args.index_path, args.k, args.queries)
@@ -37,6 +37,41 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
+# --- Streaming Query ---
+NODE_LABELS = {
+    "decompose": "Decomposed question",
+    "speculate": "Retrieved for the full question",
+    "retrieve": "Retrieved for a sub-question",
+    "join_retrieval": "Merged evidence",
+    "analyze": "Calculated metrics",
+    "validate": "Checked compliance rules",
+    "summarize": "Wrote report",
+}
+
+def stream_query(payload, result, status=None):
+    """
+    Yields answer tokens from /query/stream (for st.write_stream).
+    Node progress updates `status`; the final payload is stored in `result`.
+    """
+    # (connect, read) timeout: the read timeout applies between events, not to the whole answer
+    with requests.post(f"{API_BASE_URL}/query/stream", json=payload, stream=True, timeout=(10, 120)) as response:
+        if response.status_code != 200:
+            raise RuntimeError(response.text)
+        for line in response.iter_lines(decode_unicode=True):
+            if not line:
+                continue
+            event = json.loads(line)
+            if event["type"] == "token":
+                yield event["text"]
+            elif event["type"] == "progress" and status is not None:
+                label = NODE_LABELS.get(event["node"], event["node"])
+                status.update(label=f"🤖 {label}...")
+                st.write(f"✔️ {label} ({event['seconds']}s)")
+            elif event["type"] == "result":
+                result.update(event)
+            elif event["type"] == "error":
+                raise RuntimeError(event["detail"])
+
 # --- Session State ---
 if 'uploaded_file' not in st.session_state:
     st.session_state.uploaded_file = None
@@ -44,6 +79,8 @@ if 'analysis_result' not in st.session_state:
     st.session_state.analysis_result = None
 if 'chat_history' not in st.session_state:
     st.session_state.chat_history = []
+if 'document_id' not in st.session_state:
+    st.session_state.document_id = None
 
 # --- Sidebar ---
 with st.sidebar:
@@ -94,6 +131,8 @@ with st.sidebar:
                                 if status_res.status_code == 200:
                                     s = status_res.json()
                                     if s["status"] == "completed":
+                                        # Scope all further queries to this document
+                                        st.session_state.document_id = s.get("document_id", task_data.get("document_id"))
                                         st.session_state.uploaded_file = uploaded_file.name
                                         status.update(label="Ready for Analysis", state="complete", expanded=False)
                                         st.success("Analysis Ready! You can now use the dashboard.")
@@ -153,6 +192,8 @@ with st.sidebar:
                                 if status_res.status_code == 200:
                                     s = status_res.json()
                                     if s["status"] == "completed":
+                                        # Scope all further queries to this document
+                                        st.session_state.document_id = s.get("document_id", task_data.get("document_id"))
                                         st.session_state.uploaded_file = f_name
                                         status.update(label="Ready for Analysis", state="complete", expanded=False)
                                         st.success(f"Analysis Ready for {f_name}!")
@@ -218,19 +259,21 @@ with tab_dashboard:
             
     # Check if a query was triggered
     if 'current_query' in st.session_state:
-        with st.spinner("🤖 AI Agents working: Decomposing... Retrieving... Calculating..."):
+        with st.status("🤖 AI Agents working: Decomposing...", expanded=True) as status:
             try:
-                payload = {"question": st.session_state.current_query}
-                # Increased timeout to 120s to allow for deep RAG analysis
-                response = requests.post(f"{API_BASE_URL}/query", json=payload, timeout=120)
-                if response.status_code == 200:
-                    st.session_state.analysis_result = response.json()
+                payload = {"question": st.session_state.current_query, "document_id": st.session_state.document_id}
+                # Progress and the report stream in as the agents finish
+                result = {}
+                st.write_stream(stream_query(payload, result, status))
+                if result:
+                    st.session_state.analysis_result = result
                     del st.session_state.current_query # Clear trigger
-                else:
-                    st.error(f"Analysis Failed: {response.text}")
+                    status.update(label="Analysis complete", state="complete", expanded=False)
             except requests.Timeout:
+                status.update(label="Timeout", state="error")
                 st.error("⚠️ logic timeout: The file is complex and the AI needed more time. Please try asking a simpler question.")
             except Exception as e:
+                status.update(label="Analysis Failed", state="error")
                 st.error(f"Error: {e}")
 
     # Display Results if available
@@ -299,11 +342,14 @@ with tab_chat:
         with st.chat_message("assistant"):
             with st.spinner("Thinking..."):
                 try:
-                    payload = {"question": user_input}
-                    resp = requests.post(f"{API_BASE_URL}/query", json=payload).json()
+                    payload = {"question": user_input, "document_id": st.session_state.document_id}
+                    resp = {}
+                    streamed = st.write_stream(stream_query(payload, resp))
                     
                     answer_text = resp.get("answer", "No answer found.")
-                    st.write(answer_text)
+                    if not streamed:
+                        # Nothing was streamed (e.g. no document indexed yet): show the final answer
+                        st.write(answer_text)
                     
                     # Store logic
                     st.session_state.chat_history.append({
@@ -8,6 +8,7 @@ from ingestion.loader import load_pdf
 from ingestion.chunking import chunk_financial_pages
 from ingestion.embeddings import get_embedding_model
 from ingestion.indexer import build_faiss_index
+from retrieval.mmap_store import save_store
 
 PDF_PATH = "data/financial_docs/Zomato_Annual_Report_2022-23.pdf"
 INDEX_PATH = "vectorstore/faiss_index"
@@ -26,7 +27,7 @@ def generate_index():
     vectorstore = build_faiss_index(chunks, embedder)
     
     print(f"Saving index to {INDEX_PATH}...")
-    vectorstore.save_local(INDEX_PATH)
+    save_store(vectorstore, INDEX_PATH)
     print("Done!")
 
 if __name__ == "__main__":
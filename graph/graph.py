@@ -2,33 +2,70 @@
 LangGraph Orchestrator
 ----------------------
 Defines the workflow graph connecting the agents:
-Decomposer -> Retriever -> Analyst -> Validator -> Summarizer
+Decomposer -> Retriever (one parallel branch per sub-question) -> Join -> Analyst -> Validator -> Summarizer
+
+Under `ainvoke` the LLM-bound nodes (decompose, summarize) run as coroutines
+on the shared async client; the CPU-bound ones run in worker threads. `invoke`
+still runs everything synchronously.
+
+With speculative retrieval on, a branch retrieving on the raw query starts
+alongside the decomposer; the join waits for it and for every sub-question branch.
 
 """
-from langgraph.graph import StateGraph
+import os
+
+from langgraph.graph import StateGraph, START
+from langgraph.types import Send
+from langchain_core.runnables import RunnableLambda
 from graph.state import GraphState
 from graph.nodes import (
     decompose_node,
-    retrieve_node,
+    adecompose_node,
+    retrieve_question_node,
+    speculative_retrieve_node,
+    join_retrieval_node,
     analysis_node,
     validate_node,
     summarize_node,
+    asummarize_node,
 )
 from graph.edges import route_after_validation
 
-def build_graph(vectorstore):
+# Retrieve on the raw query while the decomposer runs
+SPECULATIVE_RETRIEVAL = os.getenv("SPECULATIVE_RETRIEVAL", "1") != "0"
+
+def fan_out_retrieval(state):
+    # One retrieval branch per sub-question; LangGraph runs them in parallel
+    return [
+        Send("retrieve", GraphState(user_query=state.user_query, current_sub_question=question))
+        for question in state.sub_questions
+    ]
+
+def build_graph(vectorstore, lexical_index=None, index_version=None, metadata_index=None,
+                speculative=SPECULATIVE_RETRIEVAL):
     graph = StateGraph(GraphState)
 
-    graph.add_node("decompose", decompose_node)
-    graph.add_node("retrieve", lambda s: retrieve_node(s, vectorstore))
+    graph.add_node("decompose", RunnableLambda(decompose_node, afunc=adecompose_node))
+    graph.add_node("retrieve",
+                   lambda s: retrieve_question_node(s, vectorstore, lexical_index, index_version, metadata_index))
+    graph.add_node("join_retrieval", join_retrieval_node)
     graph.add_node("analyze", analysis_node)
     graph.add_node("validate", validate_node)
-    graph.add_node("summarize", summarize_node)
+    graph.add_node("summarize", RunnableLambda(summarize_node, afunc=asummarize_node))
+
+    graph.add_edge(START, "decompose")
+    graph.add_conditional_edges("decompose", fan_out_retrieval, ["retrieve"])
 
-    graph.set_entry_point("decompose")
+    if speculative:
+        graph.add_node("speculate",
+                       lambda s: speculative_retrieve_node(s, vectorstore, lexical_index, index_version,
+                                                           metadata_index))
+        graph.add_edge(START, "speculate")
+        graph.add_edge(["retrieve", "speculate"], "join_retrieval")
+    else:
+        graph.add_edge("retrieve", "join_retrieval")
 
-    graph.add_edge("decompose", "retrieve")
-    graph.add_edge("retrieve", "analyze")
+    graph.add_edge("join_retrieval", "analyze")
     graph.add_edge("analyze", "validate")
 
     graph.add_conditional_edges(
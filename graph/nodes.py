@@ -1,23 +1,84 @@
-from agents.decomposer_agent import decompose_query
-from agents.retriever_agent import retrieve_content
+import time
+import inspect
+import functools
+
+from langgraph.config import get_stream_writer
+
+from agents.decomposer_agent import decompose, adecompose, decomposition_info
+from agents.retriever_agent import search_questions, select_chunks, search_tables, select_tables
 from agents.analysis_agent import analyze_financials
 from agents.validator_agent import validate_analysis
-from agents.summarizer_agent import summarize_report
+from agents.summarizer_agent import summarize_report, astream_report
+
+def timed(stage):
+    """Adds the node's wall time to state.timings under `stage`."""
+    def decorator(node):
+        if inspect.iscoroutinefunction(node):
+            @functools.wraps(node)
+            async def async_wrapper(state, *args, **kwargs):
+                started = time.perf_counter()
+                update = await node(state, *args, **kwargs)
+                return {**update, "timings": {stage: round(time.perf_counter() - started, 3)}}
+            return async_wrapper
 
+        @functools.wraps(node)
+        def wrapper(state, *args, **kwargs):
+            started = time.perf_counter()
+            update = node(state, *args, **kwargs)
+            return {**update, "timings": {stage: round(time.perf_counter() - started, 3)}}
+        return wrapper
+    return decorator
+
+@timed("decompose")
 def decompose_node(state):
     print("--- DECOMPOSE ---")
-    sub_questions = decompose_query(state.user_query)
-    return {"sub_questions": sub_questions}
+    sub_questions, source = decompose(state.user_query)
+    return {"sub_questions": sub_questions or [state.user_query], "decomposition": decomposition_info(source)}
+
+@timed("decompose")
+async def adecompose_node(state):
+    print("--- DECOMPOSE ---")
+    sub_questions, source = await adecompose(state.user_query)
+    return {"sub_questions": sub_questions or [state.user_query], "decomposition": decomposition_info(source)}
 
-def retrieve_node(state, vectorstore):
-    print("--- RETRIEVE ---")
-    chunks = retrieve_content(state.sub_questions, vectorstore)
-    return {"retrieved_chunks": chunks}
+def search_question(question, vectorstore, lexical_index=None, index_version=None, metadata_index=None):
+    chunks = search_questions([question], vectorstore, lexical_index, index_version, metadata_index)[0]
+    # Table chunks straight from a filtered search, for metric extraction
+    tables = search_tables([question], vectorstore, lexical_index, index_version, metadata_index)[0]
+    return {"question": question, "chunks": chunks, "tables": tables}
 
+@timed("retrieve")
+def retrieve_question_node(state, vectorstore, lexical_index=None, index_version=None, metadata_index=None):
+    # One fan-out branch: state.current_sub_question is set by the Send that started it
+    print(f"--- RETRIEVE: {state.current_sub_question} ---")
+    result = search_question(state.current_sub_question, vectorstore, lexical_index, index_version, metadata_index)
+    return {"question_results": [result]}
+
+@timed("speculative_retrieve")
+def speculative_retrieve_node(state, vectorstore, lexical_index=None, index_version=None, metadata_index=None):
+    # Runs on the raw query alongside decomposition
+    print("--- RETRIEVE (SPECULATIVE) ---")
+    result = search_question(state.user_query, vectorstore, lexical_index, index_version, metadata_index)
+    return {"question_results": [{**result, "speculative": True}]}
+
+@timed("join_retrieval")
+def join_retrieval_node(state):
+    print("--- JOIN RETRIEVAL ---")
+    # Branches finish in any order; fuse in sub-question order (speculative last) so results are stable
+    order = {q: i for i, q in enumerate(state.sub_questions)}
+    # (the speculative result is dropped when the decomposer returned the query unchanged)
+    results = [r for r in state.question_results if not (r.get("speculative") and r["question"] in order)]
+    results = sorted(results,
+                     key=lambda r: (r.get("speculative", False), order.get(r["question"], len(order))))
+    chunks = select_chunks([r["chunks"] for r in results])
+    tables = select_tables([r["tables"] for r in results])
+    return {"retrieved_chunks": chunks, "table_chunks": tables}
+
+@timed("analyze")
 def analysis_node(state):
     print("--- ANALYZE ---")
     try:
-        result = analyze_financials(state.retrieved_chunks, state.user_query)
+        result = analyze_financials(state.retrieved_chunks, state.user_query, state.table_chunks)
         return {"analysis_result": result}
     except Exception as e:
         print(f"Analysis Logic Failed: {e}")
@@ -31,12 +92,26 @@ def analysis_node(state):
             }
         }
 
+@timed("validate")
 def validate_node(state):
     print("--- VALIDATE ---")
     compliance = validate_analysis(state.analysis_result)
     return {"compliance_result": compliance}
 
+@timed("summarize")
 def summarize_node(state):
     print("--- SUMMARIZE ---")
     final = summarize_report(state.user_query, state.analysis_result, state.compliance_result, state.retrieved_chunks)
     return {"final_answer": final}
+
+@timed("summarize")
+async def asummarize_node(state):
+    print("--- SUMMARIZE ---")
+    # Tokens go out as "custom" stream events when the graph is run with astream(); no-op otherwise
+    writer = get_stream_writer()
+    parts = []
+    async for token in astream_report(state.user_query, state.analysis_result, state.compliance_result,
+                                      state.retrieved_chunks):
+        parts.append(token)
+        writer({"token": token})
+    return {"final_answer": "".join(parts)}
@@ -1,15 +1,36 @@
-from typing import List, Dict, Optional, Any
+import operator
+from typing import Annotated, List, Dict, Optional, Any
 from pydantic import BaseModel, Field
 
+
+def merge_timings(left: Dict[str, float], right: Dict[str, float]) -> Dict[str, float]:
+    # Parallel branches report the same stage; the stage took as long as its slowest branch
+    merged = dict(left or {})
+    for stage, seconds in (right or {}).items():
+        merged[stage] = max(merged.get(stage, 0.0), seconds)
+    return merged
+
 class GraphState(BaseModel):
     user_query: str
     
     # Decomposed sub-questions
     sub_questions: Optional[List[str]] = Field(default_factory=list)
     
+    # Where the sub-questions came from and whether the decomposer LLM was called
+    decomposition: Optional[Dict] = Field(default_factory=dict)
+    
+    # Sub-question handled by one fan-out retrieval branch
+    current_sub_question: Optional[str] = None
+    
+    # Per-branch retrieval results, appended by the parallel branches and joined before analysis
+    question_results: Annotated[List[Dict], operator.add] = Field(default_factory=list)
+    
     # Retrieved chunks for each sub-question
     retrieved_chunks: Optional[List[Dict]] = Field(default_factory=list)
     
+    # Top table chunks (has_table filter) used for metric extraction
+    table_chunks: Optional[List[Dict]] = Field(default_factory=list)
+    
     # Analysis results
     analysis_result: Optional[Dict] = Field(default_factory=dict)
     
@@ -18,3 +39,6 @@ class GraphState(BaseModel):
     
     # Final answer
     final_answer: Optional[str] = None
+    
+    # Seconds spent per stage
+    timings: Annotated[Dict[str, float], merge_timings] = Field(default_factory=dict)
@@ -1,13 +1,97 @@
+import os
 from typing import List, Dict
 from langchain_text_splitters import RecursiveCharacterTextSplitter
+from ingestion.metadata import tag_section
 
-def chunk_financial_pages(pages: List[Dict], chunk_size: int = 2000, chunk_overlap: int = 400):
+# "structured": tables become standalone chunks (whole, or row groups with the header repeated)
+#               and narrative text is split separately.
+# "inline":     tables are appended to the page text and split together (original behaviour).
+CHUNK_TABLE_MODE = os.getenv("CHUNK_TABLE_MODE", "structured")
+
+
+def _clean_cell(cell) -> str:
+    return " ".join(str(cell).split()) if cell is not None else ""
+
+
+def _table_rows(table: List[List]) -> List[List[str]]:
+    """Normalises a pdfplumber table into a grid of strings, dropping fully empty rows."""
+    rows = []
+    for row in table:
+        if not row:
+            continue
+        cells = [_clean_cell(cell) for cell in row]
+        if any(cells):
+            rows.append(cells)
+    return rows
+
+
+def _render_rows(rows: List[List[str]]) -> str:
+    return "\n".join(" | ".join(row) for row in rows)
+
+
+def _page_title(text: str) -> str:
+    """First non-empty line of the page, usually the statement heading (e.g. 'Balance Sheet as at ...')."""
+    for line in text.split("\n"):
+        if line.strip():
+            return line.strip()[:200]
+    return ""
+
+
+def chunk_table(table: List[List], page_no: int, table_index: int, title: str = "",
+                chunk_size: int = 2000) -> List[Dict]:
+    """
+    Emits a table as one chunk, or as row groups that each repeat the header row when the
+    rendered table is longer than chunk_size. Each chunk carries its own cell grid in `cells`.
+    """
+    rows = _table_rows(table)
+    if not rows:
+        return []
+
+    header, body = rows[0], rows[1:]
+    prefix = f"{title}\n" if title else ""
+
+    def make_chunk(group_rows: List[List[str]], row_start: int) -> Dict:
+        return {
+            "content": f"{prefix}[TABLE START]\n{_render_rows(group_rows)}\n[TABLE END]",
+            "page_no": page_no,
+            "has_table": True,
+            "chunk_type": "table",
+            "table_index": table_index,
+            "row_start": row_start,
+            "cells": group_rows,
+        }
+
+    if len(_render_rows(rows)) + len(prefix) <= chunk_size or not body:
+        return [make_chunk(rows, 0)]
+
+    chunks = []
+    group, group_len, row_start = [], len(prefix) + len(" | ".join(header)), 1
+    for i, row in enumerate(body, start=1):
+        row_len = len(" | ".join(row)) + 1
+        if group and group_len + row_len > chunk_size:
+            chunks.append(make_chunk([header] + group, row_start))
+            group, group_len, row_start = [], len(prefix) + len(" | ".join(header)), i
+        group.append(row)
+        group_len += row_len
+    if group:
+        chunks.append(make_chunk([header] + group, row_start))
+    return chunks
+
+
+def chunk_financial_pages(pages: List[Dict], chunk_size: int = 2000, chunk_overlap: int = 400,
+                          table_mode: str = CHUNK_TABLE_MODE):
     """
     Splits text using RecursiveCharacterTextSplitter to respect sentence/paragraph boundaries.
     Increased chunk size and overlap to capture full context (Company names, Headers + Data tables).
+
+    In "structured" table_mode tables are never split by the text splitter: they are emitted via
+    `chunk_table` and only the narrative text (outside table areas, when the loader provides it)
+    goes through the splitter.
+
+    Every chunk is tagged with the report `section` of its page (see ingestion.metadata).
     """
     chunks = []
-    
+
     # Configure the splitter
     splitter = RecursiveCharacterTextSplitter(
         chunk_size=chunk_size,
@@ -17,27 +101,56 @@ def chunk_financial_pages(pages: List[Dict], chunk_size: int = 2000, chunk_overl
     )
 
     for page in pages:
+        if table_mode == "structured":
+            chunks.extend(tag_section(_chunk_page_structured(page, splitter, chunk_size), page))
+            continue
+
         text = page["text"]
 
         # Append structured table data if available
         if page.get("tables"):
+            table_blocks = []
             for table in page["tables"]:
                 # Convert list of lists to simplistic markdown/csv format
                 table_str = "\n".join(
                     [" | ".join((str(cell) if cell is not None else "") for cell in row)
                      for row in table if row]
                 )
-                text += f"\n\n[TABLE START]\n{table_str}\n[TABLE END]\n"
+                table_blocks.append(f"\n\n[TABLE START]\n{table_str}\n[TABLE END]\n")
+            text += "".join(table_blocks)
 
         # Split text into smart chunks
         page_chunks = splitter.split_text(text)
-        
-        for p_chunk in page_chunks:
-            if p_chunk.strip():
-                chunks.append({
-                    "content": p_chunk.strip(),
-                    "page_no": page["page_no"],
-                    "has_table": len(page["tables"]) > 0
-                })
+
+        chunks.extend(tag_section([
+            {
+                "content": p_chunk.strip(),
+                "page_no": page["page_no"],
+                "has_table": len(page["tables"]) > 0
+            }
+            for p_chunk in page_chunks if p_chunk.strip()
+        ], page))
+
+    return chunks
+
+
+def _chunk_page_structured(page: Dict, splitter: RecursiveCharacterTextSplitter, chunk_size: int) -> List[Dict]:
+    chunks = []
+    tables = page.get("tables") or []
+
+    # Narrative: prefer the text outside table areas so table content isn't embedded twice
+    narrative = page.get("narrative", page["text"]) if tables else page["text"]
+    for p_chunk in splitter.split_text(narrative):
+        if p_chunk.strip():
+            chunks.append({
+                "content": p_chunk.strip(),
+                "page_no": page["page_no"],
+                "has_table": False,
+                "chunk_type": "text",
+            })
+
+    title = _page_title(page["text"])
+    for table_index, table in enumerate(tables):
+        chunks.extend(chunk_table(table, page["page_no"], table_index, title, chunk_size))
 
     return chunks
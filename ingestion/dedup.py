@@ -0,0 +1,117 @@
+"""
+Near-duplicate Chunk Elimination
+--------------------------------
+MinHash signatures over word shingles with LSH banding, applied while a
+document is ingested. Repeated page headers/footers, disclaimers and tables
+reprinted on several pages are embedded once: later copies are dropped and
+their page numbers are appended to the kept chunk's `source_pages`.
+
+Only chunks of the same chunk_type are compared, and a candidate from the LSH
+buckets is accepted when its estimated Jaccard similarity reaches
+INGEST_DEDUP_THRESHOLD. Neighbouring text chunks that merely share the
+splitter's overlap region are not near-duplicates and are kept.
+"""
+import os
+import re
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Set INGEST_DEDUP=0 to embed every chunk
+INGEST_DEDUP = os.getenv("INGEST_DEDUP", "1") != "0"
+INGEST_DEDUP_THRESHOLD = float(os.getenv("INGEST_DEDUP_THRESHOLD", "0.85"))
+SHINGLE_WORDS = 5
+NUM_PERM = 64
+BANDS = 16  # 16 bands x 4 rows: candidates from ~0.5 Jaccard, verified against the threshold
+
+_PRIME = (1 << 31) - 1
+_rng = np.random.default_rng(0x5EED)
+_A = _rng.integers(1, _PRIME, size=NUM_PERM, dtype=np.int64)
+_B = _rng.integers(0, _PRIME, size=NUM_PERM, dtype=np.int64)
+
+
+def _shingle_hashes(text: str) -> np.ndarray:
+    # Word tokens only, so punctuation/whitespace differences don't break shingles
+    words = re.findall(r"\w+", text.lower())
+    if len(words) <= SHINGLE_WORDS:
+        grams = [" ".join(words)]
+    else:
+        grams = [" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)]
+    return np.fromiter((zlib.crc32(g.encode("utf-8")) for g in set(grams)), dtype=np.int64)
+
+
+def minhash(text: str) -> np.ndarray:
+    """NUM_PERM-value MinHash signature of the text's word shingles."""
+    hashes = _shingle_hashes(text)
+    # (a * x + b) mod p stays below 2^63 for 31-bit a, b and 32-bit x
+    return ((np.outer(hashes, _A) + _B) % _PRIME).min(axis=0)
+
+
+class NearDuplicateIndex:
+    """Signatures of the chunks kept so far, keyed by their docstore id."""
+
+    def __init__(self, threshold: float = INGEST_DEDUP_THRESHOLD):
+        self.threshold = threshold
+        self._signatures: Dict[str, np.ndarray] = {}
+        self._buckets: Dict[tuple, List[str]] = {}
+
+    @classmethod
+    def from_vectorstore(cls, vectorstore, threshold: float = INGEST_DEDUP_THRESHOLD) -> "NearDuplicateIndex":
+        """Seeds the index with an existing (e.g. resumed checkpoint) store's chunks."""
+        index = cls(threshold)
+        for position in range(vectorstore.index.ntotal):
+            doc_id = vectorstore.index_to_docstore_id[position]
+            doc = vectorstore.docstore.search(doc_id)
+            index.add(doc_id, doc.page_content, doc.metadata.get("chunk_type"))
+        return index
+
+    def _band_keys(self, signature: np.ndarray, chunk_type) -> List[tuple]:
+        rows = NUM_PERM // BANDS
+        return [(chunk_type, band, signature[band * rows:(band + 1) * rows].tobytes()) for band in range(BANDS)]
+
+    def find(self, text: str, chunk_type=None) -> Tuple[Optional[str], np.ndarray]:
+        """Id of a kept near-duplicate of `text` (or None), plus the text's signature."""
+        signature = minhash(text)
+        seen = set()
+        for key in self._band_keys(signature, chunk_type):
+            for doc_id in self._buckets.get(key, ()):
+                if doc_id in seen:
+                    continue
+                seen.add(doc_id)
+                if np.mean(self._signatures[doc_id] == signature) >= self.threshold:
+                    return doc_id, signature
+        return None, signature
+
+    def add(self, doc_id: str, text: str, chunk_type=None, signature: Optional[np.ndarray] = None):
+        signature = minhash(text) if signature is None else signature
+        self._signatures[doc_id] = signature
+        for key in self._band_keys(signature, chunk_type):
+            self._buckets.setdefault(key, []).append(doc_id)
+
+    def collapse(self, documents, ids: List[str]):
+        """
+        Splits a batch into the documents to embed and the merges to apply once they
+        are committed: (kept_documents, kept_ids, [(representative_id, page_no), ...]).
+        """
+        kept, kept_ids, merges = [], [], []
+        for doc, doc_id in zip(documents, ids):
+            chunk_type = doc.metadata.get("chunk_type")
+            duplicate_of, signature = self.find(doc.page_content, chunk_type)
+            if duplicate_of is not None:
+                merges.append((duplicate_of, doc.metadata.get("page_no")))
+                continue
+            doc.metadata["source_pages"] = [doc.metadata.get("page_no")]
+            self.add(doc_id, doc.page_content, chunk_type, signature)
+            kept.append(doc)
+            kept_ids.append(doc_id)
+        return kept, kept_ids, merges
+
+
+def apply_merges(vectorstore, merges: List[Tuple[str, int]]):
+    """Records each dropped duplicate's page on the chunk that was kept for it."""
+    for doc_id, page_no in merges:
+        metadata = vectorstore.docstore.search(doc_id).metadata
+        source_pages = metadata.setdefault("source_pages", [metadata.get("page_no")])
+        if page_no not in source_pages:
+            source_pages.append(page_no)
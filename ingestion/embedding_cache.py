@@ -0,0 +1,151 @@
+"""
+Embedding Cache
+---------------
+Persistent, size-bounded cache in front of the remote embedding API.
+
+Vectors are stored in a local SQLite file keyed by
+sha256(model name + normalized chunk text), so re-uploads, revised filings and
+boilerplate repeated across a company's reports are embedded only once.
+When the file grows past EMBEDDING_CACHE_MAX_MB, the least recently used
+entries are evicted.
+"""
+import os
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import List, Dict
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", "vectorstore/embedding_cache")
+EMBEDDING_CACHE_MAX_MB = int(os.getenv("EMBEDDING_CACHE_MAX_MB", "512"))
+
+
+def normalize_text(text: str) -> str:
+    """Whitespace-insensitive form used for cache keys (PDF extraction is noisy about spacing)."""
+    return " ".join(text.split())
+
+
+def cache_key(model: str, text: str) -> str:
+    return hashlib.sha256(f"{model}\x00{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps any LangChain Embeddings; only cache misses reach the wrapped model.
+    Document embeddings are cached; single query embeddings pass straight through.
+    """
+
+    def __init__(self, base: Embeddings, cache_dir: str = EMBEDDING_CACHE_DIR, max_mb: int = EMBEDDING_CACHE_MAX_MB):
+        self.base = base
+        self.model = getattr(base, "model", base.__class__.__name__)
+        self.max_bytes = max_mb * 1024 * 1024
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(cache_dir, "embeddings.sqlite"), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY, vector BLOB NOT NULL, size INTEGER NOT NULL, last_used INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_used ON embeddings(last_used)")
+        self._conn.commit()
+
+        row = self._conn.execute("SELECT COALESCE(SUM(size), 0), COALESCE(MAX(last_used), 0) FROM embeddings").fetchone()
+        self._total_bytes, self._clock = row
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [cache_key(self.model, t) for t in texts]
+        cached = self._get_many(keys)
+
+        missing = [i for i, k in enumerate(keys) if k not in cached]
+        if missing:
+            fresh = self.base.embed_documents([texts[i] for i in missing])
+            self._put_many({keys[i]: vec for i, vec in zip(missing, fresh)})
+            for i, vec in zip(missing, fresh):
+                cached[keys[i]] = vec
+
+        with self._lock:
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+
+        return [list(cached[k]) for k in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.base.embed_query(text)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else None,
+                "cache_mb": round(self._total_bytes / (1024 * 1024), 2),
+            }
+
+    def _get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        found = {}
+        unique = list(dict.fromkeys(keys))
+        with self._lock:
+            for start in range(0, len(unique), 500):
+                batch = unique[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+
+            if found:
+                self._clock += 1
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                    [(self._clock, k) for k in found]
+                )
+                self._conn.commit()
+        return found
+
+    def _put_many(self, vectors: Dict[str, List[float]]):
+        with self._lock:
+            self._clock += 1
+            rows = []
+            for key, vec in vectors.items():
+                blob = np.asarray(vec, dtype=np.float32).tobytes()
+                rows.append((key, blob, len(blob), self._clock))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, size, last_used) VALUES (?, ?, ?, ?)", rows
+            )
+            self._total_bytes += sum(r[2] for r in rows)
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """Drops least recently used entries until the cache is back under 90% of its budget."""
+        if self._total_bytes <= self.max_bytes:
+            return
+        target = int(self.max_bytes * 0.9)
+        evicted = 0
+        while self._total_bytes > target:
+            rows = self._conn.execute(
+                "SELECT key, size FROM embeddings ORDER BY last_used ASC LIMIT 500"
+            ).fetchall()
+            if not rows:
+                break
+            victims = []
+            for key, size in rows:
+                victims.append((key,))
+                self._total_bytes -= size
+                if self._total_bytes <= target:
+                    break
+            self._conn.executemany("DELETE FROM embeddings WHERE key = ?", victims)
+            evicted += len(victims)
+        # Re-sync the running total (INSERT OR REPLACE of an existing key double-counts it)
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM embeddings").fetchone()[0]
+        logger.info(f"Embedding cache evicted {evicted} entries ({self._total_bytes / (1024 * 1024):.1f}MB kept)")
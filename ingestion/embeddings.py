@@ -1,13 +1,59 @@
 import os
 from langchain_openai import OpenAIEmbeddings
+from ingestion.embedding_cache import CachedEmbeddings
+from ingestion.local_embeddings import LOCAL_MODEL_PREFIX, HashedNgramEmbeddings
 
+# Set EMBEDDING_CACHE=0 to always call the remote API
+EMBEDDING_CACHE = os.getenv("EMBEDDING_CACHE", "1") != "0"
 
-def get_embedding_model():
-    """
-    Uses OpenAI Embeddings via OpenRouter to save RAM on the server.
-    """
+# "openrouter": OpenAI embeddings via OpenRouter (default)
+# "local":      offline, CPU-only hashed n-gram vectors (ingestion.local_embeddings)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "openrouter")
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+# Output size of known embedding models, so an empty index can be created without an API call
+EMBEDDING_DIMENSIONS = {
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+    "text-embedding-ada-002": 1536,
+}
+
+
+def _openrouter_backend(model=None):
+    # Uses OpenAI Embeddings via OpenRouter to save RAM on the server
     return OpenAIEmbeddings(
-        model="text-embedding-3-small",
+        model=model or EMBEDDING_MODEL,
         openai_api_key=os.getenv("OPENROUTER_API_KEY"),
         openai_api_base="https://openrouter.ai/api/v1"
     )
+
+
+def _local_backend(model=None):
+    return HashedNgramEmbeddings.from_model_name(model) if model else HashedNgramEmbeddings()
+
+
+# Every backend is a LangChain Embeddings implementation exposing a `model` name
+EMBEDDING_BACKENDS = {
+    "openrouter": _openrouter_backend,
+    "local": _local_backend,
+}
+
+
+def backend_for_model(model: str) -> str:
+    """Backend that produces vectors for a model name recorded in an index manifest."""
+    return "local" if model.startswith(LOCAL_MODEL_PREFIX) else "openrouter"
+
+
+def get_embedding_model(cache: bool = EMBEDDING_CACHE, backend: str = EMBEDDING_BACKEND, model: str = None):
+    """
+    Embedder for the configured backend (or a specific `model` of it).
+    Remote document embeddings go through the persistent on-disk cache unless cache=False;
+    local vectors are cheaper to compute than to look up, so they are never cached.
+    """
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown EMBEDDING_BACKEND '{backend}'. Expected one of {sorted(EMBEDDING_BACKENDS)}")
+    embedder = EMBEDDING_BACKENDS[backend](model)
+    if cache and backend != "local":
+        return CachedEmbeddings(embedder)
+    return embedder
@@ -1,6 +1,6 @@
 from langchain_community.vectorstores import FAISS
 from langchain_core.documents import Document
-
+from retrieval.faiss_store import ensure_index_type
 
 
 def create_documents_from_chunks(chunks):
@@ -9,14 +9,13 @@ def create_documents_from_chunks(chunks):
         docs.append(
             Document(
                 page_content=chunk["content"],
-                metadata={
-                    "page_no": chunk["page_no"],
-                    "has_table": chunk["has_table"]
-                }
+                # page_no, has_table plus any structured-chunk fields (chunk_type, cells, ...)
+                metadata={k: v for k, v in chunk.items() if k != "content"}
             )
         )
     return docs
 
 def build_faiss_index(chunks, embedder):
     docs = create_documents_from_chunks(chunks)
-    return FAISS.from_documents(docs, embedder)
\ No newline at end of file
+    # Exact Flat build, converted to the configured/auto-selected ANN type if needed
+    return ensure_index_type(FAISS.from_documents(docs, embedder))
\ No newline at end of file
@@ -2,17 +2,89 @@
 Data Ingestion Loader
 ---------------------
 Handles loading of financial documents (PDFs).
-Auto-detects scanned PDFs and switches to OCR if necessary.
+Detects scanned pages (empty or near-empty text layer) one page at a time and
+sends only those through OCR, so mixed scanned/text PDFs pay for OCR only where needed.
 
 """
+import os
 import logging
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, Iterator, Optional
+
 from ingestion.pdf_loader import load_text_pdf
-# from ingestion.ocr_loader import load_scanned_pdf # Disable OCR for now
+from ingestion.ocr_loader import OCR_WORKERS, ocr_available, ocr_page
 
 logger = logging.getLogger(__name__)
 
-def load_pdf(path: str):
+# Set PDF_OCR=0 to never OCR (text layer only)
+PDF_OCR = os.getenv("PDF_OCR", "1") != "0"
+# Pages whose text layer is shorter than this are treated as scanned
+OCR_MIN_TEXT_CHARS = int(os.getenv("OCR_MIN_TEXT_CHARS", "30"))
+
+
+def needs_ocr(page: Dict) -> bool:
+    return len(page["text"].strip()) < OCR_MIN_TEXT_CHARS
+
+
+def _with_ocr_fallback(path: str, pages: Iterator[Dict], routing_summary: Optional[Dict]) -> Iterator[Dict]:
+    """
+    Passes text pages straight through and OCRs scanned ones in a process pool.
+    A bounded look-ahead buffer keeps output in page order while OCR runs in the background.
+    """
+    max_pending = max(1, OCR_WORKERS) * 2
+    ocr_pages = 0
+
+    executor = None
+    try:
+        buffer = deque()
+        for page in pages:
+            if needs_ocr(page):
+                if executor is None:
+                    executor = ProcessPoolExecutor(max_workers=max(1, OCR_WORKERS))
+                buffer.append((page, executor.submit(ocr_page, path, page["page_no"])))
+                ocr_pages += 1
+            else:
+                buffer.append((page, None))
+
+            # Release everything that is ready at the head; block only when the look-ahead is full
+            while buffer and (buffer[0][1] is None or buffer[0][1].done() or len(buffer) > max_pending):
+                yield _resolve(*buffer.popleft())
+
+        while buffer:
+            yield _resolve(*buffer.popleft())
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    if ocr_pages:
+        logger.info(f"OCR applied to {ocr_pages} scanned pages of {os.path.basename(path)}")
+        if routing_summary is not None:
+            routing_summary["ocr"] = ocr_pages
+
+
+def _resolve(page: Dict, ocr: Optional[Future]) -> Dict:
+    if ocr is None:
+        return page
+    try:
+        scanned = ocr.result()
+    except Exception as e:
+        logger.warning(f"OCR failed on page {page['page_no']}, keeping text layer: {e}")
+        return page
+    # Keep the routing keys from text extraction; replace the (empty) text with OCR output
+    return {**page, "text": scanned["text"], "ocr": True}
+
+
+def load_pdf(path: str, **kwargs):
     logger.info(f"Loading PDF generator from: {path}")
-    
+
     # Simple pass-through generator to support batch processing
-    return load_text_pdf(path)
+    # (kwargs: workers, max_memory_mb, routing_summary, start_page -> see load_text_pdf)
+    pages = load_text_pdf(path, **kwargs)
+
+    if not PDF_OCR:
+        return pages
+    if not ocr_available():
+        logger.warning("OCR dependencies (pdf2image/pytesseract + poppler/tesseract) not found. Scanned pages will be empty.")
+        return pages
+    return _with_ocr_fallback(path, pages, kwargs.get("routing_summary"))
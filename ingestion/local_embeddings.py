@@ -0,0 +1,83 @@
+"""
+Local Embeddings
+----------------
+CPU-only, dependency-free embedding backend: signed feature hashing of
+character n-grams (3-5) and words into a fixed-size vector, with sublinear
+term weighting and L2 normalisation, computed with NumPy.
+
+It is deterministic and needs no network, which makes it the backend for
+offline benchmarks, CI, and for running when the remote provider is down.
+Retrieval quality is lexical (close to TF-IDF), not semantic.
+
+Select it with EMBEDDING_BACKEND=local. Vectors from different backends live in
+different spaces; each index records the model it was built with and is always
+queried with that model.
+"""
+import os
+import re
+import zlib
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+LOCAL_EMBEDDING_DIM = int(os.getenv("LOCAL_EMBEDDING_DIM", "1024"))
+LOCAL_MODEL_PREFIX = "local-hashed-ngram-"
+NGRAM_RANGE = (3, 4, 5)
+
+_FNV_PRIME = np.uint64(1099511628211)
+_WORD_SALT = np.uint64(0x9E3779B97F4A7C15)
+_WORD = re.compile(r"\w+")
+
+
+def local_model_name(dim: int = LOCAL_EMBEDDING_DIM) -> str:
+    return f"{LOCAL_MODEL_PREFIX}{dim}"
+
+
+def _ngram_hashes(codes: np.ndarray, n: int) -> np.ndarray:
+    """Rolling FNV-style hash of every n-byte window (uint64 arithmetic wraps, as intended)."""
+    windows = len(codes) - n + 1
+    hashes = np.full(windows, np.uint64(n), dtype=np.uint64)
+    for j in range(n):
+        hashes = hashes * _FNV_PRIME + codes[j:j + windows]
+    return hashes
+
+
+class HashedNgramEmbeddings(Embeddings):
+    def __init__(self, dim: int = LOCAL_EMBEDDING_DIM):
+        self.dim = dim
+        self.model = local_model_name(dim)
+
+    @classmethod
+    def from_model_name(cls, model: str) -> "HashedNgramEmbeddings":
+        return cls(int(model[len(LOCAL_MODEL_PREFIX):]))
+
+    def _features(self, text: str) -> np.ndarray:
+        text = " ".join(text.lower().split())
+        codes = np.frombuffer(f" {text} ".encode("utf-8"), dtype=np.uint8).astype(np.uint64)
+        parts = [_ngram_hashes(codes, n) for n in NGRAM_RANGE if len(codes) >= n]
+        words = _WORD.findall(text)
+        if words:
+            # Whole words get their own (salted) features so exact terms weigh more than fragments
+            word_hashes = np.fromiter((zlib.crc32(w.encode("utf-8")) for w in words), dtype=np.uint64, count=len(words))
+            parts.append((word_hashes * _FNV_PRIME) ^ _WORD_SALT)
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=np.uint64)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        # Whole batch in one bincount: row i's features land in [i * dim, (i + 1) * dim)
+        features = [self._features(t) for t in texts]
+        hashes = np.concatenate(features)
+        rows = np.repeat(np.arange(len(texts), dtype=np.int64), [len(f) for f in features])
+        buckets = rows * self.dim + (hashes % np.uint64(self.dim)).astype(np.int64)
+        signs = np.where(hashes >> np.uint64(63), -1.0, 1.0)
+        vectors = np.bincount(buckets, weights=signs, minlength=len(texts) * self.dim).reshape(len(texts), self.dim)
+
+        vectors = np.sign(vectors) * np.log1p(np.abs(vectors))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors /= np.where(norms == 0, 1.0, norms)
+        return vectors.astype(np.float32).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
@@ -0,0 +1,41 @@
+"""
+Chunk Metadata
+--------------
+Detects which part of an annual report a page belongs to from its heading
+lines, so retrieval can be filtered by section (e.g. only the balance sheet).
+"""
+from typing import Dict, List
+
+SECTION_OTHER = "other"
+
+# Checked in order: note pages often name a statement in their heading ("Notes to the balance sheet")
+SECTION_PATTERNS = [
+    ("notes", ["notes to", "significant accounting policies"]),
+    ("auditor_report", ["independent auditor", "auditor's report", "auditors' report", "auditors report"]),
+    ("balance_sheet", ["balance sheet", "statement of financial position"]),
+    ("income_statement", ["profit and loss", "income statement", "statement of comprehensive income",
+                          "statement of operations"]),
+    ("cash_flow", ["cash flow"]),
+    ("equity_changes", ["changes in equity"]),
+    ("directors_report", ["directors' report", "directors report", "board's report", "management discussion"]),
+]
+SECTIONS = [name for name, _ in SECTION_PATTERNS] + [SECTION_OTHER]
+
+HEADING_LINES = 8
+
+
+def detect_section(text: str) -> str:
+    """Section of a page, judged from its first few non-empty lines."""
+    lines = [line.strip().lower() for line in text.split("\n") if line.strip()][:HEADING_LINES]
+    heading = " ".join(lines).replace("’", "'")
+    for name, phrases in SECTION_PATTERNS:
+        if any(phrase in heading for phrase in phrases):
+            return name
+    return SECTION_OTHER
+
+
+def tag_section(chunks: List[Dict], page: Dict) -> List[Dict]:
+    section = detect_section(page.get("text") or "")
+    for chunk in chunks:
+        chunk["section"] = section
+    return chunks
@@ -0,0 +1,105 @@
+"""
+Page Router
+-----------
+Cheap per-page classifier that decides whether a PDF page is worth sending
+through pdfplumber's (expensive) table extraction.
+
+Most annual-report pages are narrative text; only the financial statements,
+notes and KPI pages carry tables. The features used here are all available
+from the page's already-parsed layout objects and text, so classifying a page
+costs a fraction of `extract_tables()`.
+"""
+import os
+import re
+from typing import Dict, Optional
+
+ROUTE_TABLE = "table"
+ROUTE_TEXT = "text"
+
+# Set PDF_TABLE_ROUTING=0 to send every page through table extraction (original behaviour)
+PDF_TABLE_ROUTING = os.getenv("PDF_TABLE_ROUTING", "1") != "0"
+# Set PDF_TABLE_ROUTING_AUDIT=1 to also run table extraction on text-routed pages and count misses
+PDF_TABLE_ROUTING_AUDIT = os.getenv("PDF_TABLE_ROUTING_AUDIT", "0") == "1"
+
+# Thresholds (tuned on Indian annual reports / quarterly results)
+MIN_RULING_OBJECTS = 8        # lines + rects drawn on the page (cell borders, row rules)
+MIN_DIGIT_DENSITY = 0.12      # digits / non-whitespace characters
+MIN_NUMERIC_LINE_RATIO = 0.25  # share of text lines carrying 2+ numeric columns
+
+STATEMENT_HEADINGS = re.compile(
+    r"balance\s+sheet|statement\s+of\s+profit|profit\s+and\s+loss|income\s+statement"
+    r"|cash\s+flow|changes\s+in\s+equity|financial\s+results|segment\s+(?:information|results)"
+    r"|(?:₹|rs\.?|inr|usd)\s*(?:in\s+)?(?:crore|lakh|million|billion|mn|bn)",
+    re.IGNORECASE,
+)
+NUMERIC_TOKEN = re.compile(r"\(?-?\d[\d,]*(?:\.\d+)?\)?%?")
+
+
+def page_features(page, text: str) -> Dict:
+    """Collects the cheap layout/text signals used for routing."""
+    ruling = len(page.lines) + len(page.rects)
+
+    non_space = sum(1 for c in text if not c.isspace())
+    digits = sum(1 for c in text if c.isdigit())
+    digit_density = digits / non_space if non_space else 0.0
+
+    lines = [l for l in text.split("\n") if l.strip()]
+    numeric_lines = sum(1 for l in lines if len(NUMERIC_TOKEN.findall(l)) >= 2)
+    numeric_line_ratio = numeric_lines / len(lines) if lines else 0.0
+
+    return {
+        "ruling_objects": ruling,
+        "digit_density": round(digit_density, 3),
+        "numeric_line_ratio": round(numeric_line_ratio, 3),
+        "statement_heading": bool(STATEMENT_HEADINGS.search(text[:1500])),
+    }
+
+
+def classify_page(page, text: str) -> str:
+    """Returns ROUTE_TABLE for pages that likely hold tables, ROUTE_TEXT otherwise."""
+    if not PDF_TABLE_ROUTING:
+        return ROUTE_TABLE
+
+    f = page_features(page, text)
+
+    if f["statement_heading"] and (f["digit_density"] >= MIN_DIGIT_DENSITY / 2 or f["ruling_objects"] > 0):
+        return ROUTE_TABLE
+    if f["ruling_objects"] >= MIN_RULING_OBJECTS and f["numeric_line_ratio"] > 0:
+        return ROUTE_TABLE
+    if f["digit_density"] >= MIN_DIGIT_DENSITY and f["numeric_line_ratio"] >= MIN_NUMERIC_LINE_RATIO:
+        return ROUTE_TABLE
+    return ROUTE_TEXT
+
+
+def new_routing_summary() -> Dict:
+    return {
+        "pages": 0,
+        ROUTE_TABLE: 0,
+        ROUTE_TEXT: 0,
+        "table_seconds": 0.0,
+        "audited_pages": 0,
+        "audit_seconds": 0.0,
+        "missed_table_pages": 0,
+    }
+
+
+def record_page(summary: Optional[Dict], page: Dict):
+    """Folds one extracted page dict (with its `route` keys) into a per-document summary."""
+    if summary is None:
+        return
+    if not summary:
+        summary.update(new_routing_summary())
+
+    route = page.get("route", ROUTE_TABLE)
+    summary["pages"] += 1
+    summary[route] += 1
+    summary["table_seconds"] = round(summary["table_seconds"] + page.get("table_seconds", 0.0), 3)
+
+    if route == ROUTE_TEXT and page.get("audited"):
+        summary["audited_pages"] += 1
+        summary["audit_seconds"] = round(summary["audit_seconds"] + page.get("audit_seconds", 0.0), 3)
+        if page["tables"]:
+            summary["missed_table_pages"] += 1
+
+    audited = summary["audited_pages"]
+    summary["lost_table_rate"] = round(summary["missed_table_pages"] / audited, 3) if audited else None
@@ -1,20 +1,172 @@
+import os
+import time
+import logging
 import pdfplumber
-from typing import Iterator, Dict
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, Dict, List, Optional
 
+from ingestion.page_router import (
+    ROUTE_TABLE,
+    PDF_TABLE_ROUTING_AUDIT,
+    classify_page,
+    record_page,
+)
 
-def load_text_pdf(path: str) -> Iterator[Dict]:
+logger = logging.getLogger(__name__)
+
+# Parallel extraction settings (0 workers = sequential, the original behaviour)
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", "0"))
+PDF_EXTRACT_MAX_MEMORY_MB = int(os.getenv("PDF_EXTRACT_MAX_MEMORY_MB", "0"))
+PDF_EXTRACT_PAGES_PER_TASK = int(os.getenv("PDF_EXTRACT_PAGES_PER_TASK", "10"))
+
+
+def _extract_page(page, page_no: int) -> Dict:
+    text = page.extract_text() or ""
+
+    # Only likely tabular pages pay for full table extraction
+    route = classify_page(page, text)
+    tables = []
+    extracted = {"route": route}
+
+    if route == ROUTE_TABLE:
+        start = time.perf_counter()
+        found = page.find_tables()
+        tables = [t.extract() for t in found]
+        if found:
+            # Text outside the table areas lets the chunker embed tables only once
+            extracted["narrative"] = _text_outside(page, [t.bbox for t in found])
+        extracted["table_seconds"] = time.perf_counter() - start
+    elif PDF_TABLE_ROUTING_AUDIT:
+        # Audit mode: measure what the skip saved and whether it lost any tables
+        start = time.perf_counter()
+        tables = page.extract_tables() or []
+        extracted["audit_seconds"] = time.perf_counter() - start
+        extracted["audited"] = True
+
+    return {
+        "page_no": page_no,
+        "text": text.strip(),
+        "tables": tables,
+        **extracted
+    }
+
+
+def _text_outside(page, bboxes) -> str:
+    try:
+        outside = page
+        for bbox in bboxes:
+            outside = outside.outside_bbox(bbox, strict=False)
+        return (outside.extract_text() or "").strip()
+    except ValueError:
+        # Degenerate bbox: fall back to the full page text
+        return (page.extract_text() or "").strip()
+
+
+def _limit_worker_memory(max_memory_mb: int):
+    """
+    Process pool initializer: caps the address space of each extraction worker.
+    A runaway page then fails with MemoryError in the worker instead of taking down the API box.
+    """
+    if not max_memory_mb:
+        return
+    try:
+        import resource
+        limit = max_memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError) as e:
+        # Not available on Windows / not permitted in some containers
+        logger.warning(f"Could not apply worker memory cap of {max_memory_mb}MB: {e}")
+
+
+def _extract_page_range(path: str, start: int, end: int) -> List[Dict]:
+    """Worker task: extract pages [start, end) (0-based) from the PDF at `path`."""
+    pages = []
+    with pdfplumber.open(path) as pdf:
+        for i in range(start, end):
+            page = pdf.pages[i]
+            pages.append(_extract_page(page, i + 1))
+            # Drop pdfplumber's cached layout objects so memory doesn't grow with the range
+            page.close()
+    return pages
+
+
+def _count_pages(path: str) -> int:
+    with pdfplumber.open(path) as pdf:
+        return len(pdf.pages)
+
+
+def _load_text_pdf_parallel(path: str, workers: int, max_memory_mb: int, pages_per_task: int,
+                            start_page: int = 1) -> Iterator[Dict]:
+    """
+    Splits the page range into fixed-size windows and extracts them in a process pool.
+    Only `2 * workers` windows are in flight at once, and results are yielded strictly
+    in page order, so memory stays bounded and callers see the same stream as the sequential path.
+    """
+    total_pages = _count_pages(path)
+    ranges = [
+        (start, min(start + pages_per_task, total_pages))
+        for start in range(start_page - 1, total_pages, pages_per_task)
+    ]
+    logger.info(f"Parallel extraction: {total_pages} pages, {len(ranges)} tasks, {workers} workers")
+
+    max_in_flight = workers * 2
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_limit_worker_memory,
+        initargs=(max_memory_mb,),
+    ) as executor:
+        pending = deque()
+        next_range = 0
+
+        while next_range < len(ranges) or pending:
+            # Keep the pool fed up to the in-flight limit
+            while next_range < len(ranges) and len(pending) < max_in_flight:
+                start, end = ranges[next_range]
+                pending.append(executor.submit(_extract_page_range, path, start, end))
+                next_range += 1
+
+            # Wait on the oldest window so pages come out in order
+            for page in pending.popleft().result():
+                yield page
+
+
+def load_text_pdf(
+    path: str,
+    workers: Optional[int] = None,
+    max_memory_mb: Optional[int] = None,
+    routing_summary: Optional[Dict] = None,
+    start_page: int = 1,
+) -> Iterator[Dict]:
     """
     Extract text and tables page-wise from a financial PDF (Generator).
     Yields dicts with page_no, text, tables to save memory.
+
+    Each page is routed by `ingestion.page_router.classify_page`; only "table" pages run
+    `extract_tables()`. Pass a dict as routing_summary to have it filled with per-route counts.
+    start_page (1-based) skips earlier pages entirely, e.g. when resuming from a checkpoint.
+
+    workers > 1 extracts pages in a process pool (see PDF_EXTRACT_WORKERS);
+    max_memory_mb caps each worker's address space (see PDF_EXTRACT_MAX_MEMORY_MB).
     """
-    with pdfplumber.open(path) as pdf:
-        for i, page in enumerate(pdf.pages):
-            text = page.extract_text() or ""
-            tables = page.extract_tables() or []
+    workers = PDF_EXTRACT_WORKERS if workers is None else workers
+    max_memory_mb = PDF_EXTRACT_MAX_MEMORY_MB if max_memory_mb is None else max_memory_mb
 
-            yield {
-                "page_no": i + 1,
-                "text": text.strip(),
-                "tables": tables
-            }
+    if workers and workers > 1:
+        pages = _load_text_pdf_parallel(path, workers, max_memory_mb, max(1, PDF_EXTRACT_PAGES_PER_TASK), start_page)
+    else:
+        pages = _load_text_pdf_sequential(path, start_page)
 
+    summary = {} if routing_summary is None else routing_summary
+    for page in pages:
+        record_page(summary, page)
+        yield page
+
+    if summary:
+        logger.info(f"Page routing summary for {os.path.basename(path)}: {summary}")
+
+
+def _load_text_pdf_sequential(path: str, start_page: int = 1) -> Iterator[Dict]:
+    with pdfplumber.open(path) as pdf:
+        for i in range(max(0, start_page - 1), len(pdf.pages)):
+            yield _extract_page(pdf.pages[i], i + 1)
@@ -0,0 +1,228 @@
+"""
+Ingestion Pipeline
+------------------
+Staged, overlapping ingestion: extract -> chunk -> embed -> index.
+
+Stages run on their own threads and are connected by bounded queues, so PDF
+parsing keeps going while embedding requests wait on the network. Embedding
+requests run concurrently (up to INGEST_EMBED_CONCURRENCY in flight) with
+exponential backoff on rate limits. The index stage commits results strictly
+in document order, so `on_commit(last_page)` always reports a contiguous
+prefix of the document. Near-duplicate chunks are dropped in the chunk stage
+(see ingestion.dedup) before they cost an embedding.
+"""
+import os
+import time
+import uuid
+import queue
+import random
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+
+from ingestion.chunking import chunk_financial_pages
+from ingestion.dedup import INGEST_DEDUP, NearDuplicateIndex, apply_merges
+from ingestion.indexer import create_documents_from_chunks
+
+logger = logging.getLogger(__name__)
+
+INGEST_BATCH_PAGES = int(os.getenv("INGEST_BATCH_PAGES", "50"))
+INGEST_EMBED_BATCH_SIZE = int(os.getenv("INGEST_EMBED_BATCH_SIZE", "64"))
+INGEST_EMBED_CONCURRENCY = int(os.getenv("INGEST_EMBED_CONCURRENCY", "4"))
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "2"))
+INGEST_MAX_RETRIES = int(os.getenv("INGEST_MAX_RETRIES", "5"))
+INGEST_BACKOFF_SECONDS = float(os.getenv("INGEST_BACKOFF_SECONDS", "1.0"))
+
+_DONE = object()
+_stats_lock = threading.Lock()
+
+
+class _StageError:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def _is_rate_limit(error: Exception) -> bool:
+    if getattr(error, "status_code", None) == 429:
+        return True
+    return error.__class__.__name__ == "RateLimitError"
+
+
+def embed_with_retry(embedder, texts: List[str], stats: Dict, max_retries: int = INGEST_MAX_RETRIES,
+                     backoff: float = INGEST_BACKOFF_SECONDS) -> List[List[float]]:
+    """Embeds one request's worth of texts, backing off exponentially (with jitter) on HTTP 429."""
+    attempt = 0
+    while True:
+        try:
+            return embedder.embed_documents(texts)
+        except Exception as e:
+            if not _is_rate_limit(e) or attempt >= max_retries:
+                raise
+            delay = backoff * (2 ** attempt) * (1 + random.random())
+            attempt += 1
+            with _stats_lock:
+                stats["retries"] += 1
+            logger.warning(f"Embedding rate limited, retry {attempt}/{max_retries} in {delay:.1f}s")
+            time.sleep(delay)
+
+
+def _put(q: queue.Queue, item, stop: threading.Event) -> bool:
+    """Blocking put that gives up once the pipeline is stopping."""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.2)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _extract_stage(pages: Iterable[Dict], batch_pages: int, out_q: queue.Queue, stop: threading.Event):
+    try:
+        batch = []
+        for page in pages:
+            if stop.is_set():
+                return
+            batch.append(page)
+            if len(batch) >= batch_pages:
+                if not _put(out_q, batch, stop):
+                    return
+                batch = []
+        if batch:
+            _put(out_q, batch, stop)
+        _put(out_q, _DONE, stop)
+    except BaseException as e:
+        _put(out_q, _StageError(e), stop)
+
+
+def _chunk_stage(in_q: queue.Queue, out_q: queue.Queue, stop: threading.Event,
+                 chunker: Callable[[List[Dict]], List[Dict]], deduplicator: Optional[NearDuplicateIndex]):
+    try:
+        while not stop.is_set():
+            try:
+                item = in_q.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            if item is _DONE or isinstance(item, _StageError):
+                _put(out_q, item, stop)
+                return
+
+            documents = create_documents_from_chunks(chunker(item))
+            ids = [str(uuid.uuid4()) for _ in documents]
+            merges = []
+            if deduplicator is not None:
+                documents, ids, merges = deduplicator.collapse(documents, ids)
+            if not _put(out_q, (documents, ids, merges, len(item), item[-1]["page_no"]), stop):
+                return
+    except BaseException as e:
+        _put(out_q, _StageError(e), stop)
+
+
+def run_ingestion_pipeline(
+    pages: Iterable[Dict],
+    vectorstore,
+    on_commit: Optional[Callable[[int], None]] = None,
+    chunker: Callable[[List[Dict]], List[Dict]] = chunk_financial_pages,
+    batch_pages: int = INGEST_BATCH_PAGES,
+    embed_batch_size: int = INGEST_EMBED_BATCH_SIZE,
+    concurrency: int = INGEST_EMBED_CONCURRENCY,
+    queue_size: int = INGEST_QUEUE_SIZE,
+    dedup: bool = INGEST_DEDUP,
+) -> Dict:
+    """
+    Streams `pages` into `vectorstore` and returns throughput stats.
+    `on_commit(last_page_no)` is called after each page batch is fully indexed.
+    With `dedup`, near-duplicates of already kept chunks (including those in a resumed
+    store) are not embedded; their pages are added to the kept chunk's `source_pages`.
+    """
+    embedder = vectorstore.embedding_function
+    # 0 (or less) still means one request at a time
+    concurrency = max(1, concurrency)
+    stats = {"pages": 0, "chunks": 0, "duplicates": 0, "embed_requests": 0, "retries": 0}
+    started = time.perf_counter()
+    deduplicator = NearDuplicateIndex.from_vectorstore(vectorstore) if dedup else None
+
+    stop = threading.Event()
+    page_q = queue.Queue(maxsize=queue_size)
+    chunk_q = queue.Queue(maxsize=queue_size)
+    threads = [
+        threading.Thread(target=_extract_stage, args=(pages, batch_pages, page_q, stop),
+                         name="ingest-extract", daemon=True),
+        threading.Thread(target=_chunk_stage, args=(page_q, chunk_q, stop, chunker, deduplicator),
+                         name="ingest-chunk", daemon=True),
+    ]
+    for t in threads:
+        t.start()
+
+    # Each in-flight entry: (future, texts, metadatas, ids, merges, pages_in_batch, last_page_no or None)
+    # A batch's merges ride on its last entry: every representative is committed by then
+    in_flight = deque()
+
+    def commit_oldest():
+        future, texts, metadatas, ids, merges, batch_size, last_page = in_flight.popleft()
+        vectors = future.result()
+        if texts:
+            vectorstore.add_embeddings(text_embeddings=list(zip(texts, vectors)), metadatas=metadatas, ids=ids)
+            stats["chunks"] += len(texts)
+        if merges:
+            apply_merges(vectorstore, merges)
+            stats["duplicates"] += len(merges)
+        if last_page is not None:
+            stats["pages"] += batch_size
+            if on_commit:
+                on_commit(last_page)
+
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="ingest-embed") as pool:
+            while True:
+                item = chunk_q.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, _StageError):
+                    raise item.error
+
+                documents, ids, merges, batch_size, last_page = item
+                if not documents:
+                    # Nothing to embed (blank pages, or only duplicates) - the batch still counts as committed in order
+                    done = Future()
+                    done.set_result([])
+                    in_flight.append((done, [], [], [], merges, batch_size, last_page))
+
+                for start in range(0, len(documents), embed_batch_size):
+                    group = documents[start:start + embed_batch_size]
+                    texts = [d.page_content for d in group]
+                    is_last = start + embed_batch_size >= len(documents)
+
+                    while len(in_flight) >= concurrency:
+                        commit_oldest()
+
+                    stats["embed_requests"] += 1
+                    in_flight.append((
+                        pool.submit(embed_with_retry, embedder, texts, stats),
+                        texts,
+                        [d.metadata for d in group],
+                        ids[start:start + embed_batch_size],
+                        merges if is_last else [],
+                        batch_size,
+                        last_page if is_last else None,
+                    ))
+
+            while in_flight:
+                commit_oldest()
+    finally:
+        stop.set()
+        for t in threads:
+            t.join(timeout=5)
+
+    elapsed = time.perf_counter() - started
+    stats["seconds"] = round(elapsed, 2)
+    stats["pages_per_sec"] = round(stats["pages"] / elapsed, 2) if elapsed else None
+    logger.info(
+        f"Ingestion pipeline: {stats['pages']} pages, {stats['chunks']} chunks "
+        f"({stats['duplicates']} near-duplicates collapsed) in {stats['seconds']}s "
+        f"({stats['pages_per_sec']} pages/sec, {stats['embed_requests']} embed requests, {stats['retries']} retries)"
+    )
+    return stats
+
@@ -0,0 +1,94 @@
+"""
+Adaptive Top-k
+--------------
+Chooses how many chunks each sub-question keeps from the shape of its score
+distribution instead of a fixed k, then fits the fused result into a global
+token budget.
+
+Per sub-question (candidates come from a wider search, ADAPTIVE_MAX_K):
+  - score floor: candidates below ADAPTIVE_MIN_SCORE are dropped
+  - elbow: the list is cut at the largest score drop when that drop is at least
+    ADAPTIVE_GAP_RATIO of the list's score range (a clear "relevant vs rest" break)
+Across sub-questions: chunks are taken in fused (RRF) order until
+RETRIEVAL_TOKEN_BUDGET is spent.
+
+Scores are cosine similarities derived from the FAISS L2 distances (the values
+similarity_search_with_score returns; embeddings are unit length), or the fused
+score in hybrid mode. Fused scores are relative to each query's best BM25 hit, so in hybrid
+mode the floor is applied to each chunk's dense similarity instead; chunks found
+only by BM25 have none and are kept.
+"""
+import os
+from typing import Dict, List, Optional
+
+# "adaptive" (below) or "fixed": k=6 per sub-question, 6 chunks total
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "adaptive")
+ADAPTIVE_MAX_K = int(os.getenv("ADAPTIVE_MAX_K", "12"))
+ADAPTIVE_MIN_K = int(os.getenv("ADAPTIVE_MIN_K", "2"))
+ADAPTIVE_MIN_SCORE = float(os.getenv("ADAPTIVE_MIN_SCORE", "0.2"))
+ADAPTIVE_GAP_RATIO = float(os.getenv("ADAPTIVE_GAP_RATIO", "0.35"))
+RETRIEVAL_TOKEN_BUDGET = int(os.getenv("RETRIEVAL_TOKEN_BUDGET", "3000"))
+
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def dense_similarity(chunk: Dict) -> Optional[float]:
+    """Cosine similarity from the squared L2 distance, None for chunks without a dense hit."""
+    if chunk.get("distance") is None:
+        return None
+    return 1.0 - chunk["distance"] / 2.0
+
+
+def chunk_score(chunk: Dict) -> float:
+    """Higher is better: hybrid score if fused, else cosine similarity from the squared L2 distance."""
+    if chunk.get("hybrid_score") is not None:
+        return chunk["hybrid_score"]
+    similarity = dense_similarity(chunk)
+    return similarity if similarity is not None else 0.0
+
+
+def adaptive_cutoff(ranked: List[Dict], min_score: float = ADAPTIVE_MIN_SCORE, gap_ratio: float = ADAPTIVE_GAP_RATIO,
+                    min_k: int = ADAPTIVE_MIN_K) -> List[Dict]:
+    """Keeps the head of one ranked list: above the score floor and before the elbow."""
+    if not ranked:
+        return []
+    if ranked[0].get("hybrid_score") is not None:
+        # Fused order: drop weak dense neighbours wherever they rank, but never the top min_k
+        ranked = [
+            c for i, c in enumerate(ranked)
+            if i < min_k or dense_similarity(c) is None or dense_similarity(c) >= min_score
+        ]
+        scores = [chunk_score(c) for c in ranked]
+        keep = len(ranked)
+    else:
+        scores = [chunk_score(c) for c in ranked]
+        keep = sum(1 for s in scores if s >= min_score)
+    keep = max(keep, min(min_k, len(ranked)))
+
+    head = scores[:keep]
+    if len(head) > 2:
+        gaps = [head[i] - head[i + 1] for i in range(len(head) - 1)]
+        widest = max(range(len(gaps)), key=gaps.__getitem__)
+        span = head[0] - head[-1]
+        if span > 0 and gaps[widest] / span >= gap_ratio:
+            keep = max(widest + 1, min(min_k, len(ranked)))
+
+    for chunk, score in zip(ranked, scores):
+        chunk["score"] = round(score, 4)
+    return ranked[:keep]
+
+
+def fit_token_budget(chunks: List[Dict], budget: int = RETRIEVAL_TOKEN_BUDGET) -> List[Dict]:
+    """Longest prefix of `chunks` within the token budget (always at least one chunk)."""
+    selected, used = [], 0
+    for chunk in chunks:
+        tokens = estimate_tokens(chunk["content"])
+        if selected and used + tokens > budget:
+            break
+        selected.append(chunk)
+        used += tokens
+    return selected
@@ -1,7 +1,149 @@
+"""
+FAISS Index Factory
+-------------------
+Pluggable FAISS index types for the document vector stores.
+
+    flat      exact exhaustive scan (IndexFlatL2) - best for a single report
+    ivf_flat  inverted lists over raw vectors, searches FAISS_NPROBE lists
+    hnsw      graph index, no training, higher memory
+    ivf_pq    inverted lists over product-quantized codes, smallest footprint
+    auto      picks one of the above from the corpus size (see choose_index_type)
+
+Ingestion always appends into an exact Flat index; `ensure_index_type` then
+converts (trains + rebuilds) the finished index into the configured type when
+the corpus crosses the relevant threshold. The rebuild produces a new store
+object, so it can be published with the registry's atomic swap.
+"""
+import os
+import math
+import time
+import logging
+from typing import Optional
+
 import faiss
+import numpy as np
 from langchain_community.vectorstores import FAISS
 from langchain_core.documents import Document
 
+logger = logging.getLogger(__name__)
+
+INDEX_FLAT = "flat"
+INDEX_IVF_FLAT = "ivf_flat"
+INDEX_HNSW = "hnsw"
+INDEX_IVF_PQ = "ivf_pq"
+INDEX_AUTO = "auto"
+INDEX_TYPES = (INDEX_FLAT, INDEX_IVF_FLAT, INDEX_HNSW, INDEX_IVF_PQ, INDEX_AUTO)
+
+FAISS_INDEX_TYPE = os.getenv("FAISS_INDEX_TYPE", INDEX_AUTO)
+# auto policy: exact scan below the IVF threshold, IVF-PQ above the PQ threshold
+AUTO_IVF_THRESHOLD = int(os.getenv("FAISS_AUTO_IVF_THRESHOLD", "20000"))
+AUTO_PQ_THRESHOLD = int(os.getenv("FAISS_AUTO_PQ_THRESHOLD", "500000"))
+FAISS_NPROBE = int(os.getenv("FAISS_NPROBE", "16"))
+FAISS_HNSW_M = int(os.getenv("FAISS_HNSW_M", "32"))
+FAISS_HNSW_EF_SEARCH = int(os.getenv("FAISS_HNSW_EF_SEARCH", "64"))
+
+
+def choose_index_type(ntotal: int, index_type: str = FAISS_INDEX_TYPE) -> str:
+    """Resolves "auto" to a concrete index type for a corpus of ntotal vectors."""
+    if index_type != INDEX_AUTO:
+        return index_type
+    if ntotal < AUTO_IVF_THRESHOLD:
+        return INDEX_FLAT
+    if ntotal < AUTO_PQ_THRESHOLD:
+        return INDEX_IVF_FLAT
+    return INDEX_IVF_PQ
+
+
+def current_index_type(index) -> str:
+    if isinstance(index, faiss.IndexHNSWFlat):
+        return INDEX_HNSW
+    if isinstance(index, faiss.IndexIVFPQ):
+        return INDEX_IVF_PQ
+    if isinstance(index, faiss.IndexIVFFlat):
+        return INDEX_IVF_FLAT
+    return INDEX_FLAT
+
+
+def _nlist(ntotal: int) -> int:
+    # ~4*sqrt(n) lists, while keeping >= 39 training points per centroid
+    return max(1, min(int(4 * math.sqrt(ntotal)), ntotal // 39 or 1))
+
+
+def _pq_subquantizers(dim: int) -> int:
+    # Largest m that divides dim while keeping >= 4 dimensions per sub-quantizer
+    for m in (64, 48, 32, 24, 16, 8, 4, 2):
+        if dim % m == 0 and dim // m >= 4:
+            return m
+    return 1
+
+
+def create_index(dim: int, index_type: str, training_vectors: Optional[np.ndarray] = None):
+    """Creates (and trains, when the type needs it) an empty index of the given type."""
+    if index_type == INDEX_FLAT:
+        return faiss.IndexFlatL2(dim)
+
+    if index_type == INDEX_HNSW:
+        index = faiss.IndexHNSWFlat(dim, FAISS_HNSW_M)
+        index.hnsw.efSearch = FAISS_HNSW_EF_SEARCH
+        return index
+
+    if index_type not in (INDEX_IVF_FLAT, INDEX_IVF_PQ):
+        raise ValueError(f"Unknown FAISS index type '{index_type}'. Expected one of {INDEX_TYPES}")
+    if training_vectors is None or len(training_vectors) == 0:
+        raise ValueError(f"Index type '{index_type}' needs training vectors")
+
+    nlist = _nlist(len(training_vectors))
+    quantizer = faiss.IndexFlatL2(dim)
+    if index_type == INDEX_IVF_FLAT:
+        index = faiss.IndexIVFFlat(quantizer, dim, nlist)
+    else:
+        nbits = 8 if len(training_vectors) >= 256 * 39 else 4
+        index = faiss.IndexIVFPQ(quantizer, dim, nlist, _pq_subquantizers(dim), nbits)
+    index.train(training_vectors)
+    index.nprobe = min(FAISS_NPROBE, nlist)
+    return index
+
+
+def reconstruct_vectors(index) -> np.ndarray:
+    """All stored vectors in insertion order (exact for Flat/HNSW/IVF-Flat, decoded for IVF-PQ)."""
+    if isinstance(index, faiss.IndexIVF):
+        index.make_direct_map()
+    return index.reconstruct_n(0, index.ntotal)
+
+
+def build_index(vectors: np.ndarray, index_type: str):
+    index = create_index(vectors.shape[1], index_type, vectors)
+    index.add(vectors)
+    return index
+
+
+def rebuild_vectorstore(vectorstore, index_type: str):
+    """
+    Returns a new store with the same docstore and ids but a freshly trained index of
+    `index_type`. Positions are preserved because vectors are re-added in order.
+    """
+    start = time.perf_counter()
+    vectors = reconstruct_vectors(vectorstore.index)
+    index = build_index(vectors, index_type)
+    logger.info(f"Rebuilt index as {index_type} ({index.ntotal} vectors) in {time.perf_counter() - start:.2f}s")
+
+    return FAISS(
+        embedding_function=vectorstore.embedding_function,
+        index=index,
+        docstore=vectorstore.docstore,
+        index_to_docstore_id=dict(vectorstore.index_to_docstore_id),
+    )
+
+
+def ensure_index_type(vectorstore, index_type: str = FAISS_INDEX_TYPE):
+    """Converts the store to the configured (or auto-selected) index type if it isn't already."""
+    ntotal = vectorstore.index.ntotal
+    target = choose_index_type(ntotal, index_type)
+    if ntotal == 0 or current_index_type(vectorstore.index) == target:
+        return vectorstore
+    logger.info(f"Index type policy: {ntotal} vectors -> {target}")
+    return rebuild_vectorstore(vectorstore, target)
+
 
 def build_faiss_index(chunks, embedder):
     docs = []
@@ -10,11 +152,8 @@ def build_faiss_index(chunks, embedder):
         docs.append(
             Document(
                 page_content=chunk["content"],
-                metadata={
-                    "page_no": chunk["page_no"],
-                    "has_table": chunk["has_table"]
-                }
+                metadata={k: v for k, v in chunk.items() if k != "content"}
             )
         )
 
-    return FAISS.from_documents(docs, embedder)
\ No newline at end of file
+    return ensure_index_type(FAISS.from_documents(docs, embedder))
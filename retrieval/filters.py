@@ -0,0 +1,133 @@
+"""
+Metadata Filters
+----------------
+Precomputed per-position metadata arrays (page_no, has_table, section) for a
+document index, turned into FAISS ID selectors so filtering happens inside the
+search itself. "Top-k table chunks" or "top-k from pages 120-180" then returns
+k matches without over-fetching and post-filtering.
+
+Filters are plain dicts:
+    {"has_table": True}
+    {"page_range": (120, 180)}          # inclusive
+    {"section": "balance_sheet"}        # or a list of sections, see ingestion.metadata.SECTIONS
+
+The arrays are saved as metadata.npz next to the FAISS index when a document
+is finalized; indexes built before that get them computed on load.
+"""
+import os
+from typing import Dict, List, Optional
+
+import faiss
+import numpy as np
+
+from ingestion.metadata import SECTION_OTHER
+
+METADATA_FILE = "metadata.npz"
+
+
+def filter_key(filters: Optional[Dict]) -> tuple:
+    """Hashable form of a filter dict (for cache keys)."""
+    if not filters:
+        return ()
+    return tuple(sorted((k, tuple(v) if isinstance(v, (list, tuple)) else v) for k, v in filters.items()))
+
+
+class MetadataIndex:
+    def __init__(self, page_no: np.ndarray, has_table: np.ndarray, section_codes: np.ndarray, sections: List[str]):
+        self.page_no = page_no
+        self.has_table = has_table
+        self.section_codes = section_codes
+        self.sections = sections
+        # Bitmaps of common predicates, computed once per index
+        self._masks: Dict[tuple, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.page_no)
+
+    @classmethod
+    def build(cls, metadatas: List[Dict]) -> "MetadataIndex":
+        sections = sorted({m.get("section") or SECTION_OTHER for m in metadatas} | {SECTION_OTHER})
+        codes = {name: i for i, name in enumerate(sections)}
+        return cls(
+            np.array([m.get("page_no") or 0 for m in metadatas], dtype=np.int32),
+            np.array([bool(m.get("has_table")) for m in metadatas], dtype=bool),
+            np.array([codes[m.get("section") or SECTION_OTHER] for m in metadatas], dtype=np.int16),
+            sections,
+        )
+
+    @classmethod
+    def from_vectorstore(cls, vectorstore) -> "MetadataIndex":
+        """Builds the arrays from a FAISS store's docstore, in FAISS position order."""
+        metadatas = []
+        for position in range(vectorstore.index.ntotal):
+            doc = vectorstore.docstore.search(vectorstore.index_to_docstore_id[position])
+            metadatas.append(doc.metadata)
+        return cls.build(metadatas)
+
+    def mask(self, filters: Dict) -> np.ndarray:
+        """Boolean array over index positions matching every predicate in `filters`."""
+        key = filter_key(filters)
+        cached = self._masks.get(key)
+        if cached is not None:
+            return cached
+
+        mask = np.ones(len(self), dtype=bool)
+        if filters.get("has_table") is not None:
+            mask &= self.has_table == bool(filters["has_table"])
+        if filters.get("page_range") is not None:
+            first, last = filters["page_range"]
+            mask &= (self.page_no >= first) & (self.page_no <= last)
+        if filters.get("section") is not None:
+            wanted = filters["section"]
+            wanted = [wanted] if isinstance(wanted, str) else list(wanted)
+            codes = [self.sections.index(name) for name in wanted if name in self.sections]
+            mask &= np.isin(self.section_codes, codes)
+
+        unknown = set(filters) - {"has_table", "page_range", "section"}
+        if unknown:
+            raise ValueError(f"Unknown filter keys: {sorted(unknown)}")
+
+        self._masks[key] = mask
+        return mask
+
+    def search_params(self, index, filters: Dict):
+        """
+        SearchParameters restricting `index.search` to the matching positions, or None
+        when nothing matches. Keeps the index's own nprobe / efSearch settings.
+        """
+        mask = self.mask(filters)
+        count = int(mask.sum())
+        if count == 0:
+            return None
+
+        bitmap = np.packbits(mask, bitorder="little")
+        selector = faiss.IDSelectorBitmap(len(mask), faiss.swig_ptr(bitmap))
+        if isinstance(index, faiss.IndexIVF):
+            params = faiss.SearchParametersIVF(sel=selector, nprobe=index.nprobe)
+        elif isinstance(index, faiss.IndexHNSW):
+            params = faiss.SearchParametersHNSW(sel=selector, efSearch=index.hnsw.efSearch)
+        else:
+            params = faiss.SearchParameters(sel=selector)
+        # The selector only holds raw pointers: keep the bitmap alive with the params
+        params.bitmap = bitmap
+        params.selector = selector
+        params.count = count
+        return params
+
+    def save(self, folder: str):
+        os.makedirs(folder, exist_ok=True)
+        np.savez(
+            os.path.join(folder, METADATA_FILE),
+            page_no=self.page_no,
+            has_table=self.has_table,
+            section_codes=self.section_codes,
+            sections=np.array(self.sections, dtype=str),
+        )
+
+    @classmethod
+    def load(cls, folder: str) -> Optional["MetadataIndex"]:
+        path = os.path.join(folder, METADATA_FILE)
+        if not os.path.exists(path):
+            return None
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data["page_no"], data["has_table"], data["section_codes"], data["sections"].tolist())
@@ -0,0 +1,183 @@
+"""
+Memory-mapped Index Storage
+---------------------------
+On-disk format for the document indexes that opens in constant time instead of
+reading the whole FAISS index into RAM and unpickling a LangChain docstore.
+
+    index.faiss             FAISS index, opened with the mmap IO flags
+    docstore.jsonl          one JSON record (id, page_content, metadata) per vector, in index order
+    docstore.offsets.npy    int64 byte offset of every record (n + 1 entries)
+    docstore.ids.npy        docstore id of every position
+    docstore.id_order.npy   positions sorted by id, for id -> position binary search
+
+Everything is mapped read-only, so the OS page cache is shared between worker
+processes and only the pages a query touches are ever read. Records are parsed
+on access. Every file is written to a temp name and renamed into place; readers
+that still map the old files keep a valid inode.
+
+Indexes saved by older versions (index.faiss + index.pkl) are still loaded
+through FAISS.load_local.
+"""
+import os
+import json
+import mmap
+import logging
+from collections.abc import Mapping
+from typing import Union
+
+import faiss
+import numpy as np
+from langchain_community.docstore.base import Docstore
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = "index.faiss"
+DOCSTORE_FILE = "docstore.jsonl"
+OFFSETS_FILE = "docstore.offsets.npy"
+IDS_FILE = "docstore.ids.npy"
+ID_ORDER_FILE = "docstore.id_order.npy"
+
+# Flat codes (IO_FLAG_MMAP_IFC, faiss >= 1.8; 0 where missing) and IVF inverted lists
+# (IO_FLAG_MMAP) are mapped instead of copied into RAM
+MMAP_IO_FLAGS = getattr(faiss, "IO_FLAG_MMAP_IFC", 0) | faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+# IVF indexes reject IO_FLAG_MMAP_IFC combined with IO_FLAG_MMAP; their inverted lists are still mapped
+IVF_MMAP_IO_FLAGS = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+
+
+def is_mmap_store(folder: str) -> bool:
+    return os.path.exists(os.path.join(folder, OFFSETS_FILE))
+
+
+class PositionalIds(Mapping):
+    """Read-only index position -> docstore id mapping backed by a memory-mapped array."""
+
+    def __init__(self, ids: np.ndarray):
+        self._ids = ids
+
+    def __getitem__(self, position: int) -> str:
+        if not 0 <= position < len(self._ids):
+            raise KeyError(position)
+        return self._ids[position].decode("utf-8")
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __iter__(self):
+        return iter(range(len(self._ids)))
+
+
+class LazyDocstore(Docstore):
+    """Read-only docstore that parses a record only when it is looked up."""
+
+    def __init__(self, folder: str):
+        path = os.path.join(folder, DOCSTORE_FILE)
+        self._file = open(path, "rb")
+        size = os.path.getsize(path)
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        self.nbytes = size
+        self._offsets = np.load(os.path.join(folder, OFFSETS_FILE), mmap_mode="r")
+        self._ids = np.load(os.path.join(folder, IDS_FILE), mmap_mode="r")
+        self._id_order = np.load(os.path.join(folder, ID_ORDER_FILE), mmap_mode="r")
+        self.index_to_docstore_id = PositionalIds(self._ids)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def document_at(self, position: int) -> Document:
+        record = json.loads(self._data[self._offsets[position]:self._offsets[position + 1]])
+        return Document(page_content=record["page_content"], metadata=record["metadata"])
+
+    def _position(self, doc_id: str) -> int:
+        # Binary search over the id-sorted permutation (no id -> position dict in memory)
+        key = doc_id.encode("utf-8")
+        lo, hi = 0, len(self._id_order)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._ids[self._id_order[mid]] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(self._id_order) and self._ids[self._id_order[lo]] == key:
+            return int(self._id_order[lo])
+        return -1
+
+    def search(self, search: str) -> Union[str, Document]:
+        position = self._position(search)
+        if position < 0:
+            return f"ID {search} not found."
+        return self.document_at(position)
+
+    def to_memory(self) -> InMemoryDocstore:
+        return InMemoryDocstore({self.index_to_docstore_id[i]: self.document_at(i) for i in range(len(self))})
+
+
+def _replace_file(path: str, write):
+    tmp_path = path + ".tmp"
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _save_array(path: str, array: np.ndarray):
+    def write(tmp_path):
+        with open(tmp_path, "wb") as f:
+            np.save(f, array)
+    _replace_file(path, write)
+
+
+def save_store(vectorstore, folder: str):
+    """Writes a FAISS vector store in the memory-mappable format."""
+    os.makedirs(folder, exist_ok=True)
+    ntotal = vectorstore.index.ntotal
+    ids = [vectorstore.index_to_docstore_id[i] for i in range(ntotal)]
+
+    offsets = np.zeros(ntotal + 1, dtype=np.int64)
+
+    def write_records(tmp_path):
+        with open(tmp_path, "wb") as f:
+            for i, doc_id in enumerate(ids):
+                doc = vectorstore.docstore.search(doc_id)
+                record = {"id": doc_id, "page_content": doc.page_content, "metadata": doc.metadata}
+                f.write(json.dumps(record, ensure_ascii=False, default=str).encode("utf-8") + b"\n")
+                offsets[i + 1] = f.tell()
+
+    _replace_file(os.path.join(folder, DOCSTORE_FILE), write_records)
+    id_array = np.array([doc_id.encode("utf-8") for doc_id in ids], dtype=bytes) if ids else np.array([], dtype="S1")
+    _save_array(os.path.join(folder, OFFSETS_FILE), offsets)
+    _save_array(os.path.join(folder, IDS_FILE), id_array)
+    _save_array(os.path.join(folder, ID_ORDER_FILE), np.argsort(id_array, kind="stable").astype(np.int64))
+    # Index last: its presence marks the folder as loadable
+    _replace_file(os.path.join(folder, INDEX_FILE), lambda tmp_path: faiss.write_index(vectorstore.index, tmp_path))
+
+
+def _read_index_mapped(path: str):
+    try:
+        return faiss.read_index(path, MMAP_IO_FLAGS)
+    except RuntimeError:
+        # IVF-Flat / IVF-PQ: map the inverted lists only
+        return faiss.read_index(path, IVF_MMAP_IO_FLAGS)
+
+
+def load_store(folder: str, embedding_function, writable: bool = False):
+    """
+    Opens a store saved by `save_store`. Read-only stores are memory-mapped and open
+    in constant time; `writable=True` loads everything into memory so it can be appended to.
+    """
+    docstore = LazyDocstore(folder)
+    if not writable:
+        index = _read_index_mapped(os.path.join(folder, INDEX_FILE))
+        return FAISS(
+            embedding_function=embedding_function,
+            index=index,
+            docstore=docstore,
+            index_to_docstore_id=docstore.index_to_docstore_id,
+        )
+
+    return FAISS(
+        embedding_function=embedding_function,
+        index=faiss.read_index(os.path.join(folder, INDEX_FILE)),
+        docstore=docstore.to_memory(),
+        index_to_docstore_id=dict(docstore.index_to_docstore_id),
+    )
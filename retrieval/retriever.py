@@ -1,3 +1,23 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from ingestion.embedding_cache import CachedEmbeddings
+from retrieval.cache import normalize_query, query_embedding_cache, retrieval_result_cache
+from retrieval.filters import MetadataIndex, filter_key
+from retrieval.scoring import HYBRID_DENSE_WEIGHT, fuse_hybrid
+
+
+def _chunk_from_doc(doc, **extra) -> Dict:
+    return {
+        **doc.metadata,
+        "content": doc.page_content,
+        "page_no": doc.metadata["page_no"],
+        "has_table": doc.metadata["has_table"],
+        **extra
+    }
+
+
 def retrieve_chunks(vectorstore, query: str, k: int = 15):
     """
     Retrieve top-k relevant chunks for a query.
@@ -5,11 +25,117 @@ def retrieve_chunks(vectorstore, query: str, k: int = 15):
     """
     results = vectorstore.similarity_search(query, k=k)
 
+    return [_chunk_from_doc(doc) for doc in results]
+
+
+def _embed_queries(vectorstore, queries: List[str]) -> np.ndarray:
+    """Embeds queries in one request, skipping any whose embedding is already in the query cache."""
+    embedder = vectorstore.embedding_function
+    model = getattr(embedder, "model", embedder.__class__.__name__)
+    keys = [(model, normalize_query(q)) for q in queries]
+
+    cached = [query_embedding_cache.get(key) for key in keys]
+    missing = [i for i, vector in enumerate(cached) if vector is None]
+    if missing:
+        # Past the persistent chunk-embedding cache: questions live in the in-process TTL cache only
+        base = embedder.base if isinstance(embedder, CachedEmbeddings) else embedder
+        fresh = base.embed_documents([queries[i] for i in missing])
+        for i, vector in zip(missing, fresh):
+            cached[i] = vector
+            query_embedding_cache.put(keys[i], vector)
+
+    vectors = np.asarray(cached, dtype=np.float32)
+    if getattr(vectorstore, "_normalize_L2", False):
+        import faiss
+        faiss.normalize_L2(vectors)
+    return vectors
+
+
+def embed_query(vectorstore, query: str) -> np.ndarray:
+    """The query's vector in the index's embedding space (shares the query embedding cache)."""
+    return _embed_queries(vectorstore, [query])[0]
+
+
+def _chunk_at(vectorstore, position: int, **extra) -> Dict:
+    chunk_id = vectorstore.index_to_docstore_id[position]
+    if hasattr(vectorstore.docstore, "document_at"):
+        # Memory-mapped docstore: read the record by position, no id lookup
+        return _chunk_from_doc(vectorstore.docstore.document_at(position), chunk_id=chunk_id, **extra)
+    return _chunk_from_doc(vectorstore.docstore.search(chunk_id), chunk_id=chunk_id, **extra)
+
+
+def retrieve_chunks_batch(vectorstore, queries: List[str], k: int = 6, lexical_index=None,
+                          dense_weight: float = HYBRID_DENSE_WEIGHT, index_version=None,
+                          filters: Optional[Dict] = None, metadata_index=None) -> List[List[Dict]]:
+    """
+    Retrieve top-k chunks for several queries at once: all queries are embedded in a
+    single embedding request and searched with one FAISS call over the query matrix.
+    Returns one ranked list per query (chunks carry `chunk_id` and L2 `distance`).
+
+    With a BM25 `lexical_index` (retrieval.scoring.BM25Index) each query is also scored
+    lexically and both candidate sets are fused with `dense_weight` (chunks get `hybrid_score`).
+
+    When `index_version` (the registry snapshot version) is given, per-query results are
+    cached under it, so a re-published index never serves stale hits.
+
+    `filters` (see retrieval.filters) restrict the search to matching chunks inside FAISS
+    via an ID selector built from `metadata_index`, so each query still gets up to k hits.
+    """
+    if not queries:
+        return []
+
+    def result_key(query):
+        return (index_version, normalize_query(query), k, lexical_index is not None, dense_weight,
+                filter_key(filters))
+
+    results = [None] * len(queries)
+    if index_version is not None:
+        for i, query in enumerate(queries):
+            hit = retrieval_result_cache.get(result_key(query))
+            if hit is not None:
+                # Copies: callers trim chunk content in place
+                results[i] = [dict(chunk) for chunk in hit]
+
+    pending = [i for i, ranked in enumerate(results) if ranked is None]
+    if not pending:
+        return results
+
+    params, mask = None, None
+    if filters:
+        if metadata_index is None:
+            metadata_index = MetadataIndex.from_vectorstore(vectorstore)
+        params = metadata_index.search_params(vectorstore.index, filters)
+        if params is None:
+            # Nothing in this document matches the filters
+            for i in pending:
+                results[i] = []
+            return results
+        mask = metadata_index.mask(filters)
+
+    fetch_k = k * 4 if lexical_index is not None else k
+    pending_queries = [queries[i] for i in pending]
+    distances, positions = vectorstore.index.search(_embed_queries(vectorstore, pending_queries), fetch_k,
+                                                    params=params)
+
+    for i, query, row_distances, row_positions in zip(pending, pending_queries, distances, positions):
+        results[i] = _rank_query(vectorstore, query, row_distances, row_positions, k, fetch_k,
+                                 lexical_index, dense_weight, mask)
+        if index_version is not None:
+            retrieval_result_cache.put(result_key(query), [dict(chunk) for chunk in results[i]])
+    return results
+
+
+def _rank_query(vectorstore, query, row_distances, row_positions, k, fetch_k, lexical_index, dense_weight,
+                mask=None):
+    # position == -1: fewer than fetch_k vectors in the index
+    dense = [(int(p), float(d)) for p, d in zip(row_positions, row_distances) if p != -1]
+
+    if lexical_index is None:
+        return [_chunk_at(vectorstore, p, distance=d) for p, d in dense[:k]]
+
+    dense_distance = dict(dense)
+    fused = fuse_hybrid(dense, lexical_index.search(query, fetch_k, mask), dense_weight)[:k]
     return [
-        {
-            "content": doc.page_content,
-            "page_no": doc.metadata["page_no"],
-            "has_table": doc.metadata["has_table"]
-        }
-        for doc in results
+        _chunk_at(vectorstore, p, hybrid_score=round(s, 4), distance=dense_distance.get(p))
+        for p, s in fused
     ]
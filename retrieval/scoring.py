@@ -0,0 +1,198 @@
+"""
+Retrieval Scoring
+-----------------
+Rank fusion helpers for combining several ranked result lists into one, and the
+BM25 lexical index used next to FAISS for hybrid retrieval (exact line items such
+as "Finance costs", specific figures and note references that dense-only
+retrieval tends to miss).
+"""
+import os
+import re
+import math
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+RRF_K = 60
+
+
+def reciprocal_rank_fusion(ranked_lists: List[List[Dict]], key: Callable[[Dict], str] = lambda c: c["chunk_id"],
+                           k: int = RRF_K) -> List[Dict]:
+    """
+    Fuses ranked lists with reciprocal-rank fusion: score(d) = sum over lists of 1 / (k + rank).
+    Chunks found by several sub-questions, or ranked high by any of them, float to the top.
+    """
+    scores: Dict[str, float] = {}
+    items: Dict[str, Dict] = {}
+
+    for ranked in ranked_lists:
+        for rank, item in enumerate(ranked, start=1):
+            item_key = key(item)
+            scores[item_key] = scores.get(item_key, 0.0) + 1.0 / (k + rank)
+            items.setdefault(item_key, item)
+
+    fused = sorted(items, key=lambda item_key: scores[item_key], reverse=True)
+    return [{**items[item_key], "fusion_score": round(scores[item_key], 6)} for item_key in fused]
+
+
+# ---------------------------------------------------------------------------
+# Lexical (BM25) index
+# ---------------------------------------------------------------------------
+
+BM25_FILE = "bm25.npz"
+BM25_K1 = float(os.getenv("BM25_K1", "1.2"))
+BM25_B = float(os.getenv("BM25_B", "0.75"))
+# Weight of the dense score in hybrid fusion (1 - weight goes to BM25)
+HYBRID_DENSE_WEIGHT = float(os.getenv("HYBRID_DENSE_WEIGHT", "0.6"))
+
+TOKEN_PATTERN = re.compile(r"[a-z]+|\d+(?:[.,]\d+)*")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were will with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased words and numbers; thousands separators are dropped so '1,234' matches '1234'."""
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if token[0].isdigit():
+            token = token.replace(",", "")
+        elif token in STOPWORDS:
+            continue
+        tokens.append(token)
+    return tokens
+
+
+class BM25Index:
+    """
+    Inverted index with precomputed BM25 term weights stored as CSR arrays.
+    Position i is the i-th vector of the companion FAISS index, so lexical and dense
+    hits share ids. A query is a handful of array slices and one scatter-add.
+    """
+
+    def __init__(self, terms: List[str], offsets: np.ndarray, postings: np.ndarray, weights: np.ndarray,
+                 doc_ids: List[str]):
+        self.vocab = {term: i for i, term in enumerate(terms)}
+        self.offsets = offsets
+        self.postings = postings
+        self.weights = weights
+        self.doc_ids = doc_ids
+
+    @classmethod
+    def build(cls, texts: List[str], doc_ids: List[str], k1: float = BM25_K1, b: float = BM25_B) -> "BM25Index":
+        term_docs: Dict[str, Dict[int, int]] = {}
+        doc_lengths = np.zeros(len(texts), dtype=np.float32)
+        for position, text in enumerate(texts):
+            tokens = tokenize(text)
+            doc_lengths[position] = len(tokens)
+            for token in tokens:
+                counts = term_docs.setdefault(token, {})
+                counts[position] = counts.get(position, 0) + 1
+
+        n_docs = max(len(texts), 1)
+        avgdl = float(doc_lengths.mean()) if len(texts) else 1.0
+        terms = sorted(term_docs)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        postings, weights = [], []
+        for i, term in enumerate(terms):
+            docs = term_docs[term]
+            idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            positions = np.fromiter(docs.keys(), dtype=np.int32, count=len(docs))
+            tf = np.fromiter(docs.values(), dtype=np.float32, count=len(docs))
+            norm = k1 * (1 - b + b * doc_lengths[positions] / (avgdl or 1.0))
+            postings.append(positions)
+            weights.append((idf * tf * (k1 + 1) / (tf + norm)).astype(np.float32))
+            offsets[i + 1] = offsets[i] + len(docs)
+
+        return cls(
+            terms,
+            offsets,
+            np.concatenate(postings) if postings else np.zeros(0, dtype=np.int32),
+            np.concatenate(weights) if weights else np.zeros(0, dtype=np.float32),
+            list(doc_ids),
+        )
+
+    @classmethod
+    def from_vectorstore(cls, vectorstore) -> "BM25Index":
+        """Builds the lexical index over a FAISS store's chunks, in FAISS position order."""
+        doc_ids = [vectorstore.index_to_docstore_id[i] for i in range(vectorstore.index.ntotal)]
+        texts = [vectorstore.docstore.search(doc_id).page_content for doc_id in doc_ids]
+        return cls.build(texts, doc_ids)
+
+    def search(self, query: str, k: int, mask: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """Top-k (faiss position, bm25 score) pairs, best first; `mask` restricts the candidate positions."""
+        scores = np.zeros(len(self.doc_ids), dtype=np.float32)
+        matched = False
+        for token in set(tokenize(query)):
+            i = self.vocab.get(token)
+            if i is None:
+                continue
+            start, end = self.offsets[i], self.offsets[i + 1]
+            np.add.at(scores, self.postings[start:end], self.weights[start:end])
+            matched = True
+        if not matched:
+            return []
+        if mask is not None:
+            scores[~mask] = 0
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(p), float(scores[p])) for p in top if scores[p] > 0]
+
+    def save(self, folder: str):
+        os.makedirs(folder, exist_ok=True)
+        terms = sorted(self.vocab, key=self.vocab.get)
+        np.savez(
+            os.path.join(folder, BM25_FILE),
+            terms=np.array(terms, dtype=str),
+            offsets=self.offsets,
+            postings=self.postings,
+            weights=self.weights,
+            doc_ids=np.array(self.doc_ids, dtype=str),
+        )
+
+    @classmethod
+    def load(cls, folder: str) -> Optional["BM25Index"]:
+        path = os.path.join(folder, BM25_FILE)
+        if not os.path.exists(path):
+            return None
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                data["terms"].tolist(),
+                data["offsets"],
+                data["postings"],
+                data["weights"],
+                data["doc_ids"].tolist(),
+            )
+
+
+def _scaled(values: Dict[int, float]) -> Dict[int, float]:
+    """BM25 scores as a fraction of the query's best hit, so every hit keeps some credit."""
+    if not values:
+        return {}
+    high = max(values.values()) or 1.0
+    return {key: value / high for key, value in values.items()}
+
+
+def _cosine(distances: Dict[int, float]) -> Dict[int, float]:
+    """Cosine similarity from squared L2 distances between unit vectors, clipped to [0, 1]."""
+    return {key: min(1.0, max(0.0, 1.0 - distance / 2.0)) for key, distance in distances.items()}
+
+
+def fuse_hybrid(dense: List[Tuple[int, float]], lexical: List[Tuple[int, float]],
+                dense_weight: float = HYBRID_DENSE_WEIGHT) -> List[Tuple[int, float]]:
+    """
+    Weighted score fusion of dense hits (position, L2 distance) and BM25 hits (position, score).
+    Dense distances become cosine similarities and BM25 scores are divided by the best one,
+    both anchored at 0, so the weakest hit on either side still counts. A side that did not
+    return a position contributes 0 for it.
+    """
+    dense_scores = _cosine(dict(dense))
+    lexical_scores = _scaled(dict(lexical))
+    fused = {
+        position: dense_weight * dense_scores.get(position, 0.0)
+        + (1 - dense_weight) * lexical_scores.get(position, 0.0)
+        for position in set(dense_scores) | set(lexical_scores)
+    }
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,114 @@
+"""
+Offline unit tests, run with `python -m pytest -q` from the project root.
+
+They use the local hashed n-gram embedding backend, so nothing here needs an API
+key or network access. The older test_*.py scripts in this folder are manual
+integration runs against real documents and the remote APIs; run them directly.
+"""
+import os
+import sys
+from types import SimpleNamespace
+
+os.environ.setdefault("EMBEDDING_BACKEND", "local")
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pytest
+
+collect_ignore = ["test_apis.py", "test_full_pipeline.py", "test_phase1.py", "test_phase2.py"]
+
+
+SECTIONS = ["balance_sheet", "profit_and_loss", "cash_flow", "notes"]
+TOPICS = ["total borrowings", "revenue from operations", "cash and cash equivalents", "finance costs",
+          "trade receivables", "deferred tax", "employee benefits", "share capital"]
+
+
+def sample_chunks(count=200):
+    """Deterministic chunk dicts spread over pages, sections and table/non-table chunks."""
+    return [
+        {
+            "content": f"{TOPICS[i % len(TOPICS)]} for year {2000 + i} amounted to {i * 37:,} crore "
+                       f"as reported in note {i} of the {SECTIONS[i % len(SECTIONS)].replace('_', ' ')}",
+            "page_no": i // 4 + 1,
+            "has_table": i % 3 == 0,
+            "section": SECTIONS[i % len(SECTIONS)],
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def make_vectorstore():
+    """Builds a small in-memory FAISS store from chunk dicts (content, page_no, has_table, ...)."""
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+    from langchain_community.vectorstores import FAISS
+    import faiss
+
+    from ingestion.local_embeddings import HashedNgramEmbeddings
+
+    def build(chunks, dim=64):
+        embedder = HashedNgramEmbeddings(dim)
+        vectorstore = FAISS(embedding_function=embedder, index=faiss.IndexFlatL2(dim),
+                            docstore=InMemoryDocstore(), index_to_docstore_id={})
+        if chunks:
+            texts = [c["content"] for c in chunks]
+            metadatas = [{k: v for k, v in c.items() if k != "content"} for c in chunks]
+            vectorstore.add_texts(texts, metadatas=metadatas, ids=[f"c{i}" for i in range(len(chunks))])
+        return vectorstore
+
+    return build
+
+
+def _completion(content):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+class StubLLM:
+    """
+    Stands in for the sync and async OpenAI clients: decomposition prompts get `sub_questions`
+    as bullets (none means the query is used as is), everything else gets `answer_tokens`.
+    """
+
+    def __init__(self):
+        self.sub_questions = []
+        self.answer_tokens = ["Total borrowings ", "were ", "1,234 ", "crore."]
+        self.prompts = []
+
+    def _reply(self, messages):
+        prompt = messages[-1]["content"]
+        self.prompts.append(prompt)
+        if "Break the following question" in prompt:
+            return "\n".join(f"- {question}" for question in self.sub_questions)
+        return None
+
+    def create(self, model, messages, temperature=None, stream=False):
+        reply = self._reply(messages)
+        return _completion("".join(self.answer_tokens) if reply is None else reply)
+
+    async def acreate(self, model, messages, temperature=None, stream=False):
+        reply = self._reply(messages)
+        if stream:
+            return self._astream(self.answer_tokens if reply is None else [reply])
+        return _completion("".join(self.answer_tokens) if reply is None else reply)
+
+    @staticmethod
+    async def _astream(tokens):
+        for token in tokens:
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=token))])
+
+
+@pytest.fixture
+def stub_llm(monkeypatch, tmp_path):
+    """Routes the decomposer and summarizer to a StubLLM, with an empty decomposition cache."""
+    import agents.decomposer_agent as decomposer_agent
+    import agents.summarizer_agent as summarizer_agent
+    from agents.decomposition_cache import DecompositionCache
+
+    llm = StubLLM()
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=llm.create)))
+    async_client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=llm.acreate)))
+    for module in (decomposer_agent, summarizer_agent):
+        monkeypatch.setattr(module, "get_client", lambda: client)
+        monkeypatch.setattr(module, "get_async_client", lambda: async_client)
+    monkeypatch.setattr(decomposer_agent, "decomposition_cache",
+                        DecompositionCache(str(tmp_path / "decompositions.json"), flush_delay=60))
+    return llm
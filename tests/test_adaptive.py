@@ -0,0 +1,72 @@
+from agents.retriever_agent import retrieve_content
+from agents.summarizer_agent import build_prompt
+from retrieval.adaptive import adaptive_cutoff, estimate_tokens, fit_token_budget
+from tests.conftest import sample_chunks
+
+
+def dense(*similarities):
+    return [{"chunk_id": f"c{i}", "distance": 2 * (1 - s), "content": "x"} for i, s in enumerate(similarities)]
+
+
+def hybrid(*pairs):
+    return [
+        {"chunk_id": f"c{i}", "hybrid_score": h, "distance": None if s is None else 2 * (1 - s), "content": "x"}
+        for i, (h, s) in enumerate(pairs)
+    ]
+
+
+def ids(chunks):
+    return [c["chunk_id"] for c in chunks]
+
+
+def test_floor_drops_weak_candidates():
+    kept = adaptive_cutoff(dense(0.8, 0.75, 0.7, 0.1, 0.05), gap_ratio=1.0)
+    assert ids(kept) == ["c0", "c1", "c2"]
+    assert kept[0]["score"] == 0.8
+
+
+def test_elbow_cuts_at_widest_gap():
+    kept = adaptive_cutoff(dense(0.9, 0.88, 0.86, 0.5, 0.48, 0.47))
+    assert ids(kept) == ["c0", "c1", "c2"]
+
+
+def test_min_k_survives_floor_and_elbow():
+    assert ids(adaptive_cutoff(dense(0.1, 0.05, 0.01), min_k=2)) == ["c0", "c1"]
+    assert ids(adaptive_cutoff(dense(0.9, 0.2, 0.19), min_k=2)) == ["c0", "c1"]
+
+
+def test_hybrid_applies_floor_to_dense_similarity():
+    ranked = hybrid((1.0, 0.8), (0.9, 0.7), (0.8, 0.05), (0.7, None), (0.6, 0.1), (0.5, 0.6))
+    kept = adaptive_cutoff(ranked, gap_ratio=1.0)
+    # c2 and c4 are weak dense neighbours; c3 is a lexical-only hit and has no similarity to judge
+    assert ids(kept) == ["c0", "c1", "c3", "c5"]
+    assert kept[0]["score"] == 1.0
+
+
+def test_hybrid_floor_keeps_min_k():
+    ranked = hybrid((1.0, 0.05), (0.9, 0.01), (0.8, 0.02))
+    assert ids(adaptive_cutoff(ranked, min_k=2)) == ["c0", "c1"]
+
+
+def test_empty():
+    assert adaptive_cutoff([]) == []
+    assert fit_token_budget([]) == []
+
+
+def test_fit_token_budget_takes_prefix():
+    chunks = [{"content": "a" * 400}, {"content": "b" * 400}, {"content": "c" * 400}, {"content": "d" * 4}]
+    assert estimate_tokens(chunks[0]["content"]) == 100
+    assert fit_token_budget(chunks, budget=250) == chunks[:2]
+    # The first chunk is always kept, even over budget
+    assert fit_token_budget(chunks, budget=10) == chunks[:1]
+
+
+def test_prompt_carries_every_selected_chunk(make_vectorstore):
+    vectorstore = make_vectorstore(sample_chunks())
+    questions = ["total borrowings", "revenue from operations", "cash and cash equivalents", "finance costs"]
+    chunks = retrieve_content(questions, vectorstore, mode="adaptive")
+    assert len(chunks) > 6
+    prompt = build_prompt("question", {}, {}, chunks, mode="adaptive")
+    assert all(chunk["content"] in prompt for chunk in chunks)
+    # Fixed mode keeps its cap of 6
+    assert sum(chunk["content"] in build_prompt("question", {}, {}, chunks, mode="fixed") for chunk in chunks) == 6
@@ -0,0 +1,52 @@
+import numpy as np
+
+from app.api.core.answer_cache import SemanticAnswerCache
+
+VECTOR = np.ones(8, dtype=np.float32)
+
+
+def test_exact_and_near_duplicate_questions_hit():
+    cache = SemanticAnswerCache(threshold=0.95)
+    cache.put("doc", "fp", "What was revenue in 2023?", VECTOR, {"answer": "A"})
+    assert cache.get("doc", "fp", "what was revenue in 2023", VECTOR * 3) == ({"answer": "A"}, 1.0, "what was revenue in 2023")
+    response, similarity, question = cache.get("doc", "fp", "Revenue for 2023?", VECTOR)
+    assert response == {"answer": "A"} and similarity == 1.0
+
+
+def test_different_years_never_share_an_answer():
+    cache = SemanticAnswerCache(threshold=0.5)
+    cache.put("doc", "fp", "What was revenue in 2022?", VECTOR, {"answer": "2022"})
+    cache.put("doc", "fp", "Net debt FY21", VECTOR, {"answer": "fy21"})
+    # Same embedding, so only the numeric tokens tell them apart
+    assert cache.get("doc", "fp", "What was revenue in 2023?", VECTOR) is None
+    assert cache.get("doc", "fp", "Net debt FY22", VECTOR) is None
+    assert cache.get("doc", "fp", "What was revenue?", VECTOR) is None
+    assert cache.get("doc", "fp", "Revenue in 2022", VECTOR)[0] == {"answer": "2022"}
+    assert cache.stats()["misses"] == 3
+
+
+def test_entries_are_scoped_to_the_document():
+    cache = SemanticAnswerCache()
+    cache.put("doc-a", "fp", "What is total debt?", VECTOR, {"answer": "A"})
+    assert cache.get("doc-b", "fp", "What is total debt?", VECTOR) is None
+
+
+def test_reindexing_invalidates_the_document():
+    cache = SemanticAnswerCache()
+    cache.put("doc-a", "fp1", "What is total debt?", VECTOR, {"answer": "A"})
+    cache.put("doc-b", "fp1", "What is total debt?", VECTOR, {"answer": "B"})
+    assert cache.get("doc-a", "fp2", "What is total debt?", VECTOR) is None
+    assert cache.get("doc-b", "fp1", "What is total debt?", VECTOR)[0] == {"answer": "B"}
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_lru_eviction():
+    cache = SemanticAnswerCache(maxsize=2)
+    vectors = np.eye(3, dtype=np.float32)
+    for i, question in enumerate(["auditor", "debt", "equity"]):
+        if i == 2:
+            cache.get("doc", "fp", "auditor", vectors[0])
+        cache.put("doc", "fp", question, vectors[i], {"answer": question})
+    assert cache.get("doc", "fp", "debt", vectors[1]) is None
+    assert cache.get("doc", "fp", "auditor", vectors[0])[0] == {"answer": "auditor"}
+    assert cache.stats()["evictions"] == 1
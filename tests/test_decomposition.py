@@ -0,0 +1,109 @@
+import json
+import time
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import agents.decomposer_agent as decomposer_agent
+from agents.decomposition_cache import DecompositionCache
+from agents.query_complexity import needs_decomposition
+
+
+@pytest.mark.parametrize("query", [
+    "What is the company name?",
+    "What is total debt?",
+    "Who is the auditor?",
+    "What is the debt to equity ratio?",
+    "What is the interest coverage ratio?",
+    "What is the current ratio?",
+])
+def test_single_intent_questions_skip_the_llm(query):
+    assert not needs_decomposition(query)
+
+
+@pytest.mark.parametrize("query", [
+    "What is the revenue and profit?",
+    "Revenue, EBITDA, net profit and margins for the year",
+    "Compare EBITDA with last year",
+    "Revenue vs profit",
+    "Give me an overview of how the company funded its expansion over the last few years",
+])
+def test_multi_intent_questions_are_decomposed(query):
+    assert needs_decomposition(query)
+
+
+def test_get_put_normalizes_and_scopes_by_model(tmp_path):
+    cache = DecompositionCache(str(tmp_path / "cache.json"), flush_delay=60)
+    assert cache.get("m1", "Revenue and profit?") is None
+    cache.put("m1", "Revenue and profit?", ["What is revenue?", "What is profit?"])
+    assert cache.get("m1", "  revenue AND profit ") == ["What is revenue?", "What is profit?"]
+    assert cache.get("m2", "Revenue and profit?") is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
+
+
+def test_lru_eviction(tmp_path):
+    cache = DecompositionCache(str(tmp_path / "cache.json"), maxsize=2, flush_delay=60)
+    cache.put("m", "a and b", ["a"])
+    cache.put("m", "c and d", ["c"])
+    cache.get("m", "a and b")
+    cache.put("m", "e and f", ["e"])
+    assert cache.get("m", "c and d") is None
+    assert cache.get("m", "a and b") == ["a"]
+
+
+def test_put_defers_the_write_to_a_background_flush(tmp_path):
+    path = tmp_path / "cache.json"
+    cache = DecompositionCache(str(path), flush_delay=0.05)
+    cache.put("m", "a and b", ["a", "b"])
+    assert not path.exists()
+    deadline = time.time() + 5
+    while not path.exists() and time.time() < deadline:
+        time.sleep(0.01)
+    assert DecompositionCache(str(path)).get("m", "a and b") == ["a", "b"]
+
+
+def test_flush_merges_entries_from_other_workers(tmp_path):
+    path = str(tmp_path / "cache.json")
+    first, second = DecompositionCache(path, flush_delay=60), DecompositionCache(path, flush_delay=60)
+    first.get("m", "warm up")
+    second.get("m", "warm up")
+    first.put("m", "a and b", ["a"])
+    second.put("m", "c and d", ["c"])
+    first.flush()
+    second.flush()
+    with open(path) as f:
+        assert len(json.load(f)) == 2
+    reloaded = DecompositionCache(path)
+    assert reloaded.get("m", "a and b") == ["a"]
+    assert reloaded.get("m", "c and d") == ["c"]
+
+
+def test_unreadable_file_starts_empty(tmp_path):
+    path = tmp_path / "cache.json"
+    path.write_text("{not json")
+    cache = DecompositionCache(str(path), flush_delay=60)
+    assert cache.get("m", "a and b") is None
+    cache.put("m", "a and b", ["a"])
+    cache.flush()
+    assert DecompositionCache(str(path)).get("m", "a and b") == ["a"]
+
+
+def test_adecompose_does_not_write_on_the_event_loop(tmp_path, monkeypatch):
+    cache = DecompositionCache(str(tmp_path / "cache.json"), flush_delay=60)
+    writes = []
+    monkeypatch.setattr(cache, "_save", lambda entries: writes.append(dict(entries)))
+    monkeypatch.setattr(decomposer_agent, "decomposition_cache", cache)
+
+    async def create(**kwargs):
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="- What is revenue?\n- What is profit?"))])
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setattr(decomposer_agent, "get_async_client", lambda: client)
+
+    query = "What is the revenue and profit?"
+    assert asyncio.run(decomposer_agent.adecompose(query)) == (["What is revenue?", "What is profit?"], "llm")
+    assert writes == []
+    assert asyncio.run(decomposer_agent.adecompose(query))[1] == "cache"
+    cache.flush()
+    assert len(writes) == 1
@@ -0,0 +1,60 @@
+import importlib
+
+import pytest
+from langchain_core.documents import Document
+
+from ingestion import dedup
+from ingestion.dedup import NearDuplicateIndex, apply_merges
+
+DISCLAIMER = ("This report contains forward looking statements that involve risks and uncertainties "
+              "and actual results may differ materially from those projected")
+
+
+def doc(text, page_no, chunk_type="text"):
+    return Document(page_content=text, metadata={"page_no": page_no, "chunk_type": chunk_type})
+
+
+def test_repeated_boilerplate_collapses_to_first_copy():
+    documents = [doc(DISCLAIMER, 1), doc("Revenue from operations grew twelve percent", 2),
+                 doc(DISCLAIMER.upper() + ".", 3), doc(DISCLAIMER, 5)]
+    kept, kept_ids, merges = NearDuplicateIndex().collapse(documents, ["a", "b", "c", "d"])
+    assert kept_ids == ["a", "b"]
+    assert merges == [("a", 3), ("a", 5)]
+    assert kept[0].metadata["source_pages"] == [1]
+
+
+def test_different_chunk_types_are_never_merged():
+    index = NearDuplicateIndex()
+    _, kept_ids, merges = index.collapse([doc(DISCLAIMER, 1, "text"), doc(DISCLAIMER, 2, "table")], ["a", "b"])
+    assert kept_ids == ["a", "b"] and merges == []
+
+
+def test_partial_overlap_is_kept():
+    words = DISCLAIMER.split()
+    first = " ".join(words[:14])
+    second = " ".join(words[10:] + ["in", "later", "periods", "of", "the", "company"])
+    _, kept_ids, _ = NearDuplicateIndex().collapse([doc(first, 1), doc(second, 2)], ["a", "b"])
+    assert kept_ids == ["a", "b"]
+
+
+def test_seeded_from_store_and_merges_recorded(make_vectorstore):
+    vectorstore = make_vectorstore([{"content": DISCLAIMER, "page_no": 1, "has_table": False, "chunk_type": "text"}])
+    index = NearDuplicateIndex.from_vectorstore(vectorstore)
+    _, kept_ids, merges = index.collapse([doc(DISCLAIMER, 7)], ["new"])
+    assert kept_ids == [] and merges == [("c0", 7)]
+
+    apply_merges(vectorstore, merges + [("c0", 7)])
+    assert vectorstore.docstore.search("c0").metadata["source_pages"] == [1, 7]
+
+
+@pytest.mark.parametrize("value, enabled", [(None, True), ("1", True), ("0", False)])
+def test_ingest_dedup_flag(monkeypatch, value, enabled):
+    if value is None:
+        monkeypatch.delenv("INGEST_DEDUP", raising=False)
+    else:
+        monkeypatch.setenv("INGEST_DEDUP", value)
+    try:
+        assert importlib.reload(dedup).INGEST_DEDUP is enabled
+    finally:
+        monkeypatch.undo()
+        importlib.reload(dedup)
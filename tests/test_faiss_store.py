@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from retrieval.faiss_store import (
+    INDEX_FLAT, INDEX_HNSW, INDEX_IVF_FLAT, INDEX_IVF_PQ, AUTO_IVF_THRESHOLD, AUTO_PQ_THRESHOLD,
+    choose_index_type, create_index, current_index_type, ensure_index_type,
+)
+from tests.conftest import sample_chunks
+
+
+def test_auto_policy_by_corpus_size():
+    assert choose_index_type(10, "auto") == INDEX_FLAT
+    assert choose_index_type(AUTO_IVF_THRESHOLD, "auto") == INDEX_IVF_FLAT
+    assert choose_index_type(AUTO_PQ_THRESHOLD, "auto") == INDEX_IVF_PQ
+    assert choose_index_type(10, INDEX_HNSW) == INDEX_HNSW
+
+
+def test_unknown_and_untrained_types_are_rejected():
+    with pytest.raises(ValueError):
+        create_index(8, "annoy")
+    with pytest.raises(ValueError):
+        create_index(8, INDEX_IVF_FLAT)
+
+
+@pytest.mark.parametrize("index_type", [INDEX_HNSW, INDEX_IVF_FLAT, INDEX_IVF_PQ])
+def test_rebuild_keeps_positions_and_docstore(make_vectorstore, index_type):
+    vectorstore = make_vectorstore(sample_chunks())
+    rebuilt = ensure_index_type(vectorstore, index_type)
+
+    assert current_index_type(rebuilt.index) == index_type
+    assert rebuilt.index.ntotal == vectorstore.index.ntotal
+    assert rebuilt.index_to_docstore_id == vectorstore.index_to_docstore_id
+
+    query = np.asarray([vectorstore.embedding_function.embed_query("total borrowings for year 2008")], dtype=np.float32)
+    _, positions = rebuilt.index.search(query, 5)
+    top = rebuilt.docstore.search(rebuilt.index_to_docstore_id[int(positions[0][0])])
+    assert "borrowings" in top.page_content
+
+
+def test_flat_store_is_left_alone(make_vectorstore):
+    vectorstore = make_vectorstore(sample_chunks(20))
+    assert ensure_index_type(vectorstore, "auto") is vectorstore
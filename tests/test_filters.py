@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from ingestion.metadata import SECTION_OTHER
+from retrieval.faiss_store import INDEX_FLAT, INDEX_HNSW, INDEX_IVF_FLAT, ensure_index_type
+from retrieval.filters import MetadataIndex, filter_key
+from retrieval.retriever import retrieve_chunks_batch
+from retrieval.scoring import BM25Index
+from tests.conftest import sample_chunks
+
+CHUNKS = sample_chunks()
+
+
+def metadata_index():
+    return MetadataIndex.build([{k: v for k, v in c.items() if k != "content"} for c in CHUNKS])
+
+
+def test_filter_key_is_order_independent():
+    assert filter_key({"page_range": [1, 3], "has_table": True}) == filter_key({"has_table": True, "page_range": (1, 3)})
+    assert filter_key(None) == ()
+
+
+def test_mask_combines_predicates():
+    index = metadata_index()
+    mask = index.mask({"has_table": True, "page_range": (2, 5), "section": ["cash_flow", "notes"]})
+    expected = [c["has_table"] and 2 <= c["page_no"] <= 5 and c["section"] in ("cash_flow", "notes") for c in CHUNKS]
+    np.testing.assert_array_equal(mask, expected)
+    assert not index.mask({"section": "no_such_section"}).any()
+    with pytest.raises(ValueError):
+        index.mask({"year": 2024})
+
+
+def test_missing_sections_fall_back_to_other():
+    index = MetadataIndex.build([{"page_no": 1}, {"page_no": 2, "section": "notes"}])
+    np.testing.assert_array_equal(index.mask({"section": SECTION_OTHER}), [True, False])
+
+
+def test_save_load_round_trip(tmp_path):
+    index = metadata_index()
+    index.save(str(tmp_path))
+    loaded = MetadataIndex.load(str(tmp_path))
+    np.testing.assert_array_equal(loaded.mask({"section": "notes"}), index.mask({"section": "notes"}))
+    assert MetadataIndex.load(str(tmp_path / "missing")) is None
+
+
+def test_search_params_keep_index_settings(make_vectorstore):
+    index = metadata_index()
+    ivf = ensure_index_type(make_vectorstore(CHUNKS), INDEX_IVF_FLAT).index
+    params = index.search_params(ivf, {"has_table": True})
+    assert params.nprobe == ivf.nprobe
+    hnsw = ensure_index_type(make_vectorstore(CHUNKS), INDEX_HNSW).index
+    assert index.search_params(hnsw, {"has_table": True}).efSearch == hnsw.hnsw.efSearch
+    assert index.search_params(ivf, {"page_range": (900, 999)}) is None
+
+
+@pytest.mark.parametrize("index_type", [INDEX_FLAT, INDEX_HNSW, INDEX_IVF_FLAT])
+@pytest.mark.parametrize("hybrid", [False, True])
+def test_filtered_search_returns_only_matching_chunks(make_vectorstore, index_type, hybrid):
+    vectorstore = ensure_index_type(make_vectorstore(CHUNKS), index_type)
+    lexical = BM25Index.from_vectorstore(vectorstore) if hybrid else None
+    filters = {"has_table": True, "page_range": (10, 30)}
+    [hits] = retrieve_chunks_batch(vectorstore, ["total borrowings"], k=5, lexical_index=lexical,
+                                   filters=filters, metadata_index=metadata_index())
+    assert len(hits) == 5
+    assert all(c["has_table"] and 10 <= c["page_no"] <= 30 for c in hits)
+
+
+def test_filter_without_matches_returns_empty(make_vectorstore):
+    vectorstore = make_vectorstore(CHUNKS)
+    [hits] = retrieve_chunks_batch(vectorstore, ["total borrowings"], k=5, filters={"page_range": (900, 999)})
+    assert hits == []
@@ -20,9 +20,8 @@ else:
 # Add project root to sys.path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from langchain_community.vectorstores import FAISS
 from app.api.core.config import VECTORSTORE_PATH
-from ingestion.embeddings import get_embedding_model
+from app.api.core.store import load_index
 from graph.graph import build_graph
 
 def run_pipeline():
@@ -31,9 +30,7 @@ def run_pipeline():
     # 1. Load Vector Store
     print(f"Loading vector store from {VECTORSTORE_PATH}...")
     try:
-        embedder = get_embedding_model()
-        trusted_path = os.path.abspath(VECTORSTORE_PATH)
-        vectorstore = FAISS.load_local(trusted_path, embedder, allow_dangerous_deserialization=True)
+        vectorstore = load_index(VECTORSTORE_PATH)
         print("Vector store loaded successfully.")
     except Exception as e:
         print(f"Error loading vector store: {e}")
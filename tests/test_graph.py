@@ -0,0 +1,96 @@
+import asyncio
+import itertools
+
+import pytest
+
+import agents.decomposer_agent as decomposer_agent
+from agents.decomposition_cache import DecompositionCache
+from agents.retriever_agent import search_questions, search_tables, select_chunks, select_tables
+from graph.graph import build_graph
+from graph.nodes import join_retrieval_node
+from graph.state import GraphState, merge_timings
+from tests.conftest import sample_chunks
+
+SIMPLE_QUERY = "What were total borrowings?"
+MULTI_QUERY = "What were total borrowings and finance costs?"
+SUB_QUESTIONS = ["What were total borrowings?", "What were finance costs?", "What is the share capital?"]
+
+
+@pytest.fixture
+def vectorstore(make_vectorstore):
+    return make_vectorstore(sample_chunks())
+
+
+def expected_retrieval(questions, vectorstore):
+    # What the join should produce: the questions' rankings fused in the given order
+    return (select_chunks(search_questions(questions, vectorstore)),
+            select_tables(search_tables(questions, vectorstore)))
+
+
+@pytest.mark.parametrize("speculative", [False, True])
+def test_single_sub_question(stub_llm, vectorstore, speculative):
+    state = build_graph(vectorstore, speculative=speculative).invoke({"user_query": SIMPLE_QUERY})
+    assert state["sub_questions"] == [SIMPLE_QUERY]
+    assert state["decomposition"]["source"] == "bypass"
+    assert len(state["question_results"]) == (2 if speculative else 1)
+    # The speculative result duplicates the only branch and is dropped by the join
+    chunks, tables = expected_retrieval([SIMPLE_QUERY], vectorstore)
+    assert state["retrieved_chunks"] == chunks
+    assert state["table_chunks"] == tables
+    assert state["final_answer"] == "".join(stub_llm.answer_tokens)
+
+
+@pytest.mark.parametrize("speculative", [False, True])
+def test_several_sub_questions(stub_llm, vectorstore, speculative):
+    stub_llm.sub_questions = SUB_QUESTIONS
+    state = build_graph(vectorstore, speculative=speculative).invoke({"user_query": MULTI_QUERY})
+    assert state["sub_questions"] == SUB_QUESTIONS
+    assert state["decomposition"]["source"] == "llm"
+    assert sorted(r["question"] for r in state["question_results"]) == sorted(
+        SUB_QUESTIONS + ([MULTI_QUERY] if speculative else []))
+    # Sub-questions in decomposer order, the speculative raw-query result last
+    chunks, tables = expected_retrieval(SUB_QUESTIONS + ([MULTI_QUERY] if speculative else []), vectorstore)
+    assert state["retrieved_chunks"] == chunks
+    assert state["table_chunks"] == tables
+    assert {"decompose", "retrieve", "join_retrieval", "analyze", "validate", "summarize"} <= set(state["timings"])
+    assert ("speculative_retrieve" in state["timings"]) == speculative
+
+
+def test_join_is_independent_of_branch_completion_order(vectorstore):
+    ranked = zip(SUB_QUESTIONS, search_questions(SUB_QUESTIONS, vectorstore), search_tables(SUB_QUESTIONS, vectorstore))
+    results = [{"question": q, "chunks": c, "tables": t} for q, c, t in ranked]
+    speculative = {"question": MULTI_QUERY, "chunks": search_questions([MULTI_QUERY], vectorstore)[0],
+                   "tables": [], "speculative": True}
+    outputs = []
+    for order in itertools.permutations(results + [speculative]):
+        state = GraphState(user_query=MULTI_QUERY, sub_questions=SUB_QUESTIONS,
+                           question_results=[{**r, "chunks": [dict(c) for c in r["chunks"]]} for r in order])
+        update = join_retrieval_node(state)
+        outputs.append([c["chunk_id"] for c in update["retrieved_chunks"]])
+    assert all(output == outputs[0] for output in outputs)
+
+
+def test_merge_timings_keeps_the_slowest_branch():
+    merged = merge_timings({"decompose": 0.5, "retrieve": 0.2}, {"retrieve": 0.7})
+    assert merged == {"decompose": 0.5, "retrieve": 0.7}
+    assert merge_timings(merged, {"retrieve": 0.1}) == merged
+    assert merge_timings(None, {"analyze": 0.1}) == {"analyze": 0.1}
+
+
+@pytest.mark.parametrize("query, sub_questions", [(SIMPLE_QUERY, []), (MULTI_QUERY, SUB_QUESTIONS)])
+@pytest.mark.parametrize("speculative", [False, True])
+def test_async_run_matches_sync_run(stub_llm, vectorstore, query, sub_questions, speculative, monkeypatch, tmp_path):
+    stub_llm.sub_questions = sub_questions
+    graph_app = build_graph(vectorstore, speculative=speculative)
+    sync_state = graph_app.invoke({"user_query": query})
+    # Fresh decomposition cache, so the async run calls the (stub) LLM too
+    monkeypatch.setattr(decomposer_agent, "decomposition_cache",
+                        DecompositionCache(str(tmp_path / "async.json"), flush_delay=60))
+    async_state = asyncio.run(graph_app.ainvoke({"user_query": query}))
+    assert set(async_state["timings"]) == set(sync_state["timings"])
+    for state in (sync_state, async_state):
+        del state["timings"]
+        state["question_results"].sort(key=lambda r: (r.get("speculative", False), r["question"]))
+    assert async_state == sync_state
+    # The async summarizer streamed its answer
+    assert async_state["final_answer"] == "".join(stub_llm.answer_tokens)
@@ -0,0 +1,22 @@
+import pytest
+
+from ingestion.pipeline import run_ingestion_pipeline
+
+
+def pages(count):
+    return [
+        {"page_no": n, "text": f"Page {n}: revenue from operations grew in segment {n} with distinct wording {n * 17}.",
+         "tables": []}
+        for n in range(1, count + 1)
+    ]
+
+
+@pytest.mark.parametrize("concurrency", [0, 1, 4])
+def test_pipeline_commits_every_page_in_order(make_vectorstore, concurrency):
+    vectorstore = make_vectorstore([])
+    committed = []
+    stats = run_ingestion_pipeline(pages(7), vectorstore, on_commit=committed.append, batch_pages=2,
+                                   embed_batch_size=1, concurrency=concurrency, dedup=False)
+    assert stats["pages"] == 7
+    assert stats["chunks"] == vectorstore.index.ntotal > 0
+    assert committed == [2, 4, 6, 7]
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from retrieval.faiss_store import INDEX_FLAT, INDEX_HNSW, INDEX_IVF_FLAT, INDEX_IVF_PQ, current_index_type, ensure_index_type
+from retrieval.filters import MetadataIndex
+from retrieval.mmap_store import LazyDocstore, is_mmap_store, load_store, save_store
+from retrieval.retriever import retrieve_chunks_batch
+from tests.conftest import sample_chunks
+
+
+def search(vectorstore, query, k=5):
+    vector = np.asarray([vectorstore.embedding_function.embed_query(query)], dtype=np.float32)
+    return vectorstore.index.search(vector, k)
+
+
+@pytest.mark.parametrize("index_type", [INDEX_FLAT, INDEX_HNSW, INDEX_IVF_FLAT, INDEX_IVF_PQ])
+def test_save_load_round_trip(make_vectorstore, tmp_path, index_type):
+    vectorstore = ensure_index_type(make_vectorstore(sample_chunks()), index_type)
+    folder = str(tmp_path / index_type)
+    save_store(vectorstore, folder)
+    assert is_mmap_store(folder)
+
+    loaded = load_store(folder, vectorstore.embedding_function)
+    assert isinstance(loaded.docstore, LazyDocstore)
+    assert current_index_type(loaded.index) == index_type
+    assert loaded.index.ntotal == vectorstore.index.ntotal
+
+    distances, positions = search(vectorstore, "finance costs for year 2003")
+    loaded_distances, loaded_positions = search(loaded, "finance costs for year 2003")
+    np.testing.assert_array_equal(positions, loaded_positions)
+    np.testing.assert_allclose(distances, loaded_distances, rtol=1e-5)
+
+    for position in positions[0]:
+        doc_id = vectorstore.index_to_docstore_id[int(position)]
+        assert loaded.index_to_docstore_id[int(position)] == doc_id
+        original = vectorstore.docstore.search(doc_id)
+        assert loaded.docstore.document_at(int(position)).page_content == original.page_content
+        assert loaded.docstore.search(doc_id).metadata == original.metadata
+
+
+@pytest.mark.parametrize("index_type", [INDEX_FLAT, INDEX_IVF_FLAT])
+def test_filtered_search_on_mapped_store(make_vectorstore, tmp_path, index_type):
+    vectorstore = ensure_index_type(make_vectorstore(sample_chunks()), index_type)
+    save_store(vectorstore, str(tmp_path))
+    loaded = load_store(str(tmp_path), vectorstore.embedding_function)
+
+    [hits] = retrieve_chunks_batch(loaded, ["total borrowings"], k=4, filters={"has_table": True},
+                                   metadata_index=MetadataIndex.from_vectorstore(loaded))
+    assert hits and all(chunk["has_table"] for chunk in hits)
+
+
+def test_writable_load_can_be_appended_to(make_vectorstore, tmp_path):
+    vectorstore = make_vectorstore(sample_chunks(10))
+    save_store(vectorstore, str(tmp_path))
+    writable = load_store(str(tmp_path), vectorstore.embedding_function, writable=True)
+    writable.add_texts(["share capital issued during the year"], metadatas=[{"page_no": 9, "has_table": False}],
+                       ids=["extra"])
+
+    save_store(writable, str(tmp_path))
+    reloaded = load_store(str(tmp_path), vectorstore.embedding_function)
+    assert reloaded.index.ntotal == 11
+    assert reloaded.docstore.search("extra").page_content.startswith("share capital")
@@ -0,0 +1,53 @@
+from types import SimpleNamespace
+
+from ingestion import page_router
+from ingestion.page_router import ROUTE_TABLE, ROUTE_TEXT, classify_page, page_features, record_page
+
+
+def layout(lines=0, rects=0):
+    return SimpleNamespace(lines=[object()] * lines, rects=[object()] * rects)
+
+
+NARRATIVE = "The Board is pleased to present its report.\nOur strategy focuses on customers and growth.\n" * 5
+STATEMENT = "Consolidated Balance Sheet as at 31 March 2024\n" + "\n".join(
+    f"Trade receivables {1000 + i:,} {900 + i:,}" for i in range(12)
+)
+
+
+def test_narrative_page_skips_table_extraction():
+    assert classify_page(layout(), NARRATIVE) == ROUTE_TEXT
+
+
+def test_statement_heading_routes_to_tables():
+    assert classify_page(layout(), STATEMENT) == ROUTE_TABLE
+
+
+def test_ruled_numeric_page_routes_to_tables():
+    text = "Segment information\n" + "Revenue 120 340\n" + "Notes follow below in words only.\n" * 6
+    assert classify_page(layout(lines=10), text) == ROUTE_TABLE
+    assert classify_page(layout(), text) == ROUTE_TEXT
+
+
+def test_dense_numeric_page_routes_to_tables_without_ruling():
+    text = "\n".join(f"{i} {i * 3:,} {i * 7:,} {i * 11:,}" for i in range(1, 15))
+    features = page_features(layout(), text)
+    assert features["digit_density"] >= page_router.MIN_DIGIT_DENSITY
+    assert classify_page(layout(), text) == ROUTE_TABLE
+
+
+def test_routing_disabled_sends_every_page_to_tables(monkeypatch):
+    monkeypatch.setattr(page_router, "PDF_TABLE_ROUTING", False)
+    assert classify_page(layout(), NARRATIVE) == ROUTE_TABLE
+
+
+def test_record_page_summary():
+    summary = {}
+    record_page(summary, {"route": ROUTE_TABLE, "table_seconds": 0.5, "tables": [[["a"]]]})
+    # Audited text page whose full extraction found a table the router missed
+    record_page(summary, {"route": ROUTE_TEXT, "audited": True, "audit_seconds": 0.25, "tables": [[["b"]]]})
+    record_page(None, {"route": ROUTE_TEXT, "tables": []})
+    assert summary["pages"] == 2
+    assert summary[ROUTE_TABLE] == 1 and summary[ROUTE_TEXT] == 1
+    assert summary["table_seconds"] == 0.5
+    assert summary["audited_pages"] == 1
+    assert summary["lost_table_rate"] == 1.0
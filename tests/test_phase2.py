@@ -6,8 +6,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from graph.state import GraphState
 from graph.graph import build_graph
-from ingestion.embeddings import get_embedding_model
-from langchain_community.vectorstores import FAISS
+from app.api.core.store import load_index
 
 # Ensure vectorstore exists or mock it
 # For now, we assume it needs to be loaded, but if it doesn't exist we might need to create it.
@@ -16,14 +15,8 @@ if not os.path.exists("vectorstore/faiss_index"):
     print("Vectorstore not found. Please run ingestion first.")
     exit(1)
 
-embedder = get_embedding_model()
 try:
-    trusted_path = os.path.abspath("vectorstore/faiss_index")
-    vectorstore = FAISS.load_local(
-        trusted_path, 
-        embedder, 
-        allow_dangerous_deserialization=True
-    )
+    vectorstore = load_index("vectorstore/faiss_index")
 except Exception as e:
     print(f"Error loading vectorstore: {e}")
     exit(1)
@@ -0,0 +1,74 @@
+import json
+import asyncio
+
+import pytest
+
+from app.api.core.answer_cache import SemanticAnswerCache
+from app.api.core.registry import DocumentRegistry
+from app.api.routes import query as query_module
+from app.api.schemas.request import QueryRequest
+from tests.conftest import sample_chunks
+
+DOCUMENT_ID = "a" * 64
+MISSING_DOCUMENT_ID = "b" * 64
+QUESTION = "What were total borrowings and finance costs?"
+
+
+@pytest.fixture
+def registry(monkeypatch, make_vectorstore):
+    registry = DocumentRegistry()
+    registry.publish(DOCUMENT_ID, make_vectorstore(sample_chunks()))
+    monkeypatch.setattr(query_module, "registry", registry)
+    monkeypatch.setattr(query_module, "answer_cache", SemanticAnswerCache())
+    return registry
+
+
+def collect(question, document_id):
+    async def run():
+        return [json.loads(line) async for line in
+                query_module.stream_events(QueryRequest(question=question), document_id)]
+    return asyncio.run(run())
+
+
+def test_stream_reports_progress_then_tokens_then_result(stub_llm, registry):
+    stub_llm.sub_questions = ["What were total borrowings?", "What were finance costs?"]
+    events = collect(QUESTION, DOCUMENT_ID)
+    types = [event["type"] for event in events]
+
+    assert types[-1] == "result" and types.count("result") == 1
+    assert "error" not in types
+    # Tokens arrive in one run, after every other node and before the summarizer's own progress event
+    first, last = types.index("token"), len(types) - 1 - types[::-1].index("token")
+    assert set(types[first:last + 1]) == {"token"}
+    before = [event["node"] for event in events[:first]]
+    assert before[0] in ("decompose", "speculate")
+    assert before.count("retrieve") == 2
+    assert {"decompose", "join_retrieval", "analyze", "validate"} <= set(before)
+    assert [event["node"] for event in events[last + 1:-1]] == ["summarize"]
+    assert all(event["seconds"] is not None for event in events if event["type"] == "progress")
+
+    result = events[-1]
+    assert "".join(event["text"] for event in events if event["type"] == "token") == result["answer"]
+    assert result["answer"] == "".join(stub_llm.answer_tokens)
+    assert result["sources"] and result["decomposition"]["source"] == "llm"
+
+
+def test_repeated_question_streams_the_cached_result_only(stub_llm, registry):
+    first = collect(QUESTION, DOCUMENT_ID)[-1]
+    events = collect(QUESTION, DOCUMENT_ID)
+    assert [event["type"] for event in events] == ["result"]
+    assert events[0]["answer"] == first["answer"]
+    assert events[0]["answer_cache"]["hit"]
+
+
+def test_missing_document_yields_an_error_event(stub_llm, registry):
+    events = collect(QUESTION, MISSING_DOCUMENT_ID)
+    assert [event["type"] for event in events] == ["error"]
+    assert MISSING_DOCUMENT_ID in events[0]["detail"]
+    assert stub_llm.prompts == []
+
+
+def test_no_document_yields_the_empty_answer(stub_llm, registry):
+    events = collect(QUESTION, None)
+    assert [event["type"] for event in events] == ["result"]
+    assert events[0]["answer"] == query_module.NO_DOCUMENTS_ANSWER
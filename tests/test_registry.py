@@ -0,0 +1,63 @@
+import os
+import asyncio
+import threading
+
+from app.api.core import registry as registry_module
+from app.api.core.registry import LEGACY_DOCUMENT_ID, DocumentRegistry
+from retrieval.filters import METADATA_FILE, MetadataIndex
+from retrieval.mmap_store import load_store, save_store
+from tests.conftest import sample_chunks
+
+
+def test_missing_metadata_index_is_built_once_and_persisted(tmp_path, monkeypatch, make_vectorstore):
+    vectorstore = make_vectorstore(sample_chunks(40))
+    folder = str(tmp_path / "legacy")
+    save_store(vectorstore, folder)
+    assert not os.path.exists(os.path.join(folder, METADATA_FILE))
+
+    monkeypatch.setattr(registry_module, "VECTORSTORE_PATH", folder)
+    monkeypatch.setattr(registry_module, "load_index",
+                        lambda path, **kwargs: load_store(path, vectorstore.embedding_function))
+    builds = []
+    from_vectorstore = MetadataIndex.from_vectorstore.__func__
+    monkeypatch.setattr(MetadataIndex, "from_vectorstore",
+                        classmethod(lambda cls, store: builds.append(1) or from_vectorstore(cls, store)))
+
+    with DocumentRegistry().acquire(LEGACY_DOCUMENT_ID) as snapshot:
+        assert snapshot.metadata_index.mask({"has_table": True}).sum() == 14
+    assert os.path.exists(os.path.join(folder, METADATA_FILE))
+
+    # A cold reload (new process, or after eviction) reads the saved arrays
+    with DocumentRegistry().acquire(LEGACY_DOCUMENT_ID) as snapshot:
+        assert snapshot.metadata_index.mask({"has_table": True}).sum() == 14
+    assert builds == [1]
+
+
+def test_aacquire_loads_off_the_event_loop_and_pins_the_snapshot(tmp_path, monkeypatch, make_vectorstore):
+    vectorstore = make_vectorstore(sample_chunks(20))
+    folder = str(tmp_path / "legacy")
+    save_store(vectorstore, folder)
+    monkeypatch.setattr(registry_module, "VECTORSTORE_PATH", folder)
+    loading_threads = []
+
+    def load_index(path, **kwargs):
+        loading_threads.append(threading.current_thread())
+        return load_store(path, vectorstore.embedding_function)
+
+    monkeypatch.setattr(registry_module, "load_index", load_index)
+    registry = DocumentRegistry()
+
+    async def query():
+        async with registry.aacquire(LEGACY_DOCUMENT_ID) as snapshot:
+            assert snapshot.readers == 1
+            # A re-index while the query runs retires the snapshot but must not release it
+            registry.publish(LEGACY_DOCUMENT_ID, make_vectorstore(sample_chunks(4)), activate=False)
+            await asyncio.sleep(0)
+            assert snapshot.vectorstore is not None
+        return snapshot
+
+    snapshot = asyncio.run(query())
+    assert loading_threads and loading_threads[0] is not threading.main_thread()
+    assert snapshot.retired and snapshot.vectorstore is None
+    with registry.acquire(LEGACY_DOCUMENT_ID) as current:
+        assert current.vectorstore.index.ntotal == 4
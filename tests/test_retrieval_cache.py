@@ -0,0 +1,52 @@
+import sqlite3
+import os
+
+from ingestion.embedding_cache import CachedEmbeddings
+from retrieval import cache as cache_module
+from retrieval.cache import TTLCache, normalize_query, normalize_question, query_embedding_cache
+from retrieval.retriever import retrieve_chunks_batch
+from tests.conftest import sample_chunks
+
+
+def test_normalization():
+    assert normalize_query("  What IS   total debt? ") == "what is total debt?"
+    assert normalize_question("What is total debt?") == normalize_question("what is total debt")
+
+
+def test_ttl_cache_lru_eviction_and_stats():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1          # "a" is now most recently used
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    stats = cache.stats()
+    assert stats["evictions"] == 1 and stats["hits"] == 3 and stats["misses"] == 1
+
+
+def test_ttl_cache_expiry(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    cache = TTLCache(maxsize=4, ttl=10)
+    cache.put("a", 1)
+    now[0] += 11
+    assert cache.get("a") is None
+    assert cache.stats()["expired"] == 1
+
+
+def test_query_embeddings_bypass_the_persistent_chunk_cache(make_vectorstore, tmp_path):
+    query_embedding_cache.clear()
+    vectorstore = make_vectorstore(sample_chunks(20))
+    cached = CachedEmbeddings(vectorstore.embedding_function, cache_dir=str(tmp_path))
+    vectorstore.embedding_function = cached
+
+    def rows():
+        with sqlite3.connect(os.path.join(str(tmp_path), "embeddings.sqlite")) as conn:
+            return conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    retrieve_chunks_batch(vectorstore, ["total borrowings", "finance costs"], k=3)
+    retrieve_chunks_batch(vectorstore, ["total borrowings"], k=3)
+    assert rows() == 0
+    assert cached.hits == cached.misses == 0
+    assert query_embedding_cache.stats()["hits"] >= 1
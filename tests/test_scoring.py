@@ -0,0 +1,65 @@
+import numpy as np
+
+from retrieval.scoring import BM25Index, fuse_hybrid, reciprocal_rank_fusion, tokenize
+
+TEXTS = [
+    "Total borrowings stood at 1,234 crore at year end",
+    "Revenue from operations grew on higher volumes",
+    "Finance costs include interest on borrowings and lease liabilities",
+    "The Board recommends a final dividend",
+]
+IDS = ["a", "b", "c", "d"]
+
+
+def test_tokenize_drops_stopwords_and_thousands_separators():
+    assert tokenize("The total is 1,234.5 for the year") == ["total", "1234.5", "year"]
+
+
+def test_bm25_ranks_exact_terms_first():
+    index = BM25Index.build(TEXTS, IDS)
+    hits = index.search("borrowings 1234", k=4)
+    assert [p for p, _ in hits][:2] == [0, 2]
+    assert all(score > 0 for _, score in hits)
+    assert index.search("unrelated words", k=4) == []
+
+
+def test_bm25_mask_restricts_candidates():
+    index = BM25Index.build(TEXTS, IDS)
+    mask = np.array([False, False, True, True])
+    assert [p for p, _ in index.search("borrowings", k=4, mask=mask)] == [2]
+
+
+def test_bm25_save_load_round_trip(tmp_path):
+    index = BM25Index.build(TEXTS, IDS)
+    index.save(str(tmp_path))
+    loaded = BM25Index.load(str(tmp_path))
+    assert loaded.doc_ids == IDS
+    assert loaded.search("dividend", k=2) == index.search("dividend", k=2)
+    assert BM25Index.load(str(tmp_path / "missing")) is None
+
+
+def test_fuse_hybrid_weights_both_sides():
+    dense = [(0, 0.2), (1, 1.0), (2, 1.6)]   # squared L2 distances of unit vectors
+    lexical = [(2, 8.0), (3, 4.0)]
+    fused = dict(fuse_hybrid(dense, lexical, dense_weight=0.6))
+    assert abs(fused[0] - 0.54) < 1e-9       # cosine 0.9, no lexical hit
+    assert abs(fused[1] - 0.3) < 1e-9        # cosine 0.5
+    assert abs(fused[2] - 0.52) < 1e-9       # cosine 0.2, best lexical
+    assert abs(fused[3] - 0.2) < 1e-9        # weakest lexical hit still gets credit
+    assert fuse_hybrid([], [], 0.5) == []
+
+
+def test_lone_bm25_hit_beats_an_unmatched_result():
+    # Far dense neighbour (cosine 0.05) vs. the only chunk containing the query term
+    fused = fuse_hybrid([(0, 1.9)], [(1, 3.2)], dense_weight=0.6)
+    assert [p for p, _ in fused] == [1, 0]
+    assert fused[0][1] == 0.4 and fused[1][1] > 0
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    first = [{"chunk_id": "x"}, {"chunk_id": "y"}]
+    second = [{"chunk_id": "y"}, {"chunk_id": "z"}]
+    fused = reciprocal_rank_fusion([first, second])
+    assert [c["chunk_id"] for c in fused] == ["y", "x", "z"]
+    assert fused[0]["fusion_score"] > fused[1]["fusion_score"]
+    assert "fusion_score" not in first[0]